@@ -0,0 +1,350 @@
+# backend/app/analytics/leadtime.py
+#
+# Tempos de ciclo e SLA (percentis e histogramas), calculados em lote com NumPy.
+#
+# Métricas (em horas):
+#   conference   entrada da NF -> conferência   (entryDate -> conferenceDate)
+#   resolution   conferência -> tratativa       (conferenceDate -> resolvedDate)
+#   ca_cycle     criação do C.A. -> conclusão   (creation_date -> completion_date)
+# recortadas por fornecedor e por obra (a obra do recebimento é a da requisição
+# que ele atendeu; o C.A. não tem fornecedor).
+#
+# O cálculo é um job em lote, não uma consulta por tela:
+#   1. as datas vêm do banco já como segundos (epoch), em lotes de BATCH_SIZE
+#      linhas, e viram colunas float64 (NaN onde a data é nula);
+#   2. durações, percentis (p50/p90/p99), taxa dentro do SLA e histogramas são
+#      calculados de uma vez para todos os grupos: uma ordenação por (grupo,
+#      duração) e contagens com bincount, sem laço Python por linha ou grupo;
+#   3. o resultado de cada janela fica em memória por LEADTIME_TTL segundos. Um
+#      evento isolado quase não move percentis de 90 dias, então a validade é por
+#      tempo e não pelos eventos de alteração. A rota aceita só algumas janelas
+#      fixas (todas cabem no cache) e cada janela tem o seu lock: um cálculo
+#      longo de 365 dias não segura as consultas de 30. Vencido o prazo, quem
+#      chega durante o recálculo recebe o resultado anterior em vez de esperar.
+#
+# Configuração:
+#   LEADTIME_TTL                segundos de validade do resultado (padrão 600)
+#   SLA_CONFERENCE_HOURS        meta da conferência (padrão 24)
+#   SLA_RESOLUTION_HOURS        meta da tratativa de pendências (padrão 72)
+#   SLA_CA_CYCLE_HOURS          meta do ciclo do C.A. (padrão 168)
+#
+# Para calcular e imprimir o resumo fora da API:
+#     python -m app.analytics.leadtime --days 90
+
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+
+from ..receiving import models as receiving_models
+from ..requisitions import models as requisition_models
+from ..ca import models as ca_models
+
+LEADTIME_TTL = float(os.getenv("LEADTIME_TTL", "600"))
+SLA_HOURS = {
+    "conference": float(os.getenv("SLA_CONFERENCE_HOURS", "24")),
+    "resolution": float(os.getenv("SLA_RESOLUTION_HOURS", "72")),
+    "ca_cycle": float(os.getenv("SLA_CA_CYCLE_HOURS", "168")),
+}
+# Limites inferiores das faixas do histograma (horas); a última faixa é aberta
+HISTOGRAM_EDGES_HOURS = (0, 1, 4, 8, 24, 48, 72, 168, 336, 720)
+PERCENTILES = (50, 90, 99)
+BATCH_SIZE = 50_000
+# Janelas diferentes guardadas ao mesmo tempo (cabem todas as aceitas pela rota)
+MAX_CACHED_WINDOWS = 8
+
+
+# --- Leitura em colunas ---
+
+def _epoch(db, column):
+    """Data como segundos desde 1970 (float), calculada pelo banco."""
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.extract("epoch", column), Float)
+    # SQLite: dia juliano -> segundos (já vem como REAL, sem conversão de texto)
+    return (func.julianday(column) - 2440587.5) * 86400.0
+
+
+def _columns(db, stmt) -> list:
+    """
+    Colunas do resultado como listas, lidas do cursor do driver em lotes de
+    BATCH_SIZE linhas. As colunas são números e textos que o driver já entrega
+    prontos, então não há um Row do SQLAlchemy por linha (em milhões de linhas,
+    ele dobrava o tempo da leitura).
+    """
+    columns = [[] for _ in stmt.selected_columns]
+    result = db.connection().execute(stmt.execution_options(stream_results=True))
+    try:
+        while batch := result.cursor.fetchmany(BATCH_SIZE):
+            for column, values in zip(columns, zip(*batch)):
+                column.extend(values)
+    finally:
+        result.close()
+    return columns
+
+
+def _floats(values: list) -> np.ndarray:
+    # None vira NaN
+    return np.array(values, dtype=np.float64)
+
+
+def _factorize(values: list) -> tuple:
+    """Códigos inteiros (-1 para nulo) e os rótulos de cada código."""
+    labels = {}
+    codes = np.fromiter(
+        (-1 if value is None else labels.setdefault(value, len(labels)) for value in values),
+        dtype=np.int64, count=len(values),
+    )
+    return codes, [str(label) for label in labels]
+
+
+def _factorize_ints(values: np.ndarray) -> tuple:
+    """Como _factorize, para uma coluna inteira já em array (-1 para nulo)."""
+    present = values >= 0
+    labels, inverse = np.unique(values[present], return_inverse=True)
+    codes = np.full(len(values), -1, dtype=np.int64)
+    codes[present] = inverse
+    return codes, [str(label) for label in labels.tolist()]
+
+
+def _lookup(keys: np.ndarray, table_keys: np.ndarray, table_values: np.ndarray) -> np.ndarray:
+    """Valor de cada chave na tabela (chave -> valor), -1 onde não existe."""
+    if not len(table_keys):
+        return np.full(len(keys), -1, dtype=np.int64)
+    order = np.argsort(table_keys)
+    table_keys, table_values = table_keys[order], table_values[order]
+    positions = np.minimum(np.searchsorted(table_keys, keys), len(table_keys) - 1)
+    return np.where(table_keys[positions] == keys, table_values[positions], -1)
+
+
+def fetch_receivings(db, since: datetime) -> dict:
+    Receiving = receiving_models.Receiving
+    Requisition = requisition_models.Requisition
+    stmt = (
+        select(
+            Receiving.id, _epoch(db, Receiving.entryDate), _epoch(db, Receiving.conferenceDate),
+            _epoch(db, Receiving.resolvedDate), Receiving.supplier,
+        )
+        .where(Receiving.entryDate >= since, Receiving.conferenceDate.isnot(None))
+    )
+    ids, entry, conference, resolved, suppliers = _columns(db, stmt)
+
+    # Obra de cada recebimento (a da requisição que ele atendeu). Lida à parte e
+    # associada por busca binária nos ids: mais barato que um JOIN linha a linha
+    receiving_ids, obras = _columns(db, select(Requisition.receiving_id, Requisition.obra).where(
+        Requisition.receiving_id.isnot(None)
+    ))
+    obra = _lookup(
+        np.array(ids, dtype=np.int64), np.array(receiving_ids, dtype=np.int64), np.array(obras, dtype=np.int64)
+    )
+    return {
+        "entry": _floats(entry), "conference": _floats(conference), "resolved": _floats(resolved),
+        "supplier": _factorize(suppliers), "obra": _factorize_ints(obra),
+    }
+
+
+def fetch_cas(db, since: datetime) -> dict:
+    CA = ca_models.ComunicadoAlteracao
+    stmt = (
+        select(_epoch(db, CA.creation_date), _epoch(db, CA.completion_date), CA.obra)
+        .where(CA.creation_date >= since, CA.completion_date.isnot(None))
+    )
+    creation, completion, obras = _columns(db, stmt)
+    return {"creation": _floats(creation), "completion": _floats(completion), "obra": _factorize(obras)}
+
+
+# --- Cálculo vetorizado ---
+
+def _stats(counts, means, percentiles, within, histograms, sla_hours, labels=None) -> list:
+    return [
+        {
+            "key": labels[index] if labels is not None else None,
+            "count": int(counts[index]),
+            "mean_hours": round(float(means[index]), 3),
+            **{f"p{q}_hours": round(float(percentiles[index, position]), 3) for position, q in enumerate(PERCENTILES)},
+            "sla_hours": sla_hours,
+            "within_sla_rate": float(within[index]),
+            "histogram": histograms[index].tolist(),
+        }
+        for index in range(len(counts))
+    ]
+
+
+def grouped_stats(hours: np.ndarray, codes: np.ndarray, n_groups: int, sla_hours: float) -> tuple:
+    """
+    Contagem, média, percentis, taxa dentro do SLA e histograma de cada grupo
+    (codes em 0..n_groups-1; -1 fica de fora). Devolve arrays com uma linha por
+    grupo, só dos grupos com ao menos uma duração.
+    """
+    keep = codes >= 0
+    hours, codes = hours[keep], codes[keep]
+
+    # Ordena por (grupo, duração): cada grupo vira um trecho contíguo e ordenado.
+    # Uma chave única grupo * (maior duração + 1) + duração ordena com um só
+    # argsort, bem mais rápido que o lexsort das duas colunas
+    span = (hours.max() + 1) if len(hours) else 1
+    order = np.argsort(codes * span + hours)
+    hours, codes = hours[order], codes[order]
+    counts = np.bincount(codes, minlength=n_groups)
+    present = np.flatnonzero(counts)
+    counts = counts[present]
+    starts = np.cumsum(counts) - counts
+
+    # Percentis com interpolação linear (o mesmo método padrão de np.percentile)
+    position = starts[:, None] + (np.array(PERCENTILES) / 100.0)[None, :] * (counts[:, None] - 1)
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, (starts + counts - 1)[:, None])
+    fraction = position - lower
+    percentiles = hours[lower] * (1 - fraction) + hours[upper] * fraction
+
+    sums = np.bincount(codes, weights=hours, minlength=n_groups)[present]
+    within = np.bincount(codes, weights=hours <= sla_hours, minlength=n_groups)[present]
+
+    edges = np.array(HISTOGRAM_EDGES_HOURS, dtype=np.float64)
+    bins = np.searchsorted(edges, hours, side="right") - 1
+    histograms = np.bincount(codes * len(edges) + bins, minlength=n_groups * len(edges))
+    histograms = histograms.reshape(n_groups, len(edges))[present]
+
+    return present, counts, sums / counts, percentiles, within / counts, histograms
+
+
+def metric(name: str, start: np.ndarray, end: np.ndarray, slices: dict) -> dict:
+    """Resumo de uma métrica: geral e por recorte ({nome: (códigos, rótulos)})."""
+    valid = ~(np.isnan(start) | np.isnan(end))
+    # Datas fora de ordem (acertos manuais) contam como duração zero
+    hours = np.maximum(end[valid] - start[valid], 0) / 3600.0
+    sla_hours = SLA_HOURS[name]
+
+    overall = grouped_stats(hours, np.zeros(len(hours), dtype=np.int64), 1, sla_hours)
+    result = {
+        "metric": name,
+        "bins_hours": list(HISTOGRAM_EDGES_HOURS),
+        "overall": (_stats(*overall[1:], sla_hours) or [_empty(sla_hours)])[0],
+        "groups": {},
+    }
+    for slice_name, (codes, labels) in slices.items():
+        present, *arrays = grouped_stats(hours, codes[valid], len(labels), sla_hours)
+        groups = _stats(*arrays, sla_hours, labels=[labels[index] for index in present])
+        result["groups"][slice_name] = sorted(groups, key=lambda group: -group["count"])
+    return result
+
+
+def _empty(sla_hours: float) -> dict:
+    return {
+        "key": None, "count": 0, "mean_hours": None,
+        **{f"p{q}_hours": None for q in PERCENTILES},
+        "sla_hours": sla_hours, "within_sla_rate": None,
+        "histogram": [0] * len(HISTOGRAM_EDGES_HOURS),
+    }
+
+
+def compute(db, window_days: int) -> dict:
+    """Lê as colunas da janela e calcula as três métricas."""
+    started = time.perf_counter()
+    since = datetime.now(timezone.utc) - timedelta(days=window_days)
+    receivings = fetch_receivings(db, since)
+    cas = fetch_cas(db, since)
+    fetched = time.perf_counter()
+
+    receiving_slices = {"supplier": receivings["supplier"], "obra": receivings["obra"]}
+    metrics = [
+        metric("conference", receivings["entry"], receivings["conference"], receiving_slices),
+        metric("resolution", receivings["conference"], receivings["resolved"], receiving_slices),
+        metric("ca_cycle", cas["creation"], cas["completion"], {"obra": cas["obra"]}),
+    ]
+    finished = time.perf_counter()
+    return {
+        "window_days": window_days,
+        "computed_at": datetime.now(timezone.utc),
+        "rows": len(receivings["entry"]) + len(cas["creation"]),
+        "fetch_ms": (fetched - started) * 1000,
+        "compute_ms": (finished - fetched) * 1000,
+        "metrics": metrics,
+    }
+
+
+# --- Resultado em memória ---
+
+_results = {}
+# Um lock por janela (criado no primeiro uso)
+_locks = {}
+_locks_lock = threading.Lock()
+
+
+def _window_lock(window_days: int) -> threading.Lock:
+    with _locks_lock:
+        return _locks.setdefault(window_days, threading.Lock())
+
+
+def _on_event_loop() -> bool:
+    # No modo assíncrono a rota roda na thread do event loop (run_sync)
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def _store(window_days: int, result: dict):
+    if window_days not in _results and len(_results) >= MAX_CACHED_WINDOWS:
+        _results.pop(min(_results, key=lambda key: _results[key][0]), None)
+    _results[window_days] = (time.monotonic() + LEADTIME_TTL, result)
+
+
+def report(db, window_days: int) -> dict:
+    """Resultado da janela, recalculado no máximo uma vez a cada LEADTIME_TTL segundos."""
+    cached = _results.get(window_days)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    # Um cálculo por janela: sem resultado anterior, quem chega durante o cálculo
+    # espera e o reaproveita, em vez de repetir a mesma leitura em massa. Na
+    # thread do event loop não se espera (o cálculo em andamento pode estar
+    # suspenso no mesmo loop, aguardando o banco)
+    lock = _window_lock(window_days)
+    if not lock.acquire(blocking=cached is None and not _on_event_loop()):
+        if cached is not None:
+            return cached[1]
+        result = compute(db, window_days)
+        _store(window_days, result)
+        return result
+    try:
+        cached = _results.get(window_days)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+        result = compute(db, window_days)
+        _store(window_days, result)
+        return result
+    finally:
+        lock.release()
+
+
+def clear():
+    _results.clear()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ..database import SessionLocal, engine  # noqa: F401
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = compute(db, args.days)
+    finally:
+        db.close()
+    print(f"{result['rows']} linhas: leitura {result['fetch_ms']:.0f} ms, cálculo {result['compute_ms']:.0f} ms\n")
+    print(f"  {'métrica':<14}{'n':>9}{'p50 h':>9}{'p90 h':>9}{'p99 h':>9}{'no SLA':>9}")
+    for item in result["metrics"]:
+        overall = item["overall"]
+        if overall["count"]:
+            print(f"  {item['metric']:<14}{overall['count']:>9}{overall['p50_hours']:>9.1f}"
+                  f"{overall['p90_hours']:>9.1f}{overall['p99_hours']:>9.1f}{overall['within_sla_rate']:>9.1%}")
+        else:
+            print(f"  {item['metric']:<14}{0:>9}")
@@ -0,0 +1,49 @@
+# backend/app/analytics/models.py
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, JSON, UniqueConstraint, func
+from ..database import Base
+
+# --- Rollup mensal por fornecedor ---
+# Uma linha por (fornecedor, mês de entrada). É recalculada de forma incremental
+# sempre que um recebimento do fornecedor/mês é criado ou muda de status, então
+# os indicadores leem no máximo 12 linhas por fornecedor para um ano inteiro.
+class SupplierMonthlyRollup(Base):
+    __tablename__ = "rollup_fornecedor_mensal"
+    __table_args__ = (
+        UniqueConstraint("supplier", "month", name="uq_rollup_fornecedor_mensal_supplier_month"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    supplier = Column(String, nullable=False, index=True)
+    month = Column(Date, nullable=False, index=True)  # Primeiro dia do mês
+
+    received_count = Column(Integer, nullable=False, default=0)
+    conferred_count = Column(Integer, nullable=False, default=0)
+    punctual_count = Column(Integer, nullable=False, default=0)
+    rejected_count = Column(Integer, nullable=False, default=0)
+    nf_value_total = Column(Float, nullable=False, default=0.0)
+    # Contagem por tipo de pendência, ex.: {"avaria": 3, "sem pendência": 40}
+    issue_breakdown = Column(JSON, nullable=False, default=dict)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# --- Vazão de recebimentos por dia de produção e turno ---
+# Uma linha por (dia, turno) com a contagem de cada evento do fluxo de
+# recebimento. É somada na mesma transação de cada escrita (ver
+# throughput.py), então os gráficos leem no máximo dias x turnos linhas.
+class ReceivingThroughputBucket(Base):
+    __tablename__ = "rollup_recebimentos_turno"
+    __table_args__ = (
+        UniqueConstraint("day", "shift", name="uq_rollup_recebimentos_turno_day_shift"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)  # Dia de produção (começa no primeiro turno)
+    shift = Column(Integer, nullable=False)  # 1, 2, 3...
+
+    entered = Column(Integer, nullable=False, default=0)
+    conferred = Column(Integer, nullable=False, default=0)
+    pending = Column(Integer, nullable=False, default=0)
+    resolved = Column(Integer, nullable=False, default=0)
+    rejected = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,147 @@
+# backend/app/analytics/rollups.py
+#
+# Manutenção incremental do rollup mensal por fornecedor.
+#
+# As rotas de recebimento chamam refresh_for_receiving() na mesma transação da
+# alteração; apenas o balde (fornecedor, mês) afetado é recalculado, com uma
+# query agregada que usa o índice de 'supplier'. No PostgreSQL o balde é
+# bloqueado (advisory lock da transação) antes do recálculo: duas transações que
+# alteram recebimentos do mesmo fornecedor/mês recalculam uma após a outra, e a
+# segunda já enxerga o commit da primeira (READ COMMITTED). No SQLite a própria
+# escrita já serializa as transações.
+#
+# Para reconstruir todos os rollups a partir de 'recebimentos':
+#     python -m app.analytics.rollups
+
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import case, delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models
+from ..receiving import models as receiving_models
+
+Receiving = receiving_models.Receiving
+
+REJECTED_STATUSES = ("Rejeitado", "Entrada Rejeitada")
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(value: date) -> date:
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _upsert(db: Session, values: dict):
+    """INSERT ... ON CONFLICT (supplier, month) DO UPDATE, no dialeto em uso."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(models.SupplierMonthlyRollup).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["supplier", "month"],
+        set_={key: stmt.excluded[key] for key in values if key not in ("supplier", "month")}
+        | {"updated_at": func.now()},
+    )
+    db.execute(stmt)
+
+
+def _lock_bucket(db: Session, supplier: str, month: date):
+    """Bloqueia o balde (fornecedor, mês) até o fim da transação (PostgreSQL)."""
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext(supplier), month.year * 100 + month.month)))
+
+
+def refresh_supplier_month(db: Session, supplier: str, month: date):
+    """Recalcula o rollup de um fornecedor em um mês a partir de 'recebimentos'."""
+    # A sessão não faz autoflush; garante que a alteração atual entre no cálculo
+    db.flush()
+    # Sem o lock, duas transações concorrentes contariam cada uma só a própria
+    # alteração e o último upsert apagaria a do outro
+    _lock_bucket(db, supplier, month)
+
+    start = datetime(month.year, month.month, 1)
+    end = datetime(*_next_month(month).timetuple()[:3])
+
+    rows = db.execute(
+        select(
+            Receiving.issueType,
+            func.count().label("received"),
+            func.sum(case((Receiving.punctual.isnot(None), 1), else_=0)).label("conferred"),
+            func.sum(case((Receiving.punctual.is_(True), 1), else_=0)).label("punctual"),
+            func.sum(case((Receiving.status.in_(REJECTED_STATUSES), 1), else_=0)).label("rejected"),
+            func.coalesce(func.sum(Receiving.nfValue), 0.0).label("nf_value"),
+        )
+        .where(Receiving.supplier == supplier, Receiving.entryDate >= start, Receiving.entryDate < end)
+        .group_by(Receiving.issueType)
+    ).all()
+
+    if not rows:
+        db.execute(
+            delete(models.SupplierMonthlyRollup)
+            .where(models.SupplierMonthlyRollup.supplier == supplier, models.SupplierMonthlyRollup.month == month)
+        )
+        return
+
+    _upsert(db, {
+        "supplier": supplier,
+        "month": month,
+        "received_count": sum(row.received for row in rows),
+        "conferred_count": sum(row.conferred for row in rows),
+        "punctual_count": sum(row.punctual for row in rows),
+        "rejected_count": sum(row.rejected for row in rows),
+        "nf_value_total": float(sum(row.nf_value for row in rows)),
+        "issue_breakdown": {row.issueType: row.received for row in rows if row.issueType},
+    })
+
+
+def refresh_for_receiving(db: Session, receiving: Receiving):
+    """Atualiza o rollup do fornecedor/mês de um recebimento recém-alterado."""
+    # Em um recebimento novo, o flush gera o entryDate (server_default)
+    db.flush()
+    refresh_supplier_month(db, receiving.supplier, month_start(receiving.entryDate))
+
+
+def rebuild_all(db: Session) -> int:
+    """Reconstrói todos os rollups em uma única leitura sequencial de 'recebimentos'."""
+    buckets = defaultdict(lambda: {
+        "received_count": 0, "conferred_count": 0, "punctual_count": 0,
+        "rejected_count": 0, "nf_value_total": 0.0, "issue_breakdown": defaultdict(int),
+    })
+    rows = db.execute(
+        select(Receiving.supplier, Receiving.entryDate, Receiving.status,
+               Receiving.punctual, Receiving.issueType, Receiving.nfValue)
+        .execution_options(yield_per=5000)
+    )
+    for row in rows:
+        bucket = buckets[(row.supplier, month_start(row.entryDate))]
+        bucket["received_count"] += 1
+        bucket["conferred_count"] += row.punctual is not None
+        bucket["punctual_count"] += row.punctual is True
+        bucket["rejected_count"] += row.status in REJECTED_STATUSES
+        bucket["nf_value_total"] += row.nfValue or 0.0
+        if row.issueType:
+            bucket["issue_breakdown"][row.issueType] += 1
+
+    db.execute(delete(models.SupplierMonthlyRollup))
+    for (supplier, month), bucket in buckets.items():
+        bucket["issue_breakdown"] = dict(bucket["issue_breakdown"])
+        db.add(models.SupplierMonthlyRollup(supplier=supplier, month=month, **bucket))
+    db.commit()
+    return len(buckets)
+
+
+if __name__ == "__main__":
+    from ..database import SessionLocal, engine
+    from ..migrations import check_schema_version
+
+    # A tabela é criada pelas migrações (python -m app.migrations)
+    check_schema_version(engine)
+    db = SessionLocal()
+    try:
+        print(f"{rebuild_all(db)} rollups (fornecedor, mês) reconstruídos")
+    finally:
+        db.close()
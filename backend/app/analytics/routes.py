@@ -0,0 +1,125 @@
+# backend/app/analytics/routes.py
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Optional, List, Literal
+from datetime import date, timedelta
+from collections import Counter
+from . import models, schemas, throughput
+from .rollups import month_start
+from ..database import get_db
+from ..cache import cached
+
+# Maior intervalo aceito pela série de vazão (dias)
+MAX_THROUGHPUT_DAYS = 731
+# Janelas (dias) aceitas pelos tempos de ciclo: cada uma é um cálculo sobre o
+# histórico inteiro da janela, guardado em memória (ver leadtime.report)
+LEAD_TIME_WINDOWS = (7, 30, 90, 180, 365, 730)
+
+
+router = APIRouter(prefix="/api/analytics", tags=["Indicadores"])
+
+
+def _rates(data: dict) -> dict:
+    data["punctuality_rate"] = (
+        data["punctual_count"] / data["conferred_count"] if data["conferred_count"] else None
+    )
+    data["rejection_rate"] = (
+        data["rejected_count"] / data["received_count"] if data["received_count"] else None
+    )
+    return data
+
+
+@router.get("/suppliers", response_model=List[schemas.SupplierScorecard])
+def get_supplier_scorecards(
+    db: Session = Depends(get_db),
+    supplier: Optional[str] = None,
+    start_month: Optional[date] = None,
+    end_month: Optional[date] = None
+):
+    """
+    Scorecards de fornecedores (pontualidade, pendências, rejeições e valor de NF
+    por mês), lidos dos rollups mensais pré-calculados.
+    """
+    Rollup = models.SupplierMonthlyRollup
+    query = db.query(Rollup)
+    if supplier:
+        query = query.filter(Rollup.supplier == supplier)
+    if start_month:
+        query = query.filter(Rollup.month >= month_start(start_month))
+    if end_month:
+        query = query.filter(Rollup.month <= month_start(end_month))
+
+    scorecards = {}
+    for rollup in query.order_by(Rollup.supplier, Rollup.month).all():
+        card = scorecards.setdefault(rollup.supplier, {
+            "supplier": rollup.supplier, "received_count": 0, "conferred_count": 0,
+            "punctual_count": 0, "rejected_count": 0, "nf_value_total": 0.0,
+            "issue_breakdown": Counter(), "months": [],
+        })
+        month = _rates(schemas.SupplierMonth.model_validate(rollup).model_dump())
+        card["months"].append(month)
+        for field in ("received_count", "conferred_count", "punctual_count", "rejected_count", "nf_value_total"):
+            card[field] += month[field]
+        card["issue_breakdown"].update(rollup.issue_breakdown or {})
+
+    return [_rates(card) for card in scorecards.values()]
+
+
+@router.get("/throughput", response_model=schemas.ThroughputSeries)
+@cached(schemas.ThroughputSeries, tags=["recebimentos"])
+def get_receiving_throughput(
+    db: Session = Depends(get_db),
+    start_day: Optional[date] = None,
+    end_day: Optional[date] = None,
+    granularity: Literal["day", "shift"] = "day"
+):
+    """
+    Vazão de recebimentos (entradas, conferências, pendências, tratativas e
+    rejeições) por dia de produção ou por turno. Padrão: os últimos 30 dias.
+    O dia corrente é recontado na hora e vem marcado com 'live'.
+    """
+    end_day = end_day or throughput.current_day()
+    start_day = start_day or end_day - timedelta(days=29)
+    if start_day > end_day:
+        raise HTTPException(status_code=400, detail="start_day deve ser anterior ou igual a end_day.")
+    if (end_day - start_day).days >= MAX_THROUGHPUT_DAYS:
+        raise HTTPException(status_code=400, detail=f"Intervalo máximo de {MAX_THROUGHPUT_DAYS} dias.")
+
+    return {
+        "granularity": granularity,
+        "timezone": throughput.PLANT_TIMEZONE,
+        "shifts": throughput.shifts(),
+        "points": throughput.series(db, start_day, end_day, granularity),
+    }
+
+
+@router.get("/lead-times", response_model=schemas.LeadTimeReport)
+def get_lead_times(
+    db: Session = Depends(get_db),
+    days: int = 90,
+    group_by: Optional[Literal["supplier", "obra"]] = None,
+    limit: int = Query(20, ge=1, le=500)
+):
+    """
+    Percentis (p50/p90/p99), taxa dentro do SLA e histograma dos tempos de
+    entrada -> conferência, conferência -> tratativa e ciclo do C.A., nos
+    últimos 'days' dias (uma das janelas de LEAD_TIME_WINDOWS). Com 'group_by',
+    os 'limit' grupos com mais registros.
+    O resultado é calculado em lote e reaproveitado por LEADTIME_TTL segundos.
+    """
+    if days not in LEAD_TIME_WINDOWS:
+        raise HTTPException(
+            status_code=400, detail=f"'days' deve ser uma das janelas {', '.join(map(str, LEAD_TIME_WINDOWS))}."
+        )
+    # Importado só na primeira consulta (o NumPy pesa na subida do worker)
+    from . import leadtime
+
+    result = leadtime.report(db, days)
+    return {
+        **result,
+        "group_by": group_by,
+        "metrics": [
+            {**item, "groups": item["groups"].get(group_by, [])[:limit] if group_by else []}
+            for item in result["metrics"]
+        ],
+    }
@@ -0,0 +1,81 @@
+# backend/app/analytics/schemas.py
+from pydantic import BaseModel
+from typing import Optional, List, Dict
+from datetime import date, datetime
+
+# Indicadores de um fornecedor em um mês
+class SupplierMonth(BaseModel):
+    month: date
+    received_count: int
+    conferred_count: int
+    punctual_count: int
+    rejected_count: int
+    nf_value_total: float
+    punctuality_rate: Optional[float] = None
+    rejection_rate: Optional[float] = None
+    issue_breakdown: Dict[str, int]
+
+    class Config:
+        from_attributes = True
+
+# Scorecard do fornecedor: totais do período + série mensal
+class SupplierScorecard(BaseModel):
+    supplier: str
+    received_count: int
+    conferred_count: int
+    punctual_count: int
+    rejected_count: int
+    nf_value_total: float
+    punctuality_rate: Optional[float] = None
+    rejection_rate: Optional[float] = None
+    issue_breakdown: Dict[str, int]
+    months: List[SupplierMonth]
+
+# Vazão de recebimentos em um dia (ou turno) de produção
+class ThroughputPoint(BaseModel):
+    day: date
+    shift: Optional[int] = None
+    entered: int
+    conferred: int
+    pending: int
+    resolved: int
+    rejected: int
+    live: bool = False  # Dia corrente, recontado na hora
+
+class ShiftInfo(BaseModel):
+    shift: int
+    start: str
+    end: str
+
+class ThroughputSeries(BaseModel):
+    granularity: str
+    timezone: str
+    shifts: List[ShiftInfo]
+    points: List[ThroughputPoint]
+
+# Tempo de ciclo (horas) de um grupo: fornecedor, obra ou o total (key = None)
+class LeadTimeStats(BaseModel):
+    key: Optional[str] = None
+    count: int
+    mean_hours: Optional[float] = None
+    p50_hours: Optional[float] = None
+    p90_hours: Optional[float] = None
+    p99_hours: Optional[float] = None
+    sla_hours: float
+    within_sla_rate: Optional[float] = None
+    histogram: List[int]  # Contagem por faixa de LeadTimeMetric.bins_hours
+
+class LeadTimeMetric(BaseModel):
+    metric: str
+    bins_hours: List[float]
+    overall: LeadTimeStats
+    groups: List[LeadTimeStats]
+
+class LeadTimeReport(BaseModel):
+    window_days: int
+    group_by: Optional[str] = None
+    computed_at: datetime
+    rows: int
+    fetch_ms: float
+    compute_ms: float
+    metrics: List[LeadTimeMetric]
@@ -0,0 +1,203 @@
+# backend/app/analytics/throughput.py
+#
+# Vazão de recebimentos por dia de produção e turno (gráficos do dashboard).
+#
+# Eventos contados em cada balde (dia, turno), pela data em que aconteceram:
+#   entered    NF registrada (entryDate)
+#   conferred  conferência feita (conferenceDate)
+#   pending    conferência que abriu pendência (conferenceDate)
+#   resolved   pendência tratada (resolvedDate)
+#   rejected   material recusado na conferência, NF rejeitada na entrada ou
+#              pendência encerrada como rejeitada
+#
+# As rotas de escrita chamam record() na mesma transação da alteração: um
+# INSERT ... ON CONFLICT DO UPDATE soma o evento ao balde, sem ler
+# 'recebimentos'. A série lê no máximo (dias x turnos) baldes, qualquer que seja
+# o tamanho do histórico; o dia de produção corrente é recontado na hora a
+# partir das linhas do dia (índices de entryDate, conferenceDate e resolvedDate)
+# e substitui os seus baldes na resposta.
+#
+# Turnos: SHIFT_STARTS (horas locais de início, padrão "6,14,22") no fuso
+# PLANT_TIMEZONE (padrão America/Sao_Paulo). O dia de produção começa no
+# primeiro turno, então o último turno termina na manhã do dia seguinte.
+#
+# Para reconstruir os baldes a partir de 'recebimentos':
+#     python -m app.analytics.throughput
+
+import os
+from collections import Counter, defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models
+from ..receiving import models as receiving_models
+
+Receiving = receiving_models.Receiving
+Bucket = models.ReceivingThroughputBucket
+
+PLANT_TIMEZONE = os.getenv("PLANT_TIMEZONE", "America/Sao_Paulo")
+PLANT_TZ = ZoneInfo(PLANT_TIMEZONE)
+SHIFT_STARTS = tuple(sorted(int(hour) for hour in os.getenv("SHIFT_STARTS", "6,14,22").split(",")))
+
+EVENTS = ("entered", "conferred", "pending", "resolved", "rejected")
+
+
+# --- Dias de produção e turnos ---
+
+def _aware(value: datetime) -> datetime:
+    # Datas sem fuso (SQLite) são UTC
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def bucket_of(value: datetime) -> tuple:
+    """(dia de produção, turno) de um instante."""
+    shifted = _aware(value).astimezone(PLANT_TZ) - timedelta(hours=SHIFT_STARTS[0])
+    hour = shifted.hour + SHIFT_STARTS[0]
+    shift = sum(1 for start in SHIFT_STARTS if start <= hour)
+    return shifted.date(), shift
+
+
+def day_bounds(day: date) -> tuple:
+    """Início e fim (UTC) de um dia de produção."""
+    start = datetime.combine(day, time(SHIFT_STARTS[0]), PLANT_TZ)
+    end = datetime.combine(day + timedelta(days=1), time(SHIFT_STARTS[0]), PLANT_TZ)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def current_day() -> date:
+    return bucket_of(datetime.now(timezone.utc))[0]
+
+
+def shifts() -> list:
+    ends = SHIFT_STARTS[1:] + SHIFT_STARTS[:1]
+    return [
+        {"shift": index, "start": f"{start:02d}:00", "end": f"{end:02d}:00"}
+        for index, (start, end) in enumerate(zip(SHIFT_STARTS, ends), start=1)
+    ]
+
+
+def row_events(row) -> list:
+    """(evento, instante) de um recebimento, derivados do seu estado atual."""
+    events = [("entered", row.entryDate)]
+    if row.conferenceDate is not None:
+        events.append(("conferred", row.conferenceDate))
+        # Só pendências chegam à tratativa (resolvedDate após a conferência)
+        if row.status == "Pendente" or row.resolvedDate is not None:
+            events.append(("pending", row.conferenceDate))
+        if row.resolvedDate is not None:
+            events.append(("resolved", row.resolvedDate))
+    if row.status == "Entrada Rejeitada" and row.resolvedDate is not None:
+        events.append(("rejected", row.resolvedDate))
+    elif row.status == "Rejeitado":
+        events.append(("rejected", row.resolvedDate or row.conferenceDate))
+    return [(event, at) for event, at in events if at is not None]
+
+
+# --- Atualização incremental ---
+
+def record_buckets(db: Session, deltas: dict):
+    """Soma {(dia, turno): Counter(evento=n)} aos baldes, um upsert atômico por balde."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    for (day, shift), counts in deltas.items():
+        values = {event: counts.get(event, 0) for event in EVENTS}
+        if not any(values.values()):
+            continue
+        stmt = insert(Bucket).values(day=day, shift=shift, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day", "shift"],
+            set_={event: Bucket.__table__.c[event] + stmt.excluded[event] for event in EVENTS},
+        )
+        db.execute(stmt)
+
+
+def record(db: Session, at: datetime, **counts):
+    """Soma eventos acontecidos no instante 'at' (ex.: conferred=1, pending=1)."""
+    record_buckets(db, {bucket_of(at): Counter(counts)})
+
+
+def _count(rows, start: datetime = None, end: datetime = None) -> dict:
+    buckets = defaultdict(Counter)
+    for row in rows:
+        for event, at in row_events(row):
+            at = _aware(at)
+            if start is None or start <= at < end:
+                buckets[bucket_of(at)][event] += 1
+    return buckets
+
+
+_ROW_COLUMNS = (Receiving.entryDate, Receiving.conferenceDate, Receiving.resolvedDate, Receiving.status)
+
+
+def live_day(db: Session, day: date) -> dict:
+    """Baldes de um dia recontados a partir de 'recebimentos' (só as linhas com evento no dia)."""
+    start, end = day_bounds(day)
+    rows = db.execute(select(*_ROW_COLUMNS).where(or_(
+        (Receiving.entryDate >= start) & (Receiving.entryDate < end),
+        (Receiving.conferenceDate >= start) & (Receiving.conferenceDate < end),
+        (Receiving.resolvedDate >= start) & (Receiving.resolvedDate < end),
+    )))
+    return _count(rows, start, end)
+
+
+# --- Leitura ---
+
+def series(db: Session, start_day: date, end_day: date, granularity: str = "day") -> list:
+    """Pontos de start_day a end_day (inclusive), com zeros nos baldes sem eventos."""
+    buckets = defaultdict(Counter)
+    for row in db.execute(
+        select(Bucket).where(Bucket.day >= start_day, Bucket.day <= end_day)
+    ).scalars():
+        buckets[(row.day, row.shift)].update({event: getattr(row, event) for event in EVENTS})
+
+    today = current_day()
+    if start_day <= today <= end_day:
+        for key in [key for key in buckets if key[0] == today]:
+            del buckets[key]
+        buckets.update(live_day(db, today))
+
+    shift_numbers = range(1, len(SHIFT_STARTS) + 1)
+    points = []
+    day = start_day
+    while day <= end_day:
+        if granularity == "shift":
+            for shift in shift_numbers:
+                counts = buckets.get((day, shift), Counter())
+                points.append({"day": day, "shift": shift, "live": day == today,
+                               **{event: counts[event] for event in EVENTS}})
+        else:
+            counts = sum((buckets.get((day, shift), Counter()) for shift in shift_numbers), Counter())
+            points.append({"day": day, "live": day == today, **{event: counts[event] for event in EVENTS}})
+        day += timedelta(days=1)
+    return points
+
+
+# --- Reconstrução completa ---
+
+def rebuild_all(db: Session) -> int:
+    """Reconstrói todos os baldes em uma única leitura sequencial de 'recebimentos'."""
+    buckets = _count(db.execute(select(*_ROW_COLUMNS).execution_options(yield_per=5000)))
+    db.execute(delete(Bucket))
+    db.add_all(
+        Bucket(day=day, shift=shift, **{event: counts[event] for event in EVENTS})
+        for (day, shift), counts in buckets.items()
+    )
+    db.commit()
+    return len(buckets)
+
+
+if __name__ == "__main__":
+    from ..database import SessionLocal, engine
+    from ..migrations import check_schema_version
+
+    # A tabela é criada pelas migrações (python -m app.migrations)
+    check_schema_version(engine)
+    db = SessionLocal()
+    try:
+        print(f"{rebuild_all(db)} baldes (dia, turno) reconstruídos")
+    finally:
+        db.close()
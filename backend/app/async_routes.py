@@ -0,0 +1,82 @@
+# backend/app/async_routes.py
+#
+# Adaptação das rotas para o modo assíncrono (DATABASE_ASYNC=true).
+#
+# Em vez de manter uma segunda cópia de cada rota, cada endpoint que depende de
+# get_db é envolvido por um handler 'async def' que recebe um AsyncSession e
+# executa a lógica original com AsyncSession.run_sync(). O I/O do banco passa a
+# ser feito pelo driver assíncrono no event loop, sem ocupar uma thread do
+# threadpool do Starlette durante a ida e volta ao banco.
+#
+# A resposta é validada contra o response_model ainda dentro do run_sync, pois
+# relacionamentos carregados de forma preguiçosa (ex.: fulfilled_requisition)
+# só podem ser acessados ali.
+
+import functools
+import inspect
+
+from fastapi import APIRouter, Depends, params
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.responses import Response
+
+from .database import get_db, get_async_db
+
+
+def _db_parameter(endpoint):
+    for parameter in inspect.signature(endpoint).parameters.values():
+        if isinstance(parameter.default, params.Depends) and parameter.default.dependency is get_db:
+            return parameter.name
+    return None
+
+
+def _to_async(endpoint, response_model):
+    db_name = _db_parameter(endpoint)
+    if db_name is None:
+        return endpoint
+
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+
+    def call_sync(session, kwargs):
+        result = endpoint(**kwargs, **{db_name: session})
+        if adapter is None or isinstance(result, Response):
+            return result
+        return adapter.validate_python(result, from_attributes=True)
+
+    @functools.wraps(endpoint)
+    async def async_endpoint(**kwargs):
+        db = kwargs.pop(db_name)
+        return await db.run_sync(call_sync, kwargs)
+
+    signature = inspect.signature(endpoint)
+    async_endpoint.__signature__ = signature.replace(parameters=[
+        parameter.replace(default=Depends(get_async_db), annotation=AsyncSession)
+        if parameter.name == db_name else parameter
+        for parameter in signature.parameters.values()
+    ])
+    return async_endpoint
+
+
+def make_async_router(router: APIRouter) -> APIRouter:
+    """Cria uma cópia do roteador com os endpoints adaptados para AsyncSession."""
+    async_router = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            async_router.routes.append(route)
+            continue
+        async_router.add_api_route(
+            route.path,
+            _to_async(route.endpoint, route.response_model),
+            methods=list(route.methods),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            name=route.name,
+            response_class=route.response_class,
+        )
+    return async_router
@@ -0,0 +1,25 @@
+# backend/app/audit/models.py
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from ..database import Base
+
+# --- Log de auditoria (somente inserção) ---
+# Uma linha por transição de estado: quem, quando, de qual status para qual e
+# os dados da transição (motivo, observações...). As rotas continuam
+# atualizando as colunas da entidade; aqui fica o histórico completo, que nunca
+# é alterado nem apagado pela aplicação.
+class AuditEvent(Base):
+    __tablename__ = "audit_events"
+    __table_args__ = (
+        # Linha do tempo de uma entidade, em ordem
+        Index("ix_audit_events_entity_type_entity_id_ts", "entity_type", "entity_id", "ts"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    entity_type = Column(String(50), nullable=False)  # recebimento, requisition, ca, ca_item
+    entity_id = Column(Integer, nullable=False)
+    ts = Column(DateTime(timezone=True), nullable=False)  # Momento da transição (não o da gravação)
+    action = Column(String(50), nullable=False)  # Ex.: conferred, resolved, rejected, fulfilled
+    actor = Column(String, nullable=True)
+    from_status = Column(String, nullable=True)
+    to_status = Column(String, nullable=True)
+    data = Column(JSON, nullable=True)
@@ -0,0 +1,55 @@
+# backend/app/audit/routes.py
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+from typing import Optional, Literal
+from datetime import timezone
+from . import models, schemas
+from .writer import audit_writer
+from ..database import get_db
+from ..pagination import encode_cursor, decode_cursor
+
+router = APIRouter(prefix="/api/audit", tags=["Auditoria"])
+
+EntityType = Literal["recebimento", "requisition", "ca", "ca_item"]
+
+
+def _identity(event: schemas.AuditEvent) -> tuple:
+    # Datas sem fuso (SQLite) são UTC
+    ts = event.ts if event.ts.tzinfo else event.ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc), event.action, event.from_status, event.to_status
+
+
+@router.get("/{entity_type}/{entity_id}", response_model=schemas.AuditTimeline)
+def get_entity_timeline(
+    entity_type: EntityType,
+    entity_id: int,
+    db: Session = Depends(get_db),
+    # Paginação por cursor (keyset em ts, id)
+    cursor: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=1000)
+):
+    """
+    Linha do tempo de uma entidade: todas as transições registradas, em ordem
+    (índice (entity_type, entity_id, ts)). Na última página entram também as
+    transições recém-confirmadas que este worker ainda não gravou.
+    """
+    Event = models.AuditEvent
+    query = db.query(Event).filter(Event.entity_type == entity_type, Event.entity_id == entity_id)
+    if cursor:
+        last_ts, last_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Event.ts, Event.id) > tuple_(last_ts, last_id))
+    events = query.order_by(Event.ts, Event.id).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(events) > limit:
+        events = events[:limit]
+        next_cursor = encode_cursor(events[-1].ts, events[-1].id)
+    timeline = [schemas.AuditEvent.model_validate(event) for event in events]
+    if next_cursor is None:
+        # Um lote gravado entre a consulta e a leitura do buffer apareceria duas vezes
+        written = {_identity(event) for event in timeline}
+        pending = [schemas.AuditEvent(**payload, pending=True) for payload in audit_writer.pending(entity_type, entity_id)]
+        timeline += sorted((event for event in pending if _identity(event) not in written), key=_identity)
+
+    return {"entity_type": entity_type, "entity_id": entity_id, "events": timeline, "next_cursor": next_cursor}
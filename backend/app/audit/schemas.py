@@ -0,0 +1,27 @@
+# backend/app/audit/schemas.py
+from pydantic import BaseModel
+from typing import Optional, List, Dict, Any
+from datetime import datetime
+
+# Uma transição de estado registrada no log de auditoria
+class AuditEvent(BaseModel):
+    id: Optional[int] = None  # None enquanto o evento aguarda gravação
+    entity_type: str
+    entity_id: int
+    ts: datetime
+    action: str
+    actor: Optional[str] = None
+    from_status: Optional[str] = None
+    to_status: Optional[str] = None
+    data: Optional[Dict[str, Any]] = None
+    pending: bool = False  # Ainda no buffer do writer (gravado em instantes)
+
+    class Config:
+        from_attributes = True
+
+# Linha do tempo de uma entidade, da transição mais antiga para a mais recente
+class AuditTimeline(BaseModel):
+    entity_type: str
+    entity_id: int
+    events: List[AuditEvent]
+    next_cursor: Optional[str] = None
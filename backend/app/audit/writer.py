@@ -0,0 +1,225 @@
+# backend/app/audit/writer.py
+#
+# Gravação do log de auditoria fora do caminho crítico das requisições.
+#
+# As rotas chamam record(db, ...) antes do commit, como o publish() dos
+# eventos: a transição fica guardada na sessão e só segue adiante se o commit
+# acontecer (descartada no rollback). Após o commit ela entra em um buffer em
+# memória e uma thread do worker grava os eventos em lotes (um INSERT com várias
+# linhas), juntando o que chegar em até AUDIT_FLUSH_INTERVAL segundos.
+#
+#   - Contrapressão: com o buffer cheio (banco lento ou fora do ar), a rota que
+#     acabou de fazer commit espera até AUDIT_ENQUEUE_TIMEOUT segundos por uma
+#     vaga; só então o evento é descartado (contado em 'dropped' e no log). No
+#     modo assíncrono o commit roda na thread do event loop, e esperar ali
+#     pararia o worker inteiro: nesse caso o evento é descartado na hora.
+#   - Falha na gravação: o lote é tentado de novo, com espera crescente.
+#   - Desligamento: o lifespan chama close(), que grava o que restar no buffer
+#     antes de fechar os pools (e um atexit cobre scripts sem lifespan).
+#
+# Configuração:
+#   AUDIT_BUFFER_SIZE       eventos aguardando gravação (padrão 10000)
+#   AUDIT_BATCH_SIZE        eventos por INSERT (padrão 500)
+#   AUDIT_FLUSH_INTERVAL    espera máxima para completar um lote, em s (padrão 0.2)
+#   AUDIT_ENQUEUE_TIMEOUT   espera por vaga no buffer cheio, em s (padrão 2)
+
+import asyncio
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+AUDIT_BUFFER_SIZE = int(os.getenv("AUDIT_BUFFER_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "0.2"))
+AUDIT_ENQUEUE_TIMEOUT = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT", "2"))
+# Espera máxima entre novas tentativas de um lote que falhou (s)
+MAX_RETRY_DELAY = 30
+
+_PENDING_KEY = "pending_audit_events"
+
+logger = logging.getLogger("app.audit")
+
+
+def record(db: Session, entity_type: str, entity_id: int, action: str, *, actor: str = None,
+           from_status: str = None, to_status: str = None, ts: datetime = None, **data):
+    """Registra uma transição para ser gravada no log quando a sessão fizer commit."""
+    db.info.setdefault(_PENDING_KEY, []).append({
+        "entity_type": entity_type, "entity_id": entity_id, "action": action, "actor": actor,
+        "from_status": _status(from_status), "to_status": _status(to_status),
+        "ts": ts or datetime.now(timezone.utc),
+        "data": {key: value for key, value in data.items() if value is not None} or None,
+    })
+
+
+def _status(value):
+    # Enums (StatusCA, StatusRecebimento) são gravados pelo valor
+    return getattr(value, "value", value)
+
+
+class AuditWriter:
+    def __init__(self, buffer_size: int = AUDIT_BUFFER_SIZE, batch_size: int = AUDIT_BATCH_SIZE,
+                 flush_interval: float = AUDIT_FLUSH_INTERVAL, enqueue_timeout: float = AUDIT_ENQUEUE_TIMEOUT):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self._queue = queue.Queue(maxsize=buffer_size)
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+        # Lote retirado do buffer e ainda não confirmado no banco
+        self._in_flight = []
+        self.counts = {"enqueued": 0, "written": 0, "batches": 0, "blocked": 0, "dropped": 0, "failures": 0}
+
+    def _incr(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counts[name] += amount
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, events: list):
+        """Coloca eventos já confirmados no buffer (chamado após o commit)."""
+        self.start()
+        wait = not _on_event_loop()
+        for payload in events:
+            if not self._put(payload, wait):
+                self._incr("dropped")
+                logger.error("Buffer de auditoria cheio; evento descartado: %s", payload)
+                continue
+            self._incr("enqueued")
+
+    def _put(self, payload: dict, wait: bool) -> bool:
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except queue.Full:
+            if not wait:
+                return False
+        # Contrapressão: segura quem produz até a gravação abrir espaço
+        self._incr("blocked")
+        try:
+            self._queue.put(payload, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            return False
+
+    def pending(self, entity_type: str, entity_id: int) -> list:
+        """Eventos da entidade ainda não gravados por este worker (buffer + lote em gravação)."""
+        with self._queue.mutex:
+            buffered = list(self._queue.queue)
+        with self._lock:
+            in_flight = list(self._in_flight)
+        return [
+            payload for payload in in_flight + buffered
+            if payload["entity_type"] == entity_type and payload["entity_id"] == entity_id
+        ]
+
+    def close(self, timeout: float = 10.0):
+        """Grava o que restar no buffer e encerra a thread."""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None:
+            return
+        self._stopping.set()
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error("Gravação do log de auditoria não terminou em %ss; %s eventos pendentes",
+                         timeout, self._queue.qsize() + len(self._in_flight))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.counts, "buffered": self._queue.qsize(), "in_flight": len(self._in_flight)}
+
+    # --- Thread de gravação ---
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._take()
+            if batch:
+                self._write(batch)
+
+    def _take(self) -> list:
+        """Um lote: espera o primeiro evento e junta os seguintes até encher ou dar o intervalo."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        # Visível em pending() enquanto o lote se completa
+        with self._lock:
+            self._in_flight = batch
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = 0 if self._stopping.is_set() else deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch: list):
+        from ..database import get_engine
+
+        delay = 0.5
+        outcome = "written"
+        while True:
+            try:
+                with get_engine().begin() as conn:
+                    conn.execute(insert(models.AuditEvent), batch)
+                break
+            except Exception:
+                self._incr("failures")
+                if self._stopping.is_set() and delay >= MAX_RETRY_DELAY:
+                    # Desligando com o banco fora do ar: não segura o processo para sempre
+                    logger.exception("Lote de %s eventos de auditoria descartado no desligamento", len(batch))
+                    outcome = "dropped"
+                    break
+                logger.exception("Falha ao gravar %s eventos de auditoria; nova tentativa em %ss", len(batch), delay)
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+        with self._lock:
+            self._in_flight = []
+            self.counts[outcome] += len(batch)
+            self.counts["batches"] += outcome == "written"
+
+
+def _on_event_loop() -> bool:
+    # No modo assíncrono o commit (e o after_commit) roda na thread do event loop
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+audit_writer = AuditWriter()
+# Scripts e testes sem lifespan também gravam o que ficou no buffer ao sair
+atexit.register(audit_writer.close)
+
+
+# --- Ganchos da sessão ---
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        audit_writer.submit(events)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
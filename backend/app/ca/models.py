@@ -1,7 +1,7 @@
 # backend/app/ca/models.py
 
 from sqlalchemy import (Column, Integer, String, Text, DateTime, Float, 
-                        ForeignKey, func, Enum as SQLAlchemyEnum)
+                        ForeignKey, Index, func, Enum as SQLAlchemyEnum)
 from sqlalchemy.orm import relationship
 import enum
 
@@ -19,6 +19,10 @@ class StatusCA(str, enum.Enum):
 # --- Tabela Principal: O documento do C.A. ---
 class ComunicadoAlteracao(Base):
     __tablename__ = "comunicados_alteracao"
+    __table_args__ = (
+        # Atende o painel Kanban (partição por status, ordenado pela data de criação)
+        Index("ix_comunicados_alteracao_status_creation_date", "status", "creation_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=True) 
@@ -40,6 +44,10 @@ class ComunicadoAlteracao(Base):
 # --- Tabela de Itens ---
 class ItemAlteracao(Base):
     __tablename__ = "itens_alteracao"
+    __table_args__ = (
+        # Itens de um C.A. por tipo de ação (descrições dos cartões do Kanban)
+        Index("ix_itens_alteracao_ca_id_action_type", "ca_id", "action_type"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     action_type = Column(String(20), nullable=False)
@@ -1,12 +1,18 @@
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select, func, update, case, literal
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 
 # Importa os módulos deste domínio ('ca')
 from . import models, schemas
 # Importa a função para obter a sessão do banco
 from ..database import get_db
+from ..events.broker import publish
+from ..audit import writer as audit
+from ..cache import cached
+from ..serialization import json_response
+from ..stock import ledger
 
 router = APIRouter(
     prefix="/api/ca",
@@ -42,68 +48,133 @@ def create_comunicado_alteracao(
     
     # 4. Adiciona o C.A. principal (com seus itens) à sessão e salva
     db.add(db_ca)
+    db.flush()
+    publish(db, "ca", "created", id=db_ca.id)
     db.commit()
     db.refresh(db_ca)
     
     # O FastAPI/Pydantic irá reformatar a resposta para o schema ComunicadoAlteracao
     return db_ca
 
+# Carrega itens e movimentos junto com os C.A.s (uma query extra por relação,
+# em vez de uma query por C.A. ao acessar ca.items de forma preguiçosa)
+CA_EAGER_OPTIONS = (
+    selectinload(models.ComunicadoAlteracao.items),
+    selectinload(models.ComunicadoAlteracao.movimentos),
+)
+
+
+def build_ca_response(ca: models.ComunicadoAlteracao) -> dict:
+    """
+    Monta o dicionário de resposta de um C.A., separando os itens em
+    item_adicionado / item_removido em uma única passada pela lista.
+    """
+    ca_dict = {
+        "id": ca.id, "status": ca.status, "creation_date": ca.creation_date,
+        "completion_date": ca.completion_date, "obra": ca.obra, "op": ca.op,
+        "sub_item": ca.sub_item, "requester_info": ca.requester_info, "reason": ca.reason,
+        "movimentos": ca.movimentos,
+    }
+
+    for item in ca.items:
+        if item.action_type == "ADICIONAR" and "item_adicionado" not in ca_dict:
+            ca_dict["item_adicionado"] = item
+        elif item.action_type == "RETIRAR" and "item_removido" not in ca_dict:
+            ca_dict["item_removido"] = item
+
+    return ca_dict
+
+
 @router.get("/", response_model=schemas.PaginatedCA)
 def get_all_comunicados_alteracao(
     db: Session = Depends(get_db), page: int = 1, page_size: int = 10
 ):
-    query = db.query(models.ComunicadoAlteracao).order_by(models.ComunicadoAlteracao.creation_date.desc())
+    query = db.query(models.ComunicadoAlteracao)
     total_items = query.count()
     offset = (page - 1) * page_size
-    cas_from_db = query.offset(offset).limit(page_size).all()
-    
-    formatted_cas = []
+    cas_from_db = (
+        query.options(*CA_EAGER_OPTIONS)
+        .order_by(models.ComunicadoAlteracao.creation_date.desc())
+        .offset(offset).limit(page_size).all()
+    )
     
-    for ca in cas_from_db:
-        # Começa a construir o dicionário de resposta com os campos principais
-        ca_dict = {
-            "id": ca.id, "status": ca.status, "creation_date": ca.creation_date,
-            "completion_date": ca.completion_date, "obra": ca.obra, "op": ca.op,
-            "sub_item": ca.sub_item, "requester_info": ca.requester_info, "reason": ca.reason
-        }
-        
-        item_add = next((item for item in ca.items if item.action_type == "ADICIONAR"), None)
-        item_rem = next((item for item in ca.items if item.action_type == "RETIRAR"), None)
+    # Os dicionários são validados uma única vez, ao serializar a página inteira
+    formatted_cas = [build_ca_response(ca) for ca in cas_from_db]
 
-        if item_add:
-            ca_dict["item_adicionado"] = item_add
-        if item_rem:
-            ca_dict["item_removido"] = item_rem
-            
-        # Pydantic irá validar o dicionário completo antes de retornar
-        formatted_cas.append(schemas.ComunicadoAlteracao.model_validate(ca_dict))
+    return json_response(schemas.PaginatedCA, {"items": formatted_cas, "total": total_items})
 
-    return {"items": formatted_cas, "total": total_items}
+
+@router.get("/board", response_model=schemas.CABoard)
+@cached(schemas.CABoard, tags=["ca"])
+def get_ca_board(
+    db: Session = Depends(get_db),
+    per_column: int = Query(50, ge=1, le=200)
+):
+    """
+    Retorna o painel Kanban: total de C.A.s por status e os cards mais recentes
+    de cada coluna (no máximo 'per_column'), tudo em uma única query com
+    funções de janela. O tamanho da resposta não cresce com o número de C.A.s.
+    """
+    CA = models.ComunicadoAlteracao
+    Item = models.ItemAlteracao
+
+    # 1. Numera os C.A.s dentro de cada status e conta o total do status
+    ranked = select(
+        CA.id, CA.status, CA.creation_date, CA.obra, CA.op, CA.sub_item, CA.requester_info,
+        func.row_number().over(
+            partition_by=CA.status, order_by=(CA.creation_date.desc(), CA.id.desc())
+        ).label("rn"),
+        func.count().over(partition_by=CA.status).label("status_total"),
+    ).subquery()
+
+    # 2. Descrição dos itens apenas para os cards que serão exibidos
+    def item_description(action_type):
+        return (
+            select(func.min(Item.material_description))
+            .where(Item.ca_id == ranked.c.id, Item.action_type == action_type)
+            .scalar_subquery()
+        )
+
+    rows = db.execute(
+        select(
+            ranked,
+            item_description("ADICIONAR").label("item_adicionado"),
+            item_description("RETIRAR").label("item_removido"),
+        )
+        .where(ranked.c.rn <= per_column)
+        .order_by(ranked.c.status, ranked.c.rn)
+    ).all()
+
+    # 3. Agrupa por status; colunas sem C.A.s aparecem com total zero
+    columns = {status: {"status": status, "total": 0, "items": []} for status in models.StatusCA}
+    for row in rows:
+        column = columns[row.status]
+        column["total"] = row.status_total
+        column["items"].append({
+            "id": row.id, "status": row.status, "creation_date": row.creation_date,
+            "obra": row.obra, "op": row.op, "sub_item": row.sub_item,
+            "requester_info": row.requester_info,
+            "item_adicionado": {"material_description": row.item_adicionado} if row.item_adicionado else None,
+            "item_removido": {"material_description": row.item_removido} if row.item_removido else None,
+        })
+
+    return json_response(schemas.CABoard, {"columns": list(columns.values())})
 
 
 @router.get("/{ca_id}", response_model=schemas.ComunicadoAlteracao)
+@cached(schemas.ComunicadoAlteracao, tags=["ca:{ca_id}"])
 def get_comunicado_alteracao(ca_id: int, db: Session = Depends(get_db)):
-    db_ca = db.query(models.ComunicadoAlteracao).filter(models.ComunicadoAlteracao.id == ca_id).first()
+    db_ca = (
+        db.query(models.ComunicadoAlteracao)
+        .options(*CA_EAGER_OPTIONS)
+        .filter(models.ComunicadoAlteracao.id == ca_id)
+        .first()
+    )
     if db_ca is None:
         raise HTTPException(status_code=404, detail="C.A. não encontrado")
 
-    # Monta a resposta manualmente
-    response_data = {
-        "id": db_ca.id, "status": db_ca.status, "creation_date": db_ca.creation_date,
-        "completion_date": db_ca.completion_date, "obra": db_ca.obra, "op": db_ca.op,
-        "sub_item": db_ca.sub_item, "requester_info": db_ca.requester_info, "reason": db_ca.reason
-    }
-
-    item_add = next((item for item in db_ca.items if item.action_type == "ADICIONAR"), None)
-    item_rem = next((item for item in db_ca.items if item.action_type == "RETIRAR"), None)
-    
-    if item_add:
-        response_data["item_adicionado"] = item_add
-    if item_rem:
-        response_data["item_removido"] = item_rem
-
-    # Pydantic valida nosso dicionário antes de enviar a resposta
-    return schemas.ComunicadoAlteracao.model_validate(response_data)
+    # Pydantic valida nosso dicionário uma vez, já gerando o JSON da resposta
+    return json_response(schemas.ComunicadoAlteracao, build_ca_response(db_ca))
 
 
 @router.put("/items/{item_id}/stock-status", response_model=schemas.MaterialInfo)
@@ -116,13 +187,20 @@ def update_item_stock_status(
     Atualiza o 'stock_status' de um único ItemAlteracao.
     """
     # A lógica interna continua usando o modelo do SQLAlchemy 'models.ItemAlteracao'
-    db_item = db.query(models.ItemAlteracao).filter(models.ItemAlteracao.id == item_id).first()
+    # FOR UPDATE: o status anterior registrado no log é o que esta transação substitui
+    db_item = db.query(models.ItemAlteracao).filter(models.ItemAlteracao.id == item_id).with_for_update().first()
     
     if not db_item:
         raise HTTPException(status_code=404, detail="Item de alteração não encontrado")
         
+    previous_status = db_item.stock_status
     db_item.stock_status = status_update.stock_status
     
+    publish(db, "ca_item", "stock_status", id=db_item.id, ca_id=db_item.ca_id, stock_status=db_item.stock_status)
+    audit.record(db, "ca_item", db_item.id, "stock_status", from_status=previous_status,
+                 to_status=db_item.stock_status, ca_id=db_item.ca_id)
+    db.flush()
+    rollup_ca_status(db, [db_item.ca_id])
     db.commit()
     db.refresh(db_item)
     
@@ -131,6 +209,64 @@ def update_item_stock_status(
     return db_item
 
 
+# --- ROTA 4.1: ATUALIZAR O STATUS DE ESTOQUE DE VÁRIOS ITENS ---
+@router.put("/items/stock-status", response_model=schemas.ItemAlteracaoStockStatusBatchResult)
+def update_items_stock_status(
+    batch: schemas.ItemAlteracaoStockStatusBatchUpdate,
+    db: Session = Depends(get_db)
+):
+    """
+    Atualiza o 'stock_status' de vários ItemAlteracao em uma transação, com um
+    único UPDATE, e avança o status dos C.A.s afetados cujos itens foram todos
+    verificados. Se algum item não existir, nada é alterado.
+    """
+    Item = models.ItemAlteracao
+    item_ids = set(batch.item_ids)
+    # 1. Status anterior de cada item (para o log de auditoria), com as linhas
+    #    bloqueadas até o commit; em ordem de id, para dois lotes não travarem
+    #    um ao outro
+    updated = db.execute(
+        select(Item.id, Item.ca_id, Item.stock_status)
+        .where(Item.id.in_(item_ids))
+        .order_by(Item.id)
+        .with_for_update()
+    ).all()
+
+    missing = item_ids - {row.id for row in updated}
+    if missing:
+        db.rollback()
+        raise HTTPException(
+            status_code=404,
+            detail=f"Itens de alteração não encontrados: {', '.join(map(str, sorted(missing)))}"
+        )
+
+    # 2. Um único UPDATE para o lote
+    db.execute(
+        update(Item)
+        .where(Item.id.in_(item_ids))
+        .values(stock_status=batch.stock_status)
+        .execution_options(synchronize_session=False)
+    )
+
+    items_by_ca = {}
+    for row in updated:
+        items_by_ca.setdefault(row.ca_id, []).append(row.id)
+    for ca_id, ids in items_by_ca.items():
+        publish(db, "ca_item", "stock_status", ca_id=ca_id, item_ids=ids, stock_status=batch.stock_status)
+    for row in updated:
+        audit.record(db, "ca_item", row.id, "stock_status", from_status=row.stock_status,
+                     to_status=batch.stock_status, ca_id=row.ca_id)
+
+    changes = rollup_ca_status(db, list(items_by_ca))
+    db.commit()
+
+    return {
+        "updated": len(updated),
+        "stock_status": batch.stock_status,
+        "ca_status_changes": [{"ca_id": ca_id, "status": status} for ca_id, status in changes],
+    }
+
+
 # --- ROTA 5: CRIAR UM NOVO MOVIMENTO DE ESTOQUE ---
 @router.post("/movements", response_model=schemas.MovimentoEstoque, status_code=201)
 def create_stock_movement(
@@ -149,6 +285,13 @@ def create_stock_movement(
     db_movimento = models.MovimentoEstoque(**movimento_data.model_dump())
     
     db.add(db_movimento)
+    # Atualiza o saldo do material no estoque de destino na mesma transação
+    material_code = next((
+        item.material_code for item in db_ca.items
+        if item.material_description == db_movimento.item_description and item.material_code
+    ), None)
+    ledger.apply_movement(db, db_movimento, material_code)
+    publish(db, "ca_movement", "created", id=db_movimento.id, ca_id=db_movimento.ca_id)
     db.commit()
     db.refresh(db_movimento)
     
@@ -156,30 +299,34 @@ def create_stock_movement(
 
 
 # --- FUNÇÃO AUXILIAR PARA A LÓGICA DE NEGÓCIO ---
-def check_and_update_ca_status(comunicado: models.ComunicadoAlteracao, db: Session):
+def rollup_ca_status(db: Session, ca_ids: list) -> list:
     """
-    Verifica os status de todos os itens de um C.A. e, se todos estiverem
-    resolvidos, atualiza o status do C.A. principal.
+    Avança o status dos C.A.s em análise cujos itens saíram todos de
+    "Pendente de Verificação": "Aguardando Compra" se algum item requer compra,
+    senão "Pronto para Execução".
+
+    Um único UPDATE com subconsultas EXISTS para todos os C.A.s informados, sem
+    carregar os itens de cada um. Devolve [(ca_id, novo status)] dos alterados.
     """
-    
-    # Ignora se o C.A. já não estiver em análise
-    if comunicado.status != "Pendente de Análise de Estoque":
-        return
+    CA, Item = models.ComunicadoAlteracao, models.ItemAlteracao
+    status_type = CA.__table__.c.status.type
 
-    # Pega todos os itens associados ao C.A.
-    items = comunicado.items
-    
-    # Verifica se todos os itens já saíram do estado "Pendente de Verificação"
-    all_items_checked = all(item.stock_status != "Pendente de Verificação" for item in items)
-    
-    if all_items_checked:
-        # Verifica se algum item requer compra
-        needs_purchase = any(item.stock_status == "Verificado - Compra Necessária" for item in items)
-        
-        if needs_purchase:
-            comunicado.status = "Aguardando Compra"
-        else:
-            comunicado.status = "Pronto para Execução"
-        
-        db.commit()
-        db.refresh(comunicado)
\ No newline at end of file
+    ca_items = select(Item.id).where(Item.ca_id == CA.id)
+    has_pending = ca_items.where(Item.stock_status == "Pendente de Verificação").exists()
+    needs_purchase = ca_items.where(Item.stock_status == "Verificado - Compra Necessária").exists()
+
+    changes = db.execute(
+        update(CA)
+        .where(CA.id.in_(ca_ids), CA.status == models.StatusCA.PENDENTE_ANALISE, ~has_pending)
+        .values(status=case(
+            (needs_purchase, literal(models.StatusCA.AGUARDANDO_COMPRA, status_type)),
+            else_=literal(models.StatusCA.PRONTO_PARA_EXECUCAO, status_type),
+        ))
+        .returning(CA.id, CA.status)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+    for ca_id, status in changes:
+        publish(db, "ca", "status", id=ca_id, status=status.value)
+        audit.record(db, "ca", ca_id, "status", from_status=models.StatusCA.PENDENTE_ANALISE, to_status=status)
+    return [tuple(change) for change in changes]
\ No newline at end of file
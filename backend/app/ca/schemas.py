@@ -115,15 +115,34 @@ class ComunicadoAlteracao(BaseModel):
 
 # --- 3. Schemas de Ações e Paginação ---
 
+# Status de estoque que podem ser atribuídos a um item de alteração
+StockStatus = Literal[
+    "Verificado - Em Estoque", 
+    "Verificado - Compra Necessária",
+    "Retirada Registrada",
+    "Retirada Pendente",
+    "Devolvido ao Estoque",
+]
+
 # Schema para ATUALIZAR O STATUS de um item de alteração (aqui o nome antigo era melhor)
 class ItemAlteracaoStockStatusUpdate(BaseModel):
-    stock_status: Literal[
-        "Verificado - Em Estoque", 
-        "Verificado - Compra Necessária",
-        "Retirada Registrada",
-        "Retirada Pendente",
-        "Devolvido ao Estoque",
-    ] = Field(..., description="O novo status de estoque para o item.")
+    stock_status: StockStatus = Field(..., description="O novo status de estoque para o item.")
+
+# Schema para ATUALIZAR O STATUS de vários itens de uma vez
+class ItemAlteracaoStockStatusBatchUpdate(BaseModel):
+    item_ids: List[int] = Field(..., min_length=1, max_length=500)
+    stock_status: StockStatus = Field(..., description="O novo status de estoque para todos os itens.")
+
+# C.A. cujo status avançou após a verificação dos itens
+class CAStatusChange(BaseModel):
+    ca_id: int
+    status: StatusCA
+
+# Resposta da atualização em lote
+class ItemAlteracaoStockStatusBatchResult(BaseModel):
+    updated: int
+    stock_status: str
+    ca_status_changes: List[CAStatusChange]
 
 # Schema para CRIAR UM MOVIMENTO de estoque
 class MovimentoEstoqueCreate(BaseModel):
@@ -137,4 +156,31 @@ class MovimentoEstoqueCreate(BaseModel):
 # Schema para a resposta paginada
 class PaginatedCA(BaseModel):
     items: List[ComunicadoAlteracao]
-    total: int
\ No newline at end of file
+    total: int
+
+# --- 4. Schemas do Painel Kanban ---
+
+# Projeção enxuta de um item, apenas o necessário para o texto do card
+class CABoardItem(BaseModel):
+    material_description: str
+
+# Card do Kanban: sem 'reason', movimentos ou demais campos pesados
+class CABoardCard(BaseModel):
+    id: int
+    status: StatusCA
+    creation_date: datetime
+    obra: int
+    op: int
+    sub_item: Optional[int] = None
+    requester_info: str
+    item_adicionado: Optional[CABoardItem] = None
+    item_removido: Optional[CABoardItem] = None
+
+# Uma coluna do Kanban: total real do status + os cards mais recentes (limitados)
+class CABoardColumn(BaseModel):
+    status: StatusCA
+    total: int
+    items: List[CABoardCard]
+
+class CABoard(BaseModel):
+    columns: List[CABoardColumn]
\ No newline at end of file
@@ -0,0 +1,209 @@
+# backend/app/cache.py
+#
+# Cache de respostas das rotas de leitura mais acessadas (detalhe do C.A.,
+# requisições pendentes e primeiras páginas dos recebimentos).
+#
+# - A chave é a rota + os parâmetros de query normalizados (ordenados) + a
+#   geração atual de cada 'tag' da rota. Invalidar uma tag apenas incrementa a
+#   sua geração: as entradas antigas deixam de ser encontradas e saem pelo LRU/TTL.
+# - A invalidação é feita pelos eventos de alteração (app/events), publicados
+#   após o commit de cada rota de escrita. Com EVENTS_BACKEND=postgres os
+#   eventos chegam a todos os workers.
+# - A resposta guardada já é o JSON serializado, com um ETag; se o cliente
+#   enviar If-None-Match com o mesmo ETag, a resposta é 304 sem corpo.
+#
+# Configuração:
+#   CACHE_ENABLED      (padrão true)
+#   CACHE_TTL          segundos de validade de cada entrada (padrão 30)
+#   CACHE_MAX_ENTRIES  entradas no LRU em memória (padrão 1024)
+#   CACHE_BACKEND      backend compartilhado opcional, "pacote.modulo:Classe"
+#                      (get / set / incr, ex.: um cliente Redis)
+
+import functools
+import hashlib
+import importlib
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from starlette.responses import Response, StreamingResponse
+
+from .database import env_flag
+from .serialization import dump_json
+from .events.broker import broker
+
+CACHE_ENABLED = env_flag("CACHE_ENABLED", True)
+CACHE_TTL = float(os.getenv("CACHE_TTL", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+
+
+class MemoryCacheBackend:
+    """LRU em memória com TTL por entrada (um por worker)."""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._counters = {}
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def incr(self, key: str) -> int:
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def counter(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _load_backend():
+    path = os.getenv("CACHE_BACKEND")
+    if not path:
+        return MemoryCacheBackend()
+    module_name, class_name = path.split(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+backend = _load_backend()
+
+
+class CacheMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+
+    def incr(self, name: str):
+        with self._lock:
+            self.counts[name] += 1
+
+    def snapshot(self) -> dict:
+        lookups = self.counts["hits"] + self.counts["misses"]
+        return {
+            **self.counts,
+            "hit_rate": self.counts["hits"] / lookups if lookups else None,
+            "entries": len(backend) if hasattr(backend, "__len__") else None,
+            "enabled": CACHE_ENABLED,
+            "ttl_s": CACHE_TTL,
+        }
+
+
+CACHE_METRICS = CacheMetrics()
+
+
+# --- Tags e invalidação ---
+
+def _generation(tag: str) -> int:
+    counter = getattr(backend, "counter", None)
+    if counter is not None:
+        return counter(f"gen:{tag}")
+    return int(backend.get(f"gen:{tag}") or 0)
+
+
+def invalidate(*tags: str):
+    for tag in tags:
+        backend.incr(f"gen:{tag}")
+        CACHE_METRICS.incr("invalidations")
+
+
+def tags_for_event(payload: dict) -> list:
+    """Tags afetadas por um evento de alteração."""
+    entity = payload["entity"]
+    if entity == "recebimento":
+        return ["recebimentos"]
+    if entity == "requisition":
+        # O recebimento exibe a requisição atendida (fulfilled_requisition)
+        return ["requisitions", "recebimentos"]
+    if entity in ("ca", "ca_item", "ca_movement"):
+        ca_id = payload.get("ca_id", payload.get("id"))
+        return ["ca", f"ca:{ca_id}"]
+    return []
+
+
+broker.add_listener(lambda payload: invalidate(*tags_for_event(payload)))
+
+
+# --- Decorador das rotas ---
+
+def _cache_key(request: Request, tags: list) -> str:
+    query = "&".join(f"{key}={value}" for key, value in sorted(request.query_params.multi_items()))
+    generations = ",".join(f"{tag}:{_generation(tag)}" for tag in tags)
+    return f"{request.url.path}?{query}|{generations}"
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def _response(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        CACHE_METRICS.incr("not_modified")
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def cached(response_model, tags, when=None, ttl: float = CACHE_TTL):
+    """
+    Guarda a resposta serializada da rota.
+    'tags' aceita parâmetros da rota no formato str.format (ex.: "ca:{ca_id}").
+    'when' recebe os parâmetros da rota e decide se a chamada pode ser cacheada.
+    """
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+
+        @functools.wraps(endpoint)
+        def wrapper(request: Request, **kwargs):
+            if not CACHE_ENABLED or (when is not None and not when(kwargs)):
+                return endpoint(**kwargs)
+
+            route_tags = [tag.format(**kwargs) for tag in tags]
+            key = _cache_key(request, route_tags)
+            entry = backend.get(key)
+            if entry is not None:
+                CACHE_METRICS.incr("hits")
+                return _response(request, *entry)
+
+            CACHE_METRICS.incr("misses")
+            result = endpoint(**kwargs)
+            if isinstance(result, Response):
+                # Rotas do caminho rápido (json_response) já devolvem os bytes prontos
+                if result.status_code != 200 or isinstance(result, StreamingResponse):
+                    return result
+                body = bytes(result.body)
+            else:
+                body = dump_json(response_model, result)
+            entry = (body, _etag(body))
+            backend.set(key, entry, ttl)
+            return _response(request, *entry)
+
+        wrapper.__signature__ = signature.replace(parameters=[
+            inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            *(parameter.replace(kind=inspect.Parameter.KEYWORD_ONLY) for parameter in signature.parameters.values()),
+        ])
+        return wrapper
+
+    return decorator
@@ -0,0 +1,203 @@
+# backend/app/events/broker.py
+#
+# Eventos de alteração publicados em tempo real para o dashboard (WebSocket/SSE),
+# para que as telas não precisem consultar as listagens periodicamente.
+#
+# As rotas chamam publish(db, ...) antes do commit. O evento fica guardado na
+# sessão e só é entregue se o commit acontecer (descartado no rollback):
+#   - EVENTS_BACKEND=memory (padrão): entregue aos assinantes deste processo.
+#   - EVENTS_BACKEND=postgres: enviado com pg_notify na própria transação; um
+#     listener (LISTEN) em cada worker recebe e repassa aos assinantes locais.
+#     Necessário quando há mais de um worker do uvicorn/gunicorn.
+
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import time
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger("app.events")
+
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+EVENTS_CHANNEL = "production_dashboard_events"
+
+# Eventos guardados por assinante; um cliente lento perde os mais antigos
+SUBSCRIBER_QUEUE_SIZE = 100
+# pg_notify aceita no máximo 8000 bytes de payload; acima disso vai só a
+# identificação do evento (os outros workers ainda invalidam o cache)
+MAX_PAYLOAD_BYTES = 8000
+_ID_FIELDS = ("entity", "action", "id")
+
+_PENDING_KEY = "pending_events"
+
+
+class EventBroker:
+    """Distribui cada evento para todas as filas assinantes (uma por conexão)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._listeners = []
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def add_listener(self, callback):
+        """Callback síncrono chamado para cada evento (ex.: invalidação do cache)."""
+        self._listeners.append(callback)
+
+    def run_listeners(self, payload: dict):
+        for callback in self._listeners:
+            callback(payload)
+
+    def fan_out(self, payload: dict):
+        self.run_listeners(payload)
+        # Pode ser chamado de qualquer thread (threadpool das rotas síncronas,
+        # listener do PostgreSQL); a fila é alimentada no loop do assinante.
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, payload)
+            except RuntimeError:
+                # Loop já encerrado: a conexão caiu sem cancelar a assinatura
+                self.unsubscribe(queue)
+
+
+def _offer(queue: asyncio.Queue, payload: dict):
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(payload)
+
+
+broker = EventBroker()
+
+
+def publish(db: Session, entity: str, action: str, **fields):
+    """Registra um evento para ser publicado quando a sessão fizer commit."""
+    db.info.setdefault(_PENDING_KEY, []).append({"entity": entity, "action": action, **fields})
+
+
+# --- Backends ---
+
+class MemoryBackend:
+    """Entrega direta aos assinantes do próprio processo."""
+
+    def before_commit(self, session: Session, events: list):
+        pass
+
+    def after_commit(self, events: list):
+        for payload in events:
+            broker.fan_out(payload)
+
+    def start(self):
+        pass
+
+
+class PostgresBackend:
+    """NOTIFY na transação de origem + um LISTEN por worker."""
+
+    def __init__(self):
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def before_commit(self, session: Session, events: list):
+        # O NOTIFY só é entregue pelo PostgreSQL se a transação fizer commit
+        connection = session.connection()
+        for payload in events:
+            message = json.dumps(payload, default=str)
+            if len(message.encode()) > MAX_PAYLOAD_BYTES:
+                logger.warning(
+                    "Evento %s/%s com %s bytes excede o limite do NOTIFY; enviado só com a identificação",
+                    payload["entity"], payload["action"], len(message.encode()),
+                )
+                message = json.dumps({key: payload[key] for key in _ID_FIELDS if key in payload}, default=str)
+            connection.execute(func.pg_notify(EVENTS_CHANNEL, message).select())
+
+    def after_commit(self, events: list):
+        # Os listeners locais não esperam a volta do NOTIFY, para que o próprio
+        # worker enxergue a alteração logo após o commit
+        for payload in events:
+            broker.run_listeners(payload)
+
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._listen_forever, name="events-listener", daemon=True).start()
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception as error:  # conexão perdida: tenta de novo
+                logger.warning("Listener de eventos desconectado (%s); reconectando em 5s", error)
+                time.sleep(5)
+
+    def _listen(self):
+        from ..database import get_engine
+
+        # Conexão dedicada, retirada do pool para não ocupar uma vaga dele
+        connection = get_engine().raw_connection()
+        connection.detach()
+        try:
+            dbapi_connection = connection.driver_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {EVENTS_CHANNEL}")
+            while True:
+                if select.select([dbapi_connection], [], [], 30) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    broker.fan_out(json.loads(notify.payload))
+        finally:
+            connection.close()
+
+
+def _create_backend():
+    if EVENTS_BACKEND == "postgres":
+        return PostgresBackend()
+    return MemoryBackend()
+
+
+backend = _create_backend()
+
+
+# --- Ganchos da sessão (valem também para o AsyncSession, que usa uma Session por baixo) ---
+
+@event.listens_for(Session, "before_commit")
+def _before_commit(session):
+    events = session.info.get(_PENDING_KEY)
+    if events:
+        backend.before_commit(session, events)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session):
+    events = session.info.pop(_PENDING_KEY, None)
+    if events:
+        backend.after_commit(events)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _after_rollback(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
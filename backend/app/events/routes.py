@@ -0,0 +1,66 @@
+# backend/app/events/routes.py
+import asyncio
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from .broker import broker
+
+router = APIRouter(prefix="/api/events", tags=["Eventos"])
+
+# Intervalo (s) do comentário de keep-alive do SSE, para proxies não fecharem a conexão
+SSE_KEEPALIVE = 15
+
+
+def _matches(payload: dict, entities: Optional[List[str]]) -> bool:
+    return not entities or payload["entity"] in entities
+
+
+@router.websocket("/ws")
+async def events_websocket(websocket: WebSocket, entity: Optional[List[str]] = Query(None)):
+    """
+    Canal WebSocket com os eventos de alteração ({"entity", "action", "id", ...}).
+    'entity' (repetível) limita os eventos recebidos: recebimento, requisition, ca, ca_item, ca_movement.
+    """
+    await websocket.accept()
+    queue = broker.subscribe()
+
+    async def forward():
+        while True:
+            payload = await queue.get()
+            if _matches(payload, entity):
+                await websocket.send_text(json.dumps(payload, default=str))
+
+    sender = asyncio.create_task(forward())
+    try:
+        # O cliente não envia nada; a leitura serve para detectar a desconexão
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        broker.unsubscribe(queue)
+
+
+@router.get("/stream")
+async def events_stream(entity: Optional[List[str]] = Query(None)):
+    """Os mesmos eventos do WebSocket, como Server-Sent Events (EventSource)."""
+    queue = broker.subscribe()
+
+    async def stream():
+        try:
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if _matches(payload, entity):
+                    yield f"event: {payload['entity']}\ndata: {json.dumps(payload, default=str)}\n\n"
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
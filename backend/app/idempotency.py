@@ -0,0 +1,118 @@
+# backend/app/idempotency.py
+#
+# Chaves de idempotência para rotas de criação (cabeçalho Idempotency-Key).
+#
+# O cliente gera uma chave por operação (ex.: um UUID por envio do formulário)
+# e a repete nas novas tentativas. A rota reserva a chave com um
+# INSERT ... ON CONFLICT DO NOTHING na MESMA transação da criação e grava nela
+# a resposta antes do commit:
+#   - chave nova: a rota executa normalmente;
+#   - chave já gravada: a resposta original é devolvida sem executar nada
+#     (cabeçalho Idempotent-Replayed: true), em uma ida e volta ao banco;
+#   - duas tentativas simultâneas: no PostgreSQL o segundo INSERT espera o
+#     commit do primeiro e então devolve a resposta gravada;
+#   - se a rota falhar (rollback), a reserva desaparece e a tentativa seguinte
+#     executa de novo.
+# A mesma chave com outro corpo de requisição é recusada (422).
+#
+# Para apagar as chaves mais antigas que IDEMPOTENCY_TTL_HOURS (ex.: em um cron):
+#     python -m app.idempotency
+
+import hashlib
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Column, String, Integer, DateTime, LargeBinary, delete, func, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+
+from .database import Base
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+IDEMPOTENCY_TTL_HOURS = int(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+
+
+# --- Resposta gravada de uma operação ---
+# Uma linha por (rota, chave). status_code/response_body são preenchidos na
+# mesma transação que reservou a chave.
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String(100), primary_key=True)  # Ex.: "POST /api/recebimentos/"
+    key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+def request_hash(payload) -> str:
+    """Hash do corpo da requisição (um modelo pydantic)."""
+    return hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+
+def claim(db: Session, scope: str, key: str, body_hash: str) -> Optional[Response]:
+    """
+    Reserva a chave na transação atual. Devolve None se a chave é nova (a rota
+    deve executar e chamar store()) ou a resposta gravada da execução anterior.
+    """
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    claimed = db.execute(
+        insert(IdempotencyKey)
+        .values(scope=scope, key=key, request_hash=body_hash)
+        .on_conflict_do_nothing()
+        .returning(IdempotencyKey.key)
+    ).first()
+    if claimed:
+        return None
+
+    stored = db.query(IdempotencyKey).filter(IdempotencyKey.scope == scope, IdempotencyKey.key == key).one()
+    if stored.request_hash != body_hash:
+        raise HTTPException(
+            status_code=422,
+            detail=f"A chave {IDEMPOTENCY_HEADER} informada já foi usada com outro conteúdo."
+        )
+    return Response(
+        stored.response_body, status_code=stored.status_code, media_type="application/json",
+        headers={REPLAYED_HEADER: "true"},
+    )
+
+
+def store(db: Session, scope: str, key: str, response: Response):
+    """Grava a resposta da execução (antes do commit da rota)."""
+    db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.scope == scope, IdempotencyKey.key == key)
+        .values(status_code=response.status_code, response_body=response.body)
+    )
+
+
+def purge_expired(db: Session) -> int:
+    limit = datetime.now(timezone.utc) - timedelta(hours=IDEMPOTENCY_TTL_HOURS)
+    deleted = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < limit)).rowcount
+    db.commit()
+    return deleted
+
+
+if __name__ == "__main__":
+    import sys
+
+    from .database import SessionLocal, engine
+
+    # As migrações importam app.idempotency: reaproveitam este módulo em vez de
+    # declarar IdempotencyKey uma segunda vez
+    sys.modules.setdefault("app.idempotency", sys.modules[__name__])
+    from .migrations import check_schema_version
+
+    # A tabela é criada pelas migrações (python -m app.migrations)
+    check_schema_version(engine)
+    db = SessionLocal()
+    try:
+        print(f"{purge_expired(db)} chaves de idempotência expiradas removidas")
+    finally:
+        db.close()
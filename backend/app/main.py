@@ -1,42 +1,118 @@
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
+# backend/app/main.py
+#
+# Montagem da aplicação (app factory).
+#
+#   - create_app() monta a aplicação: middlewares e os roteadores de ROUTERS,
+#     importados um a um (cada um puxa os seus models e schemas);
+#   - o lifespan cria os motores do banco, confere a versão do esquema, inicia
+#     o listener de eventos (EVENTS_BACKEND=postgres) e, no desligamento, grava
+#     o buffer do log de auditoria e fecha os pools;
+#   - STARTUP_PROFILE=true escreve no log o tempo de cada etapa
+#     (app/monitoring/startup.py).
+#
+# 'uvicorn app.main:app' continua funcionando; 'uvicorn --factory
+# app.main:create_app' monta a aplicação sem o objeto de nível de módulo.
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import Base, engine
-from app.receiving import models
-from app.ca import models  as ca_models
-from app.requisitions import models as requisition_models
-from app.requisitions.routes import router as requisitions_router
+from fastapi.responses import ORJSONResponse
 
-from .database import engine, Base
+from .database import DATABASE_ASYNC, dispose_engines, get_async_engine, get_engine, on_engine_created
+from .idempotency import REPLAYED_HEADER
+from .monitoring.instrumentation import InstrumentationMiddleware, instrument_engine
+from .monitoring.startup import StartupProfile
 
-from app.receiving.routes import router as recebimento
-from app.ca.routes import router as ca_router
+_IMPORTS_MS = (time.perf_counter() - _IMPORT_STARTED) * 1000
 
+# Roteadores montados por create_app: (módulo, atributo, adaptado ao modo assíncrono)
+ROUTERS = (
+    ("app.receiving.routes", "router", True),
+    ("app.ca.routes", "router", True),
+    ("app.requisitions.routes", "router", True),
+    ("app.analytics.routes", "router", True),
+    ("app.stock.routes", "router", True),
+    ("app.audit.routes", "router", True),
+    ("app.monitoring.routes", "router", False),
+    ("app.monitoring.routes", "metrics_router", False),
+    # Eventos em tempo real (WebSocket / SSE); não dependem do modo do banco
+    ("app.events.routes", "router", False),
+)
 
 
-# Cria as tabelas no DB
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    profile = app.state.startup_profile
+    with profile.step("criação dos motores"):
+        engine = get_engine()
+        get_async_engine()
+    # O esquema é criado/alterado pelas migrações (python -m app.migrations, no
+    # deploy); na subida cada worker só confere a versão gravada no banco
+    with profile.step("verificação do esquema"):
+        from .migrations import check_schema_version
+        check_schema_version(engine)
+    # Cada worker escuta os eventos dos demais desde a subida (invalidação do
+    # cache e índice de requisições), e não só quando recebe um WebSocket/SSE
+    with profile.step("listener de eventos"):
+        from .events.broker import backend as events_backend
+        events_backend.start()
+    profile.log_report()
+    yield
+    # Eventos de auditoria ainda no buffer são gravados antes de fechar os pools
+    from .audit.writer import audit_writer
+    await asyncio.to_thread(audit_writer.close)
+    await dispose_engines()
 
-app = FastAPI(title="Production Dashboard API")
 
-# --- Configuração do CORS ---
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Endpoint raiz apenas para um health check
+def read_root():
+    return {"status": "API is running recebimento"}
 
-# --- MONTAGEM DO ROTEADOR DA API ---
-app.include_router(recebimento)
-app.include_router(ca_router)
-app.include_router(requisitions_router)
 
+def create_app(profile: StartupProfile = None) -> FastAPI:
+    if profile is None:
+        profile = StartupProfile(started=_IMPORT_STARTED)
+        profile.record("importação de app.main (FastAPI, SQLAlchemy)", _IMPORTS_MS)
 
-# Endpoint raiz apenas para um health check
-@app.get("/")
-def read_root():
-    return {"status": "API is running recebimento"}
\ No newline at end of file
+    # orjson como serializador padrão das respostas (mais rápido que o json da stdlib)
+    app = FastAPI(title="Production Dashboard API", default_response_class=ORJSONResponse, lifespan=lifespan)
+    app.state.startup_profile = profile
+
+    # --- Configuração do CORS ---
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        # Permite que o navegador leia os tempos de cada requisição e se a resposta
+        # foi repetida a partir de uma chave de idempotência
+        expose_headers=["Server-Timing", REPLAYED_HEADER],
+    )
+
+    # --- Instrumentação (latência por rota, queries por requisição, /metrics) ---
+    # Os motores são instrumentados quando criados (no lifespan ou antes, por um script)
+    app.add_middleware(InstrumentationMiddleware)
+    on_engine_created(instrument_engine)
+
+    # --- MONTAGEM DO ROTEADOR DA API ---
+    # No modo assíncrono (DATABASE_ASYNC=true) as rotas são adaptadas para AsyncSession
+    if DATABASE_ASYNC:
+        from .async_routes import make_async_router
+    for module_name, attribute, adapt in ROUTERS:
+        with profile.step(f"importação de {module_name}"):
+            # __import__ (e não importlib.import_module) para aparecer no -X importtime
+            router = getattr(__import__(module_name, fromlist=[attribute]), attribute)
+        with profile.step(f"montagem de {module_name}.{attribute}"):
+            app.include_router(make_async_router(router) if adapt and DATABASE_ASYNC else router)
+
+    app.get("/")(read_root)
+    return app
+
+
+app = create_app()
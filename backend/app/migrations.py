@@ -0,0 +1,275 @@
+# backend/app/migrations.py
+#
+# Migrações versionadas do esquema do banco.
+#
+# O esquema deixou de ser criado na importação de app.main (create_all refletia
+# o banco inteiro em cada worker e os workers disputavam a criação ao subir
+# juntos). Agora:
+#   - as alterações ficam em MIGRATIONS, numeradas e em ordem; cada uma é
+#     idempotente (checkfirst / "se não existir"), então também vale para bancos
+#     criados pelo antigo create_all;
+#   - 'schema_migrations' guarda as versões aplicadas, cada uma gravada na mesma
+#     transação da sua migração;
+#   - o deploy aplica as pendentes uma vez, fora dos workers:
+#         python -m app.migrations            (aplica as pendentes)
+#         python -m app.migrations --status   (só mostra a versão do banco)
+#   - na subida, cada worker apenas compara a versão gravada com LATEST_VERSION
+#     (uma query) e recusa subir com o banco desatualizado. Com
+#     DB_AUTO_MIGRATE=true (desenvolvimento) o próprio worker aplica as
+#     pendentes; no PostgreSQL um advisory lock garante que só um deles o faça.
+#
+# Nova migração: acrescente uma função _m00NN_... e a entrada em MIGRATIONS; a
+# mudança correspondente continua declarada nos models.
+
+import logging
+
+from sqlalchemy import Column, DateTime, Integer, String, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from .database import Base, env_flag
+from . import idempotency
+from .receiving import models as receiving_models, migrate_details_columns
+from .requisitions import models as requisition_models
+from .ca import models as ca_models
+from .analytics import models as analytics_models, rollups, throughput
+from .stock import models as stock_models, ledger
+from .audit import models as audit_models
+
+logger = logging.getLogger("app.migrations")
+
+DB_AUTO_MIGRATE = env_flag("DB_AUTO_MIGRATE")
+# Chave do advisory lock (PostgreSQL) que serializa quem aplica as migrações
+ADVISORY_LOCK_ID = 7_214_365
+
+
+class SchemaMigration(Base):
+    __tablename__ = "schema_migrations"
+
+    version = Column(Integer, primary_key=True)
+    description = Column(String(200), nullable=False)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class SchemaVersionError(RuntimeError):
+    pass
+
+
+# --- Auxiliares ---
+
+def _create_tables(conn: Connection, *models):
+    Base.metadata.create_all(bind=conn, tables=[model.__table__ for model in models], checkfirst=True)
+
+
+def _create_indexes(conn: Connection, model, *names):
+    indexes = {index.name: index for index in model.__table__.indexes}
+    for name in names:
+        indexes[name].create(bind=conn, checkfirst=True)
+
+
+# --- Migrações ---
+# Cada função recebe uma conexão já em transação; a versão é gravada e a
+# transação confirmada pelo runner. Migrações com backfill podem confirmar lotes
+# intermediários com conn.commit().
+
+def _m0001_baseline(conn: Connection):
+    """Tabelas originais (no-op em bancos criados pelo antigo create_all)."""
+    _create_tables(
+        conn, receiving_models.Receiving, requisition_models.Requisition, ca_models.ComunicadoAlteracao,
+        ca_models.ItemAlteracao, ca_models.MovimentoEstoque, ca_models.PedidoCompra,
+    )
+
+
+def _m0002_details_columns(conn: Connection):
+    """Colunas indexadas de 'details' (isClientMaterial, punctual, issueType, refusedMaterial)."""
+    migrate_details_columns.add_missing_columns(conn)
+    conn.commit()
+    migrate_details_columns.backfill(conn)
+
+
+def _m0003_listing_and_search_indexes(conn: Connection):
+    """Paginação por cursor, busca trigram em recebimentos e Kanban de C.A."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    _create_indexes(
+        conn, receiving_models.Receiving, "ix_recebimentos_entryDate_id",
+        "ix_recebimentos_nfNumber_trgm", "ix_recebimentos_supplier_trgm", "ix_recebimentos_orderNumber_trgm",
+    )
+    _create_indexes(conn, ca_models.ComunicadoAlteracao, "ix_comunicados_alteracao_status_creation_date")
+
+
+def _m0004_supplier_rollups(conn: Connection):
+    """Rollup mensal por fornecedor, reconstruído a partir de 'recebimentos'."""
+    _create_tables(conn, analytics_models.SupplierMonthlyRollup)
+    conn.commit()
+    with Session(bind=conn) as db:
+        rollups.rebuild_all(db)
+
+
+def _m0005_stock_ledger(conn: Connection):
+    """Posições e snapshots de estoque, reconstruídos a partir de 'movimentos_estoque'."""
+    _create_tables(conn, stock_models.StockPosition, stock_models.StockSnapshot)
+    conn.commit()
+    with Session(bind=conn) as db:
+        ledger.rebuild_all(db)
+
+
+def _m0006_pending_requisition_indexes(conn: Connection):
+    """Índices parciais da listagem de requisições pendentes."""
+    _create_indexes(
+        conn, requisition_models.Requisition,
+        "ix_requisitions_pending_requestDate_id", "ix_requisitions_pending_obra_requestDate_id",
+    )
+
+
+def _m0007_idempotent_receiving(conn: Connection):
+    """Chaves de idempotência e pedido único por recebimento."""
+    Receiving = receiving_models.Receiving
+    _create_tables(conn, idempotency.IdempotencyKey)
+
+    # O índice único não pode ser criado com pedidos repetidos: eles precisam
+    # ser corrigidos antes (a migração falha sem alterar nada). Linhas sem pedido
+    # ('') ficam fora do índice.
+    duplicates = conn.execute(
+        select(Receiving.orderNumber, func.count())
+        .where(Receiving.orderNumber != "")
+        .group_by(Receiving.orderNumber).having(func.count() > 1)
+        .limit(10)
+    ).all()
+    if duplicates:
+        listed = ", ".join(f"{order_number} ({count}x)" for order_number, count in duplicates)
+        raise RuntimeError(
+            f"Há pedidos associados a mais de uma NF em 'recebimentos': {listed}. "
+            "Corrija-os antes de aplicar esta migração."
+        )
+    _create_indexes(conn, Receiving, "uq_recebimentos_orderNumber")
+
+
+def _m0008_workload_indexes(conn: Connection):
+    """(status, entryDate) em recebimentos e (ca_id, action_type) em itens_alteracao."""
+    _create_indexes(conn, receiving_models.Receiving, "ix_recebimentos_status_entryDate")
+    _create_indexes(conn, ca_models.ItemAlteracao, "ix_itens_alteracao_ca_id_action_type")
+
+
+def _m0009_receiving_throughput(conn: Connection):
+    """Vazão de recebimentos por dia/turno, reconstruída a partir de 'recebimentos'."""
+    _create_tables(conn, analytics_models.ReceivingThroughputBucket)
+    _create_indexes(
+        conn, receiving_models.Receiving, "ix_recebimentos_conferenceDate", "ix_recebimentos_resolvedDate"
+    )
+    conn.commit()
+    with Session(bind=conn) as db:
+        throughput.rebuild_all(db)
+
+
+def _m0010_audit_events(conn: Connection):
+    """Log de auditoria das transições de estado (somente inserção)."""
+    _create_tables(conn, audit_models.AuditEvent)
+
+
+def _m0011_partial_order_number_index(conn: Connection):
+    """Pedido único só entre recebimentos com pedido (índice parcial)."""
+    # Bancos na versão 7 a 10 têm o índice completo, que recusava a segunda
+    # linha sem pedido; recriado como parcial (WHERE "orderNumber" <> '')
+    conn.execute(text('DROP INDEX IF EXISTS "uq_recebimentos_orderNumber"'))
+    _create_indexes(conn, receiving_models.Receiving, "uq_recebimentos_orderNumber")
+
+
+MIGRATIONS = [
+    (1, _m0001_baseline),
+    (2, _m0002_details_columns),
+    (3, _m0003_listing_and_search_indexes),
+    (4, _m0004_supplier_rollups),
+    (5, _m0005_stock_ledger),
+    (6, _m0006_pending_requisition_indexes),
+    (7, _m0007_idempotent_receiving),
+    (8, _m0008_workload_indexes),
+    (9, _m0009_receiving_throughput),
+    (10, _m0010_audit_events),
+    (11, _m0011_partial_order_number_index),
+]
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+# --- Versão gravada ---
+
+def current_version(conn: Connection):
+    """Versão do banco (None se 'schema_migrations' ainda não existe)."""
+    # has_table consulta o catálogo só para esta tabela (não reflete o esquema)
+    if not inspect(conn).has_table(SchemaMigration.__tablename__):
+        return None
+    return conn.execute(select(func.max(SchemaMigration.version))).scalar() or 0
+
+
+def upgrade(engine: Engine) -> list:
+    """Aplica as migrações pendentes, em ordem. Devolve as versões aplicadas."""
+    applied = []
+    with engine.connect() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+            conn.commit()
+        try:
+            _create_tables(conn, SchemaMigration)
+            conn.commit()
+            # Lida depois do lock: outro processo pode ter acabado de aplicar
+            version = current_version(conn) or 0
+            conn.commit()
+            for number, migration in MIGRATIONS:
+                if number <= version:
+                    continue
+                description = migration.__doc__.strip()
+                logger.info("Aplicando migração %s: %s", number, description)
+                try:
+                    migration(conn)
+                    conn.execute(SchemaMigration.__table__.insert().values(version=number, description=description))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                applied.append(number)
+        finally:
+            if conn.dialect.name == "postgresql":
+                conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+                conn.commit()
+    return applied
+
+
+def check_schema_version(engine: Engine):
+    """
+    Verificação da subida: compara a versão gravada com LATEST_VERSION, sem
+    refletir o esquema. Com DB_AUTO_MIGRATE aplica as pendentes.
+    """
+    with engine.connect() as conn:
+        version = current_version(conn)
+    if version == LATEST_VERSION:
+        return
+    if version is not None and version > LATEST_VERSION:
+        # Deploy gradual: o banco já foi migrado por uma versão mais nova do código
+        logger.warning("Banco na versão %s, mais nova que a deste código (%s)", version, LATEST_VERSION)
+        return
+    if DB_AUTO_MIGRATE:
+        upgrade(engine)
+        return
+    raise SchemaVersionError(
+        f"Esquema do banco na versão {version or 0}; este código exige a {LATEST_VERSION}. "
+        "Aplique as migrações com 'python -m app.migrations' (ou use DB_AUTO_MIGRATE=true em desenvolvimento)."
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from .database import engine
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--status", action="store_true", help="apenas mostra a versão do banco")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.status:
+        with engine.connect() as conn:
+            version = current_version(conn)
+        print(f"Banco na versão {version or 0} de {LATEST_VERSION}")
+    else:
+        applied = upgrade(engine)
+        print(f"{len(applied)} migrações aplicadas; banco na versão {LATEST_VERSION}")
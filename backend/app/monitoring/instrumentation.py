@@ -0,0 +1,177 @@
+# backend/app/monitoring/instrumentation.py
+#
+# Instrumentação por requisição:
+#   - middleware ASGI que mede a duração de cada requisição HTTP e a agrega em
+#     histogramas por rota (o template, ex.: /api/ca/{ca_id}, não a URL);
+#   - eventos before/after_cursor_execute do motor, que contam as queries e o
+#     tempo de banco da requisição em andamento (via contextvar, que acompanha
+#     a requisição no threadpool e no run_sync do modo assíncrono);
+#   - cabeçalho Server-Timing (app, db) em cada resposta, visível no DevTools;
+#   - log das queries lentas (acima de SLOW_QUERY_MS) com a rota de origem.
+#
+# Os valores são expostos em formato Prometheus em GET /metrics.
+
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import event
+
+# Limites (em ms) dos baldes dos histogramas de duração
+DURATION_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Limites dos baldes do histograma de queries por requisição
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+slow_query_log = logging.getLogger("app.sql.slow")
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # último = +Inf
+        self.sum = 0.0
+        self.total = 0
+
+    def observe(self, value: float):
+        self.total += 1
+        self.sum += value
+        for index, limit in enumerate(self.buckets):
+            if value <= limit:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def cumulative(self):
+        """Pares (limite, contagem acumulada), como no formato do Prometheus."""
+        running = 0
+        for limit, count in zip((*self.buckets, "+Inf"), self.counts):
+            running += count
+            yield limit, running
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.duration_ms = Histogram(DURATION_BUCKETS_MS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_ms_total = 0.0
+        self.statuses = {}
+
+
+class RequestMetrics:
+    """Métricas agregadas por (método, rota)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def observe(self, method: str, route: str, status: int, duration_ms: float, stats: "RequestStats"):
+        with self._lock:
+            metrics = self.routes.get((method, route))
+            if metrics is None:
+                metrics = self.routes[(method, route)] = RouteMetrics()
+            metrics.duration_ms.observe(duration_ms)
+            metrics.queries.observe(stats.queries)
+            metrics.db_ms_total += stats.db_ms
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+
+    def items(self):
+        with self._lock:
+            return list(self.routes.items())
+
+
+REQUEST_METRICS = RequestMetrics()
+
+
+class RequestStats:
+    """Queries e tempo de banco da requisição em andamento."""
+
+    __slots__ = ("scope", "queries", "db_ms")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.queries = 0
+        self.db_ms = 0.0
+
+
+_current = contextvars.ContextVar("request_stats", default=None)
+
+
+# --- Eventos do motor ---
+
+# O início de cada query fica no contexto de execução (um por execução), e não
+# em uma pilha na conexão: uma query que falha não dispara after_cursor_execute
+# e deixaria o seu início na pilha, trocando os tempos das queries seguintes.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_start", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_ms += elapsed_ms
+    if elapsed_ms >= SLOW_QUERY_MS:
+        slow_query_log.warning(
+            "Query lenta (%.1f ms) em %s: %s", elapsed_ms,
+            _route_template(stats.scope) if stats is not None else "-", " ".join(statement.split()),
+        )
+
+
+def instrument_engine(engine):
+    """Registra os eventos de contagem de queries em um motor síncrono."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Middleware ---
+
+def _route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<não encontrada>"
+
+
+class InstrumentationMiddleware:
+    """Middleware ASGI puro (não bufferiza o corpo das respostas em streaming)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope)
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                timing = (
+                    f'app;dur={elapsed_ms:.1f}, '
+                    f'db;dur={stats.db_ms:.1f};desc="{stats.queries} queries"'
+                )
+                message["headers"] = [*message.get("headers", []), (b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            REQUEST_METRICS.observe(
+                scope["method"], _route_template(scope), status,
+                (time.perf_counter() - start) * 1000, stats,
+            )
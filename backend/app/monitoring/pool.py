@@ -0,0 +1,98 @@
+# backend/app/monitoring/pool.py
+#
+# Instrumentação do pool de conexões do SQLAlchemy: histograma do tempo de espera
+# no checkout, contagem de timeouts e os medidores do próprio pool (conexões em
+# uso, overflow, ociosas). Os valores são expostos em GET /internal/pool.
+
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+# Limites (em ms) dos baldes do histograma de espera no checkout
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.bucket_counts = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)  # último = +Inf
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.pool = None
+
+    def observe_checkout(self, wait_ms: float):
+        with self._lock:
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            for index, limit in enumerate(CHECKOUT_BUCKETS_MS):
+                if wait_ms <= limit:
+                    self.bucket_counts[index] += 1
+                    break
+            else:
+                self.bucket_counts[-1] += 1
+
+    def observe_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for limit, count in zip((*CHECKOUT_BUCKETS_MS, "+Inf"), self.bucket_counts):
+                cumulative += count
+                buckets[str(limit)] = cumulative
+            data = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "checkout_wait_ms": {
+                    "sum": round(self.wait_ms_total, 3),
+                    "max": round(self.wait_ms_max, 3),
+                    "buckets": buckets,
+                },
+            }
+        pool = self.pool
+        if pool is not None and hasattr(pool, "checkedout"):
+            data.update({
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout_s": pool.timeout(),
+            })
+        return data
+
+
+# Métricas por motor ("sync" e, no modo assíncrono, "async")
+POOL_METRICS = {}
+
+
+def instrumented_pool_class(pool_class, name: str):
+    """
+    Cria uma subclasse do pool que mede o tempo de espera de cada checkout.
+    O _do_get é o ponto em que o pool bloqueia até haver conexão disponível
+    (ou estoura pool_timeout), então é ali que a espera é medida.
+    """
+    metrics = POOL_METRICS.setdefault(name, PoolMetrics())
+
+    class InstrumentedPool(pool_class):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            metrics.pool = self
+
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                metrics.observe_timeout()
+                raise
+            metrics.observe_checkout((time.perf_counter() - start) * 1000)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
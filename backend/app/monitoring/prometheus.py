@@ -0,0 +1,93 @@
+# backend/app/monitoring/prometheus.py
+#
+# Exposição das métricas no formato texto do Prometheus (GET /metrics):
+# requisições por rota, pool de conexões, cache de respostas e log de auditoria.
+
+from .instrumentation import REQUEST_METRICS
+from .pool import POOL_METRICS
+from ..cache import CACHE_METRICS
+from ..audit.writer import audit_writer
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _histogram(lines, name, histogram, labels, scale=1.0):
+    for limit, count in histogram.cumulative():
+        le = limit if limit == "+Inf" else f"{limit * scale:g}"
+        lines.append(f"{name}_bucket{_labels(**labels, le=le)} {count}")
+    lines.append(f"{name}_sum{_labels(**labels)} {histogram.sum * scale:.6f}")
+    lines.append(f"{name}_count{_labels(**labels)} {histogram.total}")
+
+
+def render() -> str:
+    lines = []
+
+    # --- Requisições HTTP (durações em segundos, como recomenda o Prometheus) ---
+    routes = REQUEST_METRICS.items()
+    lines += [
+        "# HELP http_request_duration_seconds Duração das requisições por rota.",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (method, route), metrics in routes:
+        _histogram(lines, "http_request_duration_seconds", metrics.duration_ms,
+                   {"method": method, "route": route}, scale=0.001)
+
+    lines += [
+        "# HELP http_requests_total Requisições por rota e status.",
+        "# TYPE http_requests_total counter",
+    ]
+    for (method, route), metrics in routes:
+        for status, count in sorted(metrics.statuses.items()):
+            lines.append(f"http_requests_total{_labels(method=method, route=route, status=status)} {count}")
+
+    lines += [
+        "# HELP http_request_db_queries Queries SQL por requisição.",
+        "# TYPE http_request_db_queries histogram",
+    ]
+    for (method, route), metrics in routes:
+        _histogram(lines, "http_request_db_queries", metrics.queries, {"method": method, "route": route})
+
+    lines += [
+        "# HELP http_request_db_seconds_total Tempo total de banco por rota.",
+        "# TYPE http_request_db_seconds_total counter",
+    ]
+    for (method, route), metrics in routes:
+        lines.append(
+            f"http_request_db_seconds_total{_labels(method=method, route=route)} {metrics.db_ms_total / 1000:.6f}"
+        )
+
+    # --- Pool de conexões ---
+    gauges = ("size", "in_use", "idle", "overflow")
+    for name in gauges:
+        lines.append(f"# TYPE db_pool_{name} gauge")
+        for engine_name, metrics in POOL_METRICS.items():
+            snapshot = metrics.snapshot()
+            if name in snapshot:
+                lines.append(f"db_pool_{name}{_labels(engine=engine_name)} {snapshot[name]}")
+    lines.append("# TYPE db_pool_timeouts_total counter")
+    for engine_name, metrics in POOL_METRICS.items():
+        lines.append(f"db_pool_timeouts_total{_labels(engine=engine_name)} {metrics.timeouts}")
+
+    # --- Cache de respostas ---
+    lines.append("# TYPE response_cache_events_total counter")
+    for event_name, count in CACHE_METRICS.snapshot().items():
+        if event_name in ("hits", "misses", "not_modified", "invalidations"):
+            lines.append(f"response_cache_events_total{_labels(event=event_name)} {count}")
+
+    # --- Log de auditoria ---
+    audit = audit_writer.snapshot()
+    lines.append("# TYPE audit_events_total counter")
+    for event_name in ("enqueued", "written", "blocked", "dropped"):
+        lines.append(f"audit_events_total{_labels(event=event_name)} {audit[event_name]}")
+    lines.append("# TYPE audit_write_failures_total counter")
+    lines.append(f"audit_write_failures_total {audit['failures']}")
+    lines.append("# TYPE audit_buffer_events gauge")
+    lines.append(f"audit_buffer_events {audit['buffered'] + audit['in_flight']}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,37 @@
+# backend/app/monitoring/routes.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from .pool import POOL_METRICS
+from . import prometheus
+from ..cache import CACHE_METRICS
+from ..audit.writer import audit_writer
+
+# Endpoints internos de observabilidade (não aparecem na documentação da API)
+router = APIRouter(prefix="/internal", tags=["Interno"], include_in_schema=False)
+
+
+@router.get("/pool")
+def get_pool_metrics():
+    """Métricas do pool de conexões: espera no checkout, timeouts, em uso e overflow."""
+    return {name: metrics.snapshot() for name, metrics in POOL_METRICS.items()}
+
+
+@router.get("/cache")
+def get_cache_metrics():
+    """Acertos, falhas, respostas 304 e invalidações do cache de respostas."""
+    return CACHE_METRICS.snapshot()
+
+
+@router.get("/audit")
+def get_audit_writer_metrics():
+    """Buffer do log de auditoria: eventos aguardando, gravados, lotes, esperas por vaga e descartes."""
+    return audit_writer.snapshot()
+
+
+# Endpoint de coleta do Prometheus, no caminho padrão (fora do prefixo /internal)
+metrics_router = APIRouter(tags=["Interno"], include_in_schema=False)
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    return PlainTextResponse(prometheus.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,58 @@
+# backend/app/monitoring/startup.py
+#
+# Perfil de inicialização do worker (STARTUP_PROFILE=true).
+#
+# create_app() e o lifespan marcam cada etapa da subida: importação de cada
+# módulo de rotas (com os models e schemas que ele puxa), montagem das rotas,
+# criação dos motores e verificação do esquema. Ao fim do lifespan o relatório
+# vai para o log "app.startup", com o tempo total desde a importação de
+# app.main até a aplicação ficar pronta para a primeira requisição.
+#
+# Para o tempo de importação de cada módulo (com as dependências de terceiros)
+# e o tempo até a primeira resposta de um uvicorn novo:
+#     python -m benchmarks.startup_profile
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "false").lower() in ("1", "true", "yes")
+
+startup_log = logging.getLogger("app.startup")
+
+
+class StartupProfile:
+    def __init__(self, started: float = None):
+        self.started = started if started is not None else time.perf_counter()
+        self.steps = []
+
+    @contextmanager
+    def step(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, (time.perf_counter() - start) * 1000))
+
+    def record(self, name: str, ms: float):
+        self.steps.append((name, ms))
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def report(self) -> str:
+        lines = [f"{'etapa':<48}{'ms':>9}"]
+        lines += [f"{name:<48}{ms:>9.1f}" for name, ms in self.steps]
+        lines.append(f"{'pronto para a primeira requisição':<48}{self.elapsed_ms():>9.1f}")
+        return "\n".join(lines)
+
+    def log_report(self):
+        if STARTUP_PROFILE:
+            # Sem logging configurado na subida, o relatório vai direto para o stderr
+            if not startup_log.handlers and not logging.getLogger().handlers:
+                handler = logging.StreamHandler()
+                handler.setFormatter(logging.Formatter("%(message)s"))
+                startup_log.addHandler(handler)
+            startup_log.setLevel(logging.INFO)
+            startup_log.info("Perfil de inicialização:\n%s", self.report())
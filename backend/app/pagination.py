@@ -0,0 +1,27 @@
+# backend/app/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+from fastapi import HTTPException
+
+
+# --- Paginação por cursor (keyset) ---
+# O cursor é opaco para o cliente: apenas o par (data, id) do último item
+# da página, serializado em JSON e codificado em base64 url-safe.
+
+def encode_cursor(sort_value: datetime, item_id: int) -> str:
+    payload = {"d": sort_value.isoformat(), "i": item_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["d"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido.")
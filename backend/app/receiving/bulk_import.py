@@ -0,0 +1,295 @@
+# backend/app/receiving/bulk_import.py
+#
+# Importação em lote de recebimentos (exportação do ERP em CSV ou JSON lines).
+#
+# O arquivo é lido linha a linha e processado em lotes: cada lote é validado
+# com RecebimentoCreate, tem as duplicidades (NF e pedido) verificadas com uma
+# única query, as requisições vinculadas carregadas com outra, e é inserido com
+# um único INSERT em lote (executemany / insertmanyvalues). O resultado de cada
+# linha é gerado como um relatório em JSON lines à medida que os lotes são
+# gravados, então apenas um lote por vez fica em memória.
+#
+# Com propose_matches, cada recebimento criado sem requisição vinculada recebe
+# no relatório a requisição pendente proposta pelo motor de vinculação (as
+# colunas opcionais obra, sub_item e materialDescription do arquivo ajudam na
+# pontuação); as propostas de cada lote são calculadas em uma única passada.
+#
+# Codificação: antes de importar, o arquivo inteiro é conferido (uma leitura
+# rápida, sem validação nem banco). Sem 'encoding' vale UTF-8 (com ou sem BOM)
+# e, se não decodificar, cp1252 (exportações do ERP/Excel no Windows). Um byte
+# inválido para a codificação escolhida vira um 400 com o número da linha, antes
+# que qualquer lote seja gravado.
+
+import csv
+import io
+import json
+from collections import Counter, defaultdict
+from typing import Iterator, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import case, delete, insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from ..requisitions import models as requisition_models
+from ..requisitions.matching import REQUISITION_INDEX
+from ..analytics import rollups, throughput
+from ..events.broker import publish
+from ..audit import writer as audit
+
+BATCH_SIZE = 1000
+# Codificações aceitas; sem escolha do cliente, tentadas nesta ordem
+ENCODINGS = ("utf-8", "cp1252")
+
+
+def _first_invalid_line(stream, encoding: str):
+    """Número da primeira linha que não decodifica (None se o arquivo todo decodifica)."""
+    stream.seek(0)
+    try:
+        # Em UTF-8 e cp1252 o byte de fim de linha nunca faz parte de outro
+        # caractere, então o arquivo pode ser conferido linha a linha
+        for line_number, line in enumerate(stream, start=1):
+            try:
+                line.decode("utf-8-sig" if encoding == "utf-8" and line_number == 1 else encoding)
+            except UnicodeDecodeError:
+                return line_number
+        return None
+    finally:
+        stream.seek(0)
+
+
+def detect_encoding(stream, encoding: str = None) -> str:
+    """Confere o arquivo e devolve a codificação a usar (400 se houver byte inválido)."""
+    candidates = (encoding,) if encoding else ENCODINGS
+    for candidate in candidates:
+        line_number = _first_invalid_line(stream, candidate)
+        if line_number is None:
+            return candidate
+    raise HTTPException(
+        status_code=400,
+        detail=f"O arquivo não está em {' nem '.join(candidates)}: caractere inválido na linha {line_number}. "
+               f"Informe a codificação correta em 'encoding'.",
+    )
+
+
+def read_rows(stream, file_format: str, encoding: str = "utf-8") -> Iterator[Tuple[int, object]]:
+    """Gera (número da linha, dicionário) ou (número da linha, erro de leitura)."""
+    text_stream = io.TextIOWrapper(stream, encoding="utf-8-sig" if encoding == "utf-8" else encoding, newline="")
+    if file_format == "csv":
+        reader = csv.DictReader(text_stream)
+        for row in reader:
+            # Campos vazios no CSV equivalem a "não informado"
+            yield reader.line_num, {key: value for key, value in row.items() if value not in ("", None)}
+    else:
+        for line_number, line in enumerate(text_stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError as error:
+                yield line_number, ValueError(f"JSON inválido: {error.msg}")
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _int_or_none(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _propose_matches(db: Session, batch, results: dict):
+    raw_rows = dict(batch)
+    lines = [
+        line for line, result in results.items()
+        if result["status"] == "created" and not raw_rows[line].get("requisition_id_to_fulfill")
+    ]
+    if not lines:
+        return
+    REQUISITION_INDEX.ensure_loaded(db)
+    proposals = REQUISITION_INDEX.propose([
+        {"order_number": raw_rows[line].get("orderNumber"), "obra": _int_or_none(raw_rows[line].get("obra")),
+         "sub_item": _int_or_none(raw_rows[line].get("sub_item")),
+         "material_description": raw_rows[line].get("materialDescription")}
+        for line in lines
+    ], limit=1)
+    for line, proposal in zip(lines, proposals):
+        results[line]["requisition_match"] = proposal["match"]
+
+
+def _import_batch(db: Session, batch, propose_matches: bool = False) -> list:
+    results = {}
+    valid = []
+
+    # 1. Validação de cada linha com o mesmo schema da criação unitária
+    for line, raw in batch:
+        if isinstance(raw, Exception):
+            results[line] = {"line": line, "status": "invalid", "detail": str(raw)}
+            continue
+        try:
+            valid.append((line, schemas.RecebimentoCreate.model_validate(raw)))
+        except ValidationError as error:
+            results[line] = {"line": line, "status": "invalid", "detail": error.errors(include_url=False)}
+
+    # 2. Duplicidades contra o banco: uma única query para o lote inteiro
+    nf_numbers = {data.nfNumber for _, data in valid}
+    order_numbers = {data.orderNumber for _, data in valid if data.orderNumber}
+    existing_nf, existing_orders = {}, {}
+    if valid:
+        for nf_number, order_number in db.execute(
+            select(models.Receiving.nfNumber, models.Receiving.orderNumber).where(or_(
+                models.Receiving.nfNumber.in_(nf_numbers),
+                models.Receiving.orderNumber.in_(order_numbers),
+            ))
+        ):
+            existing_nf[nf_number] = True
+            existing_orders[order_number] = nf_number
+
+    # 3. Requisições a vincular: uma única query para o lote inteiro, bloqueando as
+    #    linhas (SELECT ... FOR UPDATE, sempre na ordem do id) até o commit do lote,
+    #    como na criação unitária
+    Requisition = requisition_models.Requisition
+    requisition_ids = {data.requisition_id_to_fulfill for _, data in valid if data.requisition_id_to_fulfill}
+    requisitions = {}
+    if requisition_ids:
+        requisitions = {
+            req.id: req.isFulfilled
+            for req in db.execute(
+                select(Requisition.id, Requisition.isFulfilled)
+                .where(Requisition.id.in_(requisition_ids))
+                .order_by(Requisition.id)
+                .with_for_update()
+            )
+        }
+
+    # 4. Regras da criação unitária, aplicadas também entre linhas do mesmo lote
+    to_insert, linked = [], []
+    for line, data in valid:
+        req_id = data.requisition_id_to_fulfill
+        if data.nfNumber in existing_nf:
+            results[line] = {"line": line, "status": "duplicate",
+                             "detail": f"A NF nº {data.nfNumber} já foi registrada."}
+        elif data.orderNumber and data.orderNumber in existing_orders:
+            results[line] = {"line": line, "status": "duplicate",
+                             "detail": f"O Pedido nº {data.orderNumber} já foi associado à NF: {existing_orders[data.orderNumber]}."}
+        elif req_id and req_id not in requisitions:
+            results[line] = {"line": line, "status": "invalid",
+                             "detail": f"Requisição com ID {req_id} não encontrada."}
+        elif req_id and requisitions[req_id]:
+            results[line] = {"line": line, "status": "invalid",
+                             "detail": f"Requisição {req_id} já foi atendida."}
+        else:
+            existing_nf[data.nfNumber] = True
+            if data.orderNumber:
+                existing_orders[data.orderNumber] = data.nfNumber
+            if req_id:
+                requisitions[req_id] = True
+            to_insert.append((line, data))
+
+    # 5. Um único INSERT em lote, devolvendo os ids gerados
+    if to_insert:
+        try:
+            inserted = db.execute(
+                insert(models.Receiving).returning(
+                    models.Receiving.id, models.Receiving.nfNumber, models.Receiving.entryDate
+                ),
+                # Sem pedido (campo vazio no CSV) grava '' como na tela de recebimento
+                [{**data.model_dump(exclude={"requisition_id_to_fulfill"}), "orderNumber": data.orderNumber or ""}
+                 for _, data in to_insert],
+            ).all()
+        except IntegrityError:
+            # Outro terminal gravou uma das NFs entre a verificação e o INSERT
+            db.rollback()
+            for line, _ in to_insert:
+                results[line] = {"line": line, "status": "error",
+                                 "detail": "Conflito de duplicidade ao gravar o lote; reenvie a linha."}
+            return [results[line] for line, _ in batch]
+
+        # A ordem do RETURNING não é garantida; associa pelo número da NF (único)
+        created = {nf_number: (receiving_id, entry_date) for receiving_id, nf_number, entry_date in inserted}
+        for line, data in to_insert:
+            receiving_id = created[data.nfNumber][0]
+            results[line] = {"line": line, "status": "created", "id": receiving_id}
+            if data.requisition_id_to_fulfill:
+                linked.append({"id": data.requisition_id_to_fulfill, "receiving_id": receiving_id,
+                               "line": line, "nfNumber": data.nfNumber})
+
+        # 6. Vincula as requisições atendidas com um único UPDATE condicional
+        #    (isFulfilled = false, que protege também os bancos sem FOR UPDATE, como
+        #    o SQLite). Uma requisição atendida por outro terminal nesse meio-tempo
+        #    fica de fora do RETURNING: o recebimento da linha é desfeito e a linha
+        #    sai como erro, como o 400 da criação unitária.
+        if linked:
+            fulfilled = set(db.execute(
+                update(Requisition)
+                .where(Requisition.id.in_([item["id"] for item in linked]), Requisition.isFulfilled == False)
+                .values(isFulfilled=True, receiving_id=case(
+                    {item["id"]: item["receiving_id"] for item in linked}, value=Requisition.id
+                ))
+                .returning(Requisition.id)
+                .execution_options(synchronize_session=False)
+            ).scalars())
+            failed = [item for item in linked if item["id"] not in fulfilled]
+            if failed:
+                db.execute(delete(models.Receiving).where(
+                    models.Receiving.id.in_([item["receiving_id"] for item in failed])
+                ))
+                for item in failed:
+                    results[item["line"]] = {"line": item["line"], "status": "error",
+                                             "detail": f"Requisição {item['id']} já foi atendida."}
+                    del created[item["nfNumber"]]
+                failed_lines = {item["line"] for item in failed}
+                to_insert = [(line, data) for line, data in to_insert if line not in failed_lines]
+                linked = [item for item in linked if item["id"] in fulfilled]
+
+        # 7. Atualiza os rollups de fornecedor dos meses afetados e a vazão por
+        #    turno (um upsert por balde, não por linha). Os baldes são bloqueados
+        #    sempre na mesma ordem, para duas importações não travarem uma à outra
+        touched = {
+            (data.supplier, rollups.month_start(created[data.nfNumber][1])) for _, data in to_insert
+        }
+        for supplier, month in sorted(touched):
+            rollups.refresh_supplier_month(db, supplier, month)
+        entered = defaultdict(Counter)
+        for _, entry_date in created.values():
+            entered[throughput.bucket_of(entry_date)]["entered"] += 1
+        throughput.record_buckets(db, entered)
+
+        # 8. Um único evento por lote, para as telas recarregarem a listagem
+        if to_insert:
+            publish(db, "recebimento", "imported", count=len(to_insert))
+        for requisition in linked:
+            publish(db, "requisition", "fulfilled", id=requisition["id"], receiving_id=requisition["receiving_id"])
+            audit.record(db, "requisition", requisition["id"], "fulfilled", receiving_id=requisition["receiving_id"])
+
+    db.commit()
+
+    # 9. Propostas de vinculação (após o commit: as requisições vinculadas pelo
+    #    lote já saíram do índice de pendentes)
+    if propose_matches:
+        _propose_matches(db, batch, results)
+    return [results[line] for line, _ in batch]
+
+
+def import_recebimentos(db: Session, rows, batch_size: int = BATCH_SIZE,
+                        propose_matches: bool = False) -> Iterator[str]:
+    """Processa as linhas em lotes e gera o relatório em JSON lines."""
+    summary = {"total": 0, "created": 0, "duplicate": 0, "invalid": 0, "error": 0}
+    for batch in _batches(rows, batch_size):
+        for result in _import_batch(db, batch, propose_matches):
+            summary["total"] += 1
+            summary[result["status"]] += 1
+            yield json.dumps(result, ensure_ascii=False, default=str) + "\n"
+    yield json.dumps({"summary": summary}) + "\n"
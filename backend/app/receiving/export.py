@@ -0,0 +1,136 @@
+# backend/app/receiving/export.py
+#
+# Exportação dos recebimentos filtrados (CSV ou XLSX) para a tela de relatórios.
+#
+# As linhas são lidas com yield_per, que no PostgreSQL usa um cursor do lado do
+# servidor: o banco entrega EXPORT_CHUNK linhas por vez e apenas esse lote fica
+# em memória no worker. Apenas as colunas exportadas são selecionadas (tuplas,
+# sem instanciar objetos ORM).
+#
+# O CSV é gerado e enviado em blocos à medida que as linhas chegam. O XLSX
+# precisa ser finalizado antes do envio (é um arquivo zip), então é escrito com
+# o XlsxWriter em modo constant_memory em um arquivo temporário e depois
+# enviado em blocos.
+#
+# Datas e horas saem no fuso da planta (PLANT_TIMEZONE), não em UTC. No XLSX os
+# textos são gravados sempre como texto: um fornecedor ou observação começando
+# com '=' não vira fórmula, nem um endereço vira hyperlink.
+
+import csv
+import io
+import tempfile
+from datetime import timezone
+from typing import Callable, Iterator
+
+from sqlalchemy.orm import Query, Session
+
+from . import models
+from ..database import SessionLocal
+from ..analytics.throughput import PLANT_TZ
+
+EXPORT_CHUNK = 1000
+FILE_CHUNK = 64 * 1024
+
+# (coluna, cabeçalho) na ordem em que aparecem no arquivo
+EXPORT_COLUMNS = (
+    (models.Receiving.id, "ID"),
+    (models.Receiving.nfNumber, "NF"),
+    (models.Receiving.supplier, "Fornecedor"),
+    (models.Receiving.orderNumber, "Pedido"),
+    (models.Receiving.nfValue, "Valor NF"),
+    (models.Receiving.nfVolume, "Volumes"),
+    (models.Receiving.status, "Status"),
+    (models.Receiving.entryDate, "Data de Entrada"),
+    (models.Receiving.receivedBy, "Recebido por"),
+    (models.Receiving.conferenceDate, "Data da Conferência"),
+    (models.Receiving.conferredBy, "Conferido por"),
+    (models.Receiving.punctual, "Pontual"),
+    (models.Receiving.issueType, "Pendência"),
+    (models.Receiving.isClientMaterial, "Material do Cliente"),
+    (models.Receiving.refusedMaterial, "Material Recusado"),
+    (models.Receiving.resolvedBy, "Resolvido por"),
+    (models.Receiving.resolvedDate, "Data da Resolução"),
+    (models.Receiving.resolutionNotes, "Observações da Resolução"),
+)
+HEADERS = [header for _, header in EXPORT_COLUMNS]
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+def _rows(build_query: Callable[[Session], Query]) -> Iterator[tuple]:
+    # A sessão da requisição (get_db) já foi fechada quando a resposta começa a
+    # ser enviada, então a exportação abre e fecha a sua própria.
+    db = SessionLocal()
+    try:
+        query = build_query(db).with_entities(*(column for column, _ in EXPORT_COLUMNS))
+        query = query.order_by(models.Receiving.entryDate, models.Receiving.id)
+        yield from query.yield_per(EXPORT_CHUNK)
+    finally:
+        db.close()
+
+
+def _local(value):
+    # Datas sem fuso (SQLite) são UTC
+    aware = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return aware.astimezone(PLANT_TZ)
+
+
+def _format_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "Sim" if value else "Não"
+    if hasattr(value, "strftime"):
+        return _local(value).strftime("%d/%m/%Y %H:%M")
+    return value
+
+
+def stream_csv(build_query: Callable[[Session], Query]) -> Iterator[bytes]:
+    """CSV separado por ';' com BOM, como o Excel em pt-BR espera."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, delimiter=";")
+
+    buffer.write("\ufeff")
+    writer.writerow(HEADERS)
+    for count, row in enumerate(_rows(build_query), start=1):
+        writer.writerow([_format_value(value) for value in row])
+        if count % EXPORT_CHUNK == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def stream_xlsx(build_query: Callable[[Session], Query]) -> Iterator[bytes]:
+    # Importado só na primeira exportação XLSX (o pacote pesa na subida do worker)
+    import xlsxwriter
+
+    with tempfile.TemporaryFile() as output:
+        # constant_memory: cada linha vai para o disco assim que a próxima começa;
+        # textos nunca são convertidos em fórmulas ou links
+        workbook = xlsxwriter.Workbook(output, {
+            "constant_memory": True, "remove_timezone": True,
+            "strings_to_formulas": False, "strings_to_urls": False,
+        })
+        sheet = workbook.add_worksheet("Recebimentos")
+        date_format = workbook.add_format({"num_format": "dd/mm/yyyy hh:mm"})
+
+        sheet.write_row(0, 0, HEADERS)
+        for row_number, row in enumerate(_rows(build_query), start=1):
+            for col_number, value in enumerate(row):
+                if value is None:
+                    continue
+                if hasattr(value, "strftime"):
+                    sheet.write_datetime(row_number, col_number, _local(value), date_format)
+                elif isinstance(value, bool):
+                    sheet.write_string(row_number, col_number, "Sim" if value else "Não")
+                else:
+                    sheet.write(row_number, col_number, value)
+        workbook.close()
+
+        output.seek(0)
+        while chunk := output.read(FILE_CHUNK):
+            yield chunk
@@ -0,0 +1,85 @@
+# backend/app/receiving/migrate_details_columns.py
+#
+# Migração: cria as colunas indexadas isClientMaterial, punctual, issueType e
+# refusedMaterial em 'recebimentos' (caso ainda não existam) e as preenche a
+# partir do JSON 'details' dos registros já gravados.
+#
+# O preenchimento é feito em lotes por faixa de id, com um UPDATE por lote,
+# para não segurar um lock longo na tabela inteira. Pode ser executada mais de
+# uma vez sem efeitos colaterais.
+#
+# Faz parte das migrações versionadas (app/migrations.py, migração 2); o uso
+# direto continua disponível para refazer o preenchimento.
+#
+# Uso (a partir de backend/):
+#     python -m app.receiving.migrate_details_columns [--batch-size 5000]
+
+import argparse
+
+from sqlalchemy import func, inspect, select, text, update
+
+from . import models
+# Necessário para o mapper de Receiving resolver o relacionamento com Requisition
+from ..requisitions import models as requisition_models  # noqa: F401
+
+BATCH_SIZE = 5000
+
+
+def add_missing_columns(conn):
+    """Cria as colunas e seus índices na transação da conexão (o commit fica com quem chama)."""
+    table = models.Receiving.__table__
+    existing = {column["name"] for column in inspect(conn).get_columns(table.name)}
+    preparer = conn.dialect.identifier_preparer
+
+    for name in models.DETAILS_COLUMNS:
+        column = table.c[name]
+        if name not in existing:
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(
+                f"ALTER TABLE {preparer.quote(table.name)} ADD COLUMN {preparer.quote(name)} {column_type}"
+            ))
+            print(f"Coluna {name} criada")
+        for index in table.indexes:
+            if [c.name for c in index.columns] == [name]:
+                index.create(bind=conn, checkfirst=True)
+
+
+def backfill(conn, batch_size: int = BATCH_SIZE) -> int:
+    """Preenche as colunas lote a lote, com um commit por lote."""
+    Receiving = models.Receiving
+    details = Receiving.details
+    values = {
+        "isClientMaterial": details["isClientMaterial"].as_boolean(),
+        "punctual": details["punctual"].as_boolean(),
+        "issueType": details["issueType"].as_string(),
+        "refusedMaterial": details["refusedMaterial"].as_boolean(),
+    }
+
+    max_id = conn.execute(select(func.max(Receiving.id))).scalar() or 0
+    conn.commit()
+
+    updated = 0
+    for start in range(0, max_id, batch_size):
+        result = conn.execute(
+            update(Receiving)
+            .where(Receiving.id > start, Receiving.id <= start + batch_size)
+            .where(Receiving.details.isnot(None))
+            .values(**values)
+        )
+        conn.commit()
+        updated += result.rowcount
+    return updated
+
+
+if __name__ == "__main__":
+    from ..database import engine
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        add_missing_columns(conn)
+        conn.commit()
+        total = backfill(conn, args.batch_size)
+    print(f"{total} recebimentos atualizados a partir de 'details'")
@@ -1,12 +1,37 @@
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, func, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, func, JSON, Index, DDL, event, text
 import datetime
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from datetime import datetime, timezone
 from ..database import Base
 
+# Chaves de 'details' que possuem coluna própria (mesmo nome)
+DETAILS_COLUMNS = ("isClientMaterial", "punctual", "issueType", "refusedMaterial")
+
 class Receiving(Base):
   __tablename__ = "recebimentos"
+  __table_args__ = (
+    # Índice composto que atende a paginação por cursor (ORDER BY entryDate DESC, id DESC)
+    Index("ix_recebimentos_entryDate_id", "entryDate", "id"),
+    # Listagem filtrada por status (ex.: "Aguardando Conferência"), mais recentes primeiro
+    Index("ix_recebimentos_status_entryDate", "status", "entryDate"),
+    # Um pedido só pode ser associado a uma NF; garante a regra no banco para a
+    # criação com INSERT ... ON CONFLICT. Índice parcial: várias linhas sem pedido
+    # ('') são permitidas e, para elas, a unicidade fica só na NF.
+    Index(
+      "uq_recebimentos_orderNumber", "orderNumber", unique=True,
+      postgresql_where=text("\"orderNumber\" <> ''"), sqlite_where=text("\"orderNumber\" <> ''"),
+    ),
+    # Índices trigram (pg_trgm) para a busca '%termo%' em NF, fornecedor e pedido.
+    # Fora do PostgreSQL as opções são ignoradas e viram índices comuns.
+    *(
+      Index(
+        f"ix_recebimentos_{column}_trgm", column,
+        postgresql_using="gin", postgresql_ops={column: "gin_trgm_ops"},
+      )
+      for column in ("nfNumber", "supplier", "orderNumber")
+    ),
+  )
   
   id = Column(Integer, primary_key=True, index=True)
   nfNumber = Column(String, index=True, nullable=False, unique=True)
@@ -19,17 +44,40 @@ class Receiving(Base):
   entryDate = Column(DateTime(timezone=True), server_default=func.now())
   receivedBy = Column(String, nullable=True)
   
-  conferenceDate = Column(DateTime(timezone=True), nullable=True)
+  # Indexadas para o balde "hoje" da vazão por turno (analytics/throughput.py)
+  conferenceDate = Column(DateTime(timezone=True), nullable=True, index=True)
   conferredBy = Column(String, nullable=True)
   
   details = Column(JSON, nullable=True)
   
+  # Campos "quentes" de 'details' replicados em colunas indexadas, para que os
+  # filtros e estatísticas não precisem ler o JSON linha a linha.
+  # São preenchidos automaticamente sempre que 'details' é atribuído.
+  isClientMaterial = Column(Boolean, nullable=True, index=True)
+  punctual = Column(Boolean, nullable=True, index=True)
+  issueType = Column(String, nullable=True, index=True)
+  refusedMaterial = Column(Boolean, nullable=True, index=True)
   
   resolutionNotes = Column(String, nullable=True)
   resolvedBy = Column(String, nullable=True)
-  resolvedDate = Column(DateTime(timezone=True), nullable=True)
+  resolvedDate = Column(DateTime(timezone=True), nullable=True, index=True)
   fulfilled_requisition = relationship(
         "Requisition", 
         back_populates="receiving",
         uselist=False 
-    )
\ No newline at end of file
+    )
+
+  @validates("details")
+  def _sync_details_columns(self, key, details):
+    values = details or {}
+    for field in DETAILS_COLUMNS:
+      setattr(self, field, values.get(field))
+    return details
+
+
+# A extensão pg_trgm precisa existir antes do CREATE INDEX dos índices trigram
+event.listen(
+  Receiving.__table__,
+  "before_create",
+  DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
@@ -1,11 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Header
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+import tempfile
+from sqlalchemy import tuple_, func, case, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 from typing import List 
-from . import models, schemas
+from . import models, schemas, search as receiving_search, bulk_import, export
 from ..database import get_db
+from ..pagination import encode_cursor, decode_cursor
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Literal, List
 from ..requisitions import models as requisition_models
+from ..analytics import rollups, throughput
+from ..events.broker import publish
+from ..audit import writer as audit
+from ..cache import cached
+from ..serialization import json_response
+from .. import idempotency
+
+# Páginas da listagem guardadas no cache (as mais consultadas pelos terminais)
+CACHED_PAGES = 3
+# Escopo das chaves de idempotência da criação
+CREATE_IDEMPOTENCY_SCOPE = "POST /api/recebimentos/"
 
 
 router = APIRouter(
@@ -16,108 +34,307 @@ router = APIRouter(
 @router.post("/", response_model=schemas.Recebimento, status_code=201)
 def create_recebimento(
     recebimento_data: schemas.RecebimentoCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias=idempotency.IDEMPOTENCY_HEADER, max_length=255)
 ):
     """
     Cria um novo recebimento e, opcionalmente, o vincula a uma requisição existente.
+
+    Com o cabeçalho Idempotency-Key, novas tentativas com a mesma chave (ex.: após
+    uma queda do Wi-Fi) devolvem a resposta original em vez de um erro de duplicidade.
     """
-    # --- Verificações de Duplicidade (seu código, já correto) ---
-    existing_nf = db.query(models.Receiving).filter(models.Receiving.nfNumber == recebimento_data.nfNumber).first()
-    if existing_nf:
-        raise HTTPException(status_code=400, detail=f"A NF nº {recebimento_data.nfNumber} já foi registrada.")
-    
-    if recebimento_data.orderNumber:
-        existing_order = db.query(models.Receiving).filter(models.Receiving.orderNumber == recebimento_data.orderNumber).first()
-        if existing_order:
+    Requisition = requisition_models.Requisition
+    req_id_to_fulfill = recebimento_data.requisition_id_to_fulfill
+
+    # 1. Idempotência: reserva a chave nesta transação ou devolve a resposta já gravada
+    if idempotency_key:
+        replay = idempotency.claim(
+            db, CREATE_IDEMPOTENCY_SCOPE, idempotency_key, idempotency.request_hash(recebimento_data)
+        )
+        if replay is not None:
+            return replay
+
+    # 2. INSERT ... ON CONFLICT DO NOTHING: NF e pedido (quando informado) são únicos
+    #    no banco, então dois terminais enviando a mesma NF ao mesmo tempo não passam os dois
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    receiving_id = db.execute(
+        insert(models.Receiving)
+        .values({**recebimento_data.model_dump(exclude={"requisition_id_to_fulfill"}),
+                 "orderNumber": recebimento_data.orderNumber or ""})
+        .on_conflict_do_nothing()
+        .returning(models.Receiving.id)
+    ).scalar()
+    if receiving_id is None:
+        _raise_duplicate(db, recebimento_data)
+
+    # 3. Bloqueia a requisição a vincular (SELECT ... FOR UPDATE SKIP LOCKED). Se outro
+    #    recebimento está vinculando a mesma requisição, responde na hora em vez de esperar.
+    if req_id_to_fulfill:
+        locked = (
+            db.query(Requisition.id)
+            .filter(Requisition.id == req_id_to_fulfill, Requisition.isFulfilled == False)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if locked is None:
+            db_req = db.query(Requisition.isFulfilled).filter(Requisition.id == req_id_to_fulfill).first()
+            if not db_req:
+                raise HTTPException(status_code=404, detail=f"Requisição com ID {req_id_to_fulfill} não encontrada.")
+            if db_req.isFulfilled:
+                raise HTTPException(status_code=400, detail=f"Requisição {req_id_to_fulfill} já foi atendida.")
             raise HTTPException(
-                status_code=400, 
-                detail=f"O Pedido nº {recebimento_data.orderNumber} já foi associado à NF: {existing_order.nfNumber}."
+                status_code=409, detail=f"Requisição {req_id_to_fulfill} está sendo vinculada a outro recebimento."
             )
-            
-    # --- Lógica de Vinculação (A Correção) ---
-    
-    # 1. Separe a "instrução" de vinculação dos dados principais.
-    req_id_to_fulfill = recebimento_data.requisition_id_to_fulfill
-    
-    # 2. Crie um dicionário de dados limpo, sem o campo extra.
-    receiving_model_data = recebimento_data.model_dump(exclude={"requisition_id_to_fulfill"})
-    
-    # 3. Crie a instância do recebimento com o dicionário limpo.
-    db_recebimento = models.Receiving(**receiving_model_data)
-    
-    # 4. Se um ID de requisição foi fornecido, processe a vinculação.
+
+    # 4. Vincula a requisição (bloqueada por esta transação; a condição em
+    #    isFulfilled protege também os bancos sem FOR UPDATE, como o SQLite)
     if req_id_to_fulfill:
-        db_req = db.query(requisition_models.Requisition).filter(requisition_models.Requisition.id == req_id_to_fulfill).first()
-        
-        # Validações de segurança
-        if not db_req:
-            raise HTTPException(status_code=404, detail=f"Requisição com ID {req_id_to_fulfill} não encontrada.")
-        if db_req.isFulfilled:
+        linked = db.execute(
+            update(Requisition)
+            .where(Requisition.id == req_id_to_fulfill, Requisition.isFulfilled == False)
+            .values(isFulfilled=True, receiving_id=receiving_id)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not linked:
+            db.rollback()
             raise HTTPException(status_code=400, detail=f"Requisição {req_id_to_fulfill} já foi atendida.")
-            
-        # Atualiza a requisição e cria o link
-        db_req.isFulfilled = True
-        db_req.receiving = db_recebimento # O SQLAlchemy gerencia o 'receiving_id'
-        
-        db.add(db_req)
 
-    # 5. Adiciona o novo recebimento e salva a transação (que inclui a atualização da requisição, se houver)
-    db.add(db_recebimento)
+    db_recebimento = db.get(models.Receiving, receiving_id)
+    rollups.refresh_for_receiving(db, db_recebimento)
+    throughput.record(db, db_recebimento.entryDate, entered=1)
+    # 5. Eventos em tempo real (enviados somente após o commit)
+    publish(db, "recebimento", "created", id=db_recebimento.id, status=db_recebimento.status)
+    if req_id_to_fulfill:
+        publish(db, "requisition", "fulfilled", id=req_id_to_fulfill, receiving_id=db_recebimento.id)
+        audit.record(db, "requisition", req_id_to_fulfill, "fulfilled", actor=db_recebimento.receivedBy,
+                     ts=db_recebimento.entryDate, receiving_id=db_recebimento.id)
+
+    # 6. Grava a resposta junto com a chave, na mesma transação do recebimento
+    response = json_response(schemas.Recebimento, db_recebimento, status_code=201)
+    if idempotency_key:
+        idempotency.store(db, CREATE_IDEMPOTENCY_SCOPE, idempotency_key, response)
     db.commit()
-    db.refresh(db_recebimento)
-    response_data = schemas.Recebimento.model_validate(db_recebimento)
+    return response
+
+
+def _raise_duplicate(db: Session, recebimento_data: schemas.RecebimentoCreate):
+    """Erro de duplicidade com a mesma mensagem das verificações anteriores ao INSERT."""
+    db.rollback()
+    existing_nf = db.query(models.Receiving.id).filter(models.Receiving.nfNumber == recebimento_data.nfNumber).first()
+    if existing_nf:
+        raise HTTPException(status_code=400, detail=f"A NF nº {recebimento_data.nfNumber} já foi registrada.")
+    existing_order = recebimento_data.orderNumber and (
+        db.query(models.Receiving.nfNumber)
+        .filter(models.Receiving.orderNumber == recebimento_data.orderNumber)
+        .first()
+    )
+    raise HTTPException(
+        status_code=400,
+        detail=f"O Pedido nº {recebimento_data.orderNumber} já foi associado à NF: "
+               f"{existing_order.nfNumber if existing_order else '-'}."
+    )
+
+
+@router.post("/import")
+def import_recebimentos(
+    file: UploadFile = File(...),
+    file_format: Optional[Literal["csv", "jsonl"]] = Query(None, alias="format"),
+    batch_size: int = Query(bulk_import.BATCH_SIZE, ge=1, le=10000),
+    propose_matches: bool = False,
+    # Codificação do arquivo; sem ela, UTF-8 e, se não decodificar, cp1252
+    encoding: Optional[Literal["utf-8", "cp1252", "latin-1"]] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Importa recebimentos em lote a partir de um arquivo CSV (com cabeçalho) ou
+    JSON lines, com os mesmos campos de RecebimentoCreate.
+    Responde com um relatório em JSON lines: uma linha por registro do arquivo
+    (created / duplicate / invalid / error) e uma linha final com o resumo.
+    Com propose_matches=true, cada recebimento criado sem requisição traz a
+    requisição pendente proposta pelo motor de vinculação.
+    """
+    if file_format is None:
+        file_format = "csv" if (file.filename or "").lower().endswith(".csv") else "jsonl"
+
+    # O relatório vai para um arquivo temporário (em disco acima de 1 MB), para
+    # que nem a entrada nem a saída precisem caber em memória
+    report = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    # Conferida antes de gravar qualquer lote (um byte inválido no meio do
+    # arquivo não pode deixar a importação pela metade)
+    encoding = bulk_import.detect_encoding(file.file, encoding)
+    rows = bulk_import.read_rows(file.file, file_format, encoding)
+    for line in bulk_import.import_recebimentos(db, rows, batch_size, propose_matches):
+        report.write(line.encode())
+    report.seek(0)
+
+    return StreamingResponse(report, media_type="application/x-ndjson", background=BackgroundTask(report.close))
+
+
+def _filtered_query(db, search, status, start_date, end_date, is_client_material):
+    """Filtros comuns da listagem e da exportação."""
+    query = db.query(models.Receiving)
     
-    return db_recebimento
+    if is_client_material is not None:
+        # Coluna indexada replicada de details['isClientMaterial']
+        query = query.filter(models.Receiving.isClientMaterial == is_client_material)
+
+    # Aplica os filtros de forma encadeada, se eles existirem
+    if search:
+        # Busca por NF, fornecedor ou pedido (índices trigram no PostgreSQL)
+        query = receiving_search.apply_search(query, search)
+    if status:
+        query = query.filter(models.Receiving.status == status)
+    if start_date:
+        query = query.filter(models.Receiving.entryDate >= start_date)
+    if end_date:
+        # Adiciona um dia para garantir que a busca inclua o dia final por completo
+        query = query.filter(models.Receiving.entryDate < end_date + timedelta(days=1))
+    return query
 
 
 @router.get("/", response_model=schemas.PaginatedRecebimentos)
+@cached(
+    schemas.PaginatedRecebimentos, tags=["recebimentos"],
+    when=lambda params: params["page"] <= CACHED_PAGES and params["cursor"] is None,
+)
 def get_all_recebimentos(
     db: Session = Depends(get_db),
     # Parâmetros de Filtro
     search: Optional[str] = None,
+    # Ordenação: "recent" (entryDate desc) ou "relevance" (exige 'search')
+    sort: Literal["recent", "relevance"] = "recent",
     status: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
     is_client_material: Optional[bool] = None,
     # Parâmetros de Paginação
-    page: int = 1,
-    page_size: int = 10 
+    page: int = Query(1, ge=1),
+    page_size: int = Query(10, ge=1, le=500),
+    # Modo de paginação: "offset" (padrão) ou "cursor" (keyset em entryDate, id)
+    pagination: Literal["offset", "cursor"] = "offset",
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None
 ):
     
-    query = db.query(models.Receiving)
-    
-    if is_client_material is not None:
-        # Acessa o campo aninhado no JSON
-        query = query.filter(models.Receiving.details['isClientMaterial'].as_boolean() == is_client_material)
-
-    # 2. Aplica os filtros de forma encadeada, se eles existirem
-    if search:
-        query = query.filter(
-            models.Receiving.nfNumber.ilike(f"%{search}%") |
-            models.Receiving.supplier.ilike(f"%{search}%") |
-            models.Receiving.orderNumber.ilike(f"%{search}%")
+    if sort == "relevance" and (not search or pagination == "cursor"):
+        raise HTTPException(
+            status_code=400,
+            detail="A ordenação por relevância exige 'search' e não é suportada na paginação por cursor."
         )
-    if status:
-        query = query.filter(models.Receiving.status == status)
-    if start_date:
-        query = query.filter(models.Receiving.entryDate >= start_date)
-    if end_date:
-        # Adiciona um dia para garantir que a busca inclua o dia final por completo
-        query = query.filter(models.Receiving.entryDate < end_date + timedelta(days=1))
+
+    query = _filtered_query(db, search, status, start_date, end_date, is_client_material)
     
+    # No modo offset o total continua sendo sempre calculado (compatibilidade);
+    # no modo cursor ele só é calculado se o cliente pedir explicitamente.
+    if include_total is None:
+        include_total = pagination == "offset"
+
     # 3. Conta o número total de itens que correspondem aos filtros
     #    Isso é feito ANTES de aplicar a paginação (limit/offset)
-    total_items = query.count()
+    total_items = query.count() if include_total else None
     
+    if pagination == "cursor":
+        # 4. Keyset: continua a partir do último (entryDate, id) da página anterior.
+        #    Usa o índice (entryDate, id), então qualquer página custa o mesmo que a primeira.
+        if cursor:
+            last_date, last_id = decode_cursor(cursor)
+            query = query.filter(
+                tuple_(models.Receiving.entryDate, models.Receiving.id) < tuple_(last_date, last_id)
+            )
+        
+        # Busca um item a mais para saber se existe uma próxima página
+        rows = query.order_by(
+            models.Receiving.entryDate.desc(), models.Receiving.id.desc()
+        ).limit(page_size + 1).all()
+        
+        recebimentos_list = rows[:page_size]
+        next_cursor = None
+        if len(rows) > page_size:
+            last = recebimentos_list[-1]
+            next_cursor = encode_cursor(last.entryDate, last.id)
+        
+        return json_response(
+            schemas.PaginatedRecebimentos,
+            {"items": recebimentos_list, "total": total_items, "next_cursor": next_cursor},
+        )
     
     #    Calcula o offset com base na página atual e no tamanho da página
     offset = (page - 1) * page_size
     
     # 5. Aplica a ordenação, o offset e o limite para obter apenas os itens da página atual
-    recebimentos_list = query.order_by(models.Receiving.entryDate.desc()).offset(offset).limit(page_size).all()
+    if sort == "relevance":
+        relevance = receiving_search.relevance(search, db.get_bind().dialect.name)
+        query = query.order_by(relevance.desc(), models.Receiving.entryDate.desc())
+    else:
+        query = query.order_by(models.Receiving.entryDate.desc())
+    recebimentos_list = query.offset(offset).limit(page_size).all()
     
-    # 6. Retorna o dicionário no formato esperado pelo schema PaginatedRecebimentos
-    return {"items": recebimentos_list, "total": total_items}
+    # 6. Retorna no formato do schema PaginatedRecebimentos, já serializado
+    #    (uma única validação dos objetos ORM; ver app/serialization.py)
+    return json_response(schemas.PaginatedRecebimentos, {"items": recebimentos_list, "total": total_items})
+
+
+@router.get("/export")
+def export_recebimentos(
+    file_format: Literal["csv", "xlsx"] = Query("csv", alias="format"),
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    is_client_material: Optional[bool] = None,
+):
+    """
+    Exporta os recebimentos com os mesmos filtros da listagem, em CSV ou XLSX,
+    ordenados por data de entrada. As linhas são lidas e enviadas em blocos,
+    então o consumo de memória não depende do período exportado.
+    """
+    def build_query(db):
+        return _filtered_query(db, search, status, start_date, end_date, is_client_material)
+
+    stream = export.stream_csv if file_format == "csv" else export.stream_xlsx
+    filename = f"recebimentos_{datetime.now():%Y%m%d_%H%M}.{file_format}"
+    return StreamingResponse(
+        stream(build_query),
+        media_type=export.MEDIA_TYPES[file_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/stats", response_model=schemas.RecebimentoStats)
+def get_recebimentos_stats(
+    db: Session = Depends(get_db),
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+):
+    """
+    Estatísticas de pontualidade e pendências dos recebimentos conferidos,
+    calculadas sobre as colunas indexadas (sem ler o JSON de 'details').
+    """
+    query = db.query(
+        models.Receiving.issueType,
+        func.count().label("total"),
+        func.sum(case((models.Receiving.punctual.is_(True), 1), else_=0)).label("punctual"),
+        func.sum(case((models.Receiving.isClientMaterial.is_(True), 1), else_=0)).label("client_material"),
+        func.sum(case((models.Receiving.refusedMaterial.is_(True), 1), else_=0)).label("refused"),
+    ).filter(models.Receiving.punctual.isnot(None))
+
+    if start_date:
+        query = query.filter(models.Receiving.entryDate >= start_date)
+    if end_date:
+        query = query.filter(models.Receiving.entryDate < end_date + timedelta(days=1))
+
+    rows = query.group_by(models.Receiving.issueType).all()
+
+    total = sum(row.total for row in rows)
+    punctual = sum(row.punctual for row in rows)
+    return {
+        "total_conferred": total,
+        "punctual": punctual,
+        "punctuality_rate": punctual / total if total else None,
+        "client_material": sum(row.client_material for row in rows),
+        "refused": sum(row.refused for row in rows),
+        "by_issue_type": {row.issueType: row.total for row in rows},
+    }
 
 
 @router.put("/{recebimento_id}", response_model=schemas.Recebimento)
@@ -128,7 +345,11 @@ def update_conference_details(
 ):
 
     
-    db_recebimento = db.query(models.Receiving).filter(models.Receiving.id == recebimento_id).first()
+    # FOR UPDATE: duas submissões simultâneas não passam as duas pela checagem do
+    # status (cada uma contaria o evento de novo na vazão e no log)
+    db_recebimento = (
+        db.query(models.Receiving).filter(models.Receiving.id == recebimento_id).with_for_update().first()
+    )
     
     if not db_recebimento:
         raise HTTPException(status_code=404, detail="Recebimento não encontrado")
@@ -140,6 +361,7 @@ def update_conference_details(
         )
 
     
+    previous_status = db_recebimento.status
     db_recebimento.conferredBy = update_data.conferredBy
     
     db_recebimento.conferenceDate = datetime.now(timezone.utc)
@@ -155,7 +377,17 @@ def update_conference_details(
     else:
         db_recebimento.status = "Conferido"
 
-    
+    rollups.refresh_for_receiving(db, db_recebimento)
+    throughput.record(
+        db, db_recebimento.conferenceDate, conferred=1,
+        pending=int(db_recebimento.status == "Pendente"), rejected=int(db_recebimento.status == "Rejeitado"),
+    )
+    publish(db, "recebimento", "conferred", id=db_recebimento.id, status=db_recebimento.status)
+    audit.record(
+        db, "recebimento", db_recebimento.id, "conferred", actor=db_recebimento.conferredBy,
+        from_status=previous_status, to_status=db_recebimento.status, ts=db_recebimento.conferenceDate,
+        issueType=update_data.details.issueType, refusedMaterial=update_data.details.refusedMaterial,
+    )
     db.commit()
     db.refresh(db_recebimento)
     
@@ -169,7 +401,11 @@ def resolve_pendency(
     db: Session = Depends(get_db)
 ):
    
-    db_recebimento = db.query(models.Receiving).filter(models.Receiving.id == recebimento_id).first()
+    # FOR UPDATE: duas submissões simultâneas não passam as duas pela checagem do
+    # status (cada uma contaria o evento de novo na vazão e no log)
+    db_recebimento = (
+        db.query(models.Receiving).filter(models.Receiving.id == recebimento_id).with_for_update().first()
+    )
     
     if not db_recebimento:
         raise HTTPException(status_code=404, detail="Recebimento não encontrado")
@@ -189,6 +425,16 @@ def resolve_pendency(
     if db_recebimento.details:
         db_recebimento.details['issueResolved'] = True
 
+    rollups.refresh_for_receiving(db, db_recebimento)
+    throughput.record(
+        db, db_recebimento.resolvedDate, resolved=1, rejected=int(db_recebimento.status == "Rejeitado")
+    )
+    publish(db, "recebimento", "resolved", id=db_recebimento.id, status=db_recebimento.status)
+    audit.record(
+        db, "recebimento", db_recebimento.id, "resolved", actor=db_recebimento.resolvedBy,
+        from_status="Pendente", to_status=db_recebimento.status, ts=db_recebimento.resolvedDate,
+        notes=db_recebimento.resolutionNotes,
+    )
     db.commit()
     db.refresh(db_recebimento)
     return db_recebimento
@@ -200,7 +446,11 @@ def reject_entry(
     db: Session = Depends(get_db)
 ):
    
-    db_recebimento = db.query(models.Receiving).filter(models.Receiving.id == recebimento_id).first()
+    # FOR UPDATE: duas submissões simultâneas não passam as duas pela checagem do
+    # status (cada uma contaria o evento de novo na vazão e no log)
+    db_recebimento = (
+        db.query(models.Receiving).filter(models.Receiving.id == recebimento_id).with_for_update().first()
+    )
     
     if not db_recebimento:
         raise HTTPException(status_code=404, detail="Recebimento não encontrado")
@@ -217,6 +467,15 @@ def reject_entry(
     db_recebimento.resolvedBy = reject_data.rejectedBy
     db_recebimento.resolvedDate = datetime.now(timezone.utc)
 
+    rollups.refresh_for_receiving(db, db_recebimento)
+    throughput.record(db, db_recebimento.resolvedDate, rejected=1)
+    publish(db, "recebimento", "rejected", id=db_recebimento.id, status=db_recebimento.status)
+    # O motivo fica estruturado no log (em resolutionNotes ele segue formatado, para as telas atuais)
+    audit.record(
+        db, "recebimento", db_recebimento.id, "rejected", actor=reject_data.rejectedBy,
+        from_status="Aguardando Conferência", to_status=db_recebimento.status, ts=db_recebimento.resolvedDate,
+        reason=reject_data.rejectionReason,
+    )
     db.commit()
     db.refresh(db_recebimento)
     return db_recebimento
\ No newline at end of file
@@ -1,7 +1,7 @@
 # backend/app/receiving/schemas.py
 
 from pydantic import BaseModel, Field
-from typing import Optional, Literal, List
+from typing import Optional, Literal, List, Dict
 from datetime import datetime
 import enum
 
@@ -82,7 +82,19 @@ class Recebimento(BaseModel):
     class Config:
         from_attributes = True
         
+# --- Schema de Estatísticas ---
+class RecebimentoStats(BaseModel):
+    total_conferred: int
+    punctual: int
+    punctuality_rate: Optional[float] = None
+    client_material: int
+    refused: int
+    by_issue_type: Dict[str, int]
+
 # --- Schema de Paginação ---
 class PaginatedRecebimentos(BaseModel):
     items: List[Recebimento]
-    total: int
\ No newline at end of file
+    # Opcional no modo cursor (só é calculado com include_total=true)
+    total: Optional[int] = None
+    # Cursor opaco para a próxima página (None quando não há mais itens)
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,75 @@
+# backend/app/receiving/search.py
+#
+# Busca textual dos recebimentos (parâmetro 'search' da listagem).
+#
+# No PostgreSQL os campos nfNumber, supplier e orderNumber têm índices GIN com
+# pg_trgm (declarados em models.py), que atendem diretamente os predicados
+# ILIKE '%termo%' (sem varrer a tabela) e permitem ordenar por similaridade. Em outros bancos (SQLite nos
+# testes/benchmarks) a mesma consulta funciona sem os índices, e a relevância
+# é calculada com uma expressão CASE simples.
+#
+# Para criar a extensão e os índices em um banco já existente:
+#     python -m app.receiving.search
+
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.orm import Query
+
+from . import models
+
+SEARCH_COLUMNS = (
+    models.Receiving.nfNumber,
+    models.Receiving.supplier,
+    models.Receiving.orderNumber,
+)
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def apply_search(query: Query, term: str) -> Query:
+    """Filtra os recebimentos cujo NF, fornecedor ou pedido contenham o termo."""
+    pattern = f"%{escape_like(term)}%"
+    return query.filter(or_(*(column.ilike(pattern, escape="\\") for column in SEARCH_COLUMNS)))
+
+
+def relevance(term: str, dialect_name: str):
+    """
+    Expressão de relevância para ORDER BY (maior = mais relevante).
+    PostgreSQL: maior similaridade trigram entre os três campos.
+    Demais bancos: igualdade exata > prefixo > contém.
+    """
+    if dialect_name == "postgresql":
+        return func.greatest(*(func.similarity(column, term) for column in SEARCH_COLUMNS))
+
+    lowered = term.lower()
+    prefix = f"{escape_like(lowered)}%"
+    scores = [
+        case(
+            (func.lower(column) == lowered, 3),
+            (func.lower(column).like(prefix, escape="\\"), 2),
+            else_=1,
+        )
+        for column in SEARCH_COLUMNS
+    ]
+    return func.max(*scores) if dialect_name == "sqlite" else func.greatest(*scores)
+
+
+def create_search_indexes(engine):
+    """Cria a extensão pg_trgm e os índices GIN em um banco PostgreSQL existente."""
+    if engine.dialect.name != "postgresql":
+        print(f"Banco '{engine.dialect.name}' não suporta pg_trgm; nada a fazer.")
+        return
+    with engine.begin() as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for index in models.Receiving.__table__.indexes:
+            if not index.name.endswith("_trgm"):
+                continue
+            index.create(bind=conn, checkfirst=True)
+            print(f"Índice {index.name} OK")
+
+
+if __name__ == "__main__":
+    from ..database import engine
+
+    create_search_indexes(engine)
@@ -0,0 +1,336 @@
+# backend/app/requisitions/matching.py
+#
+# Motor de vinculação requisição -> recebimento.
+#
+# Para um recebimento (novo ou importado) ordena as requisições pendentes por:
+#   - número do pedido/OP igual (normalizado: sem pontuação e sem caixa);
+#   - mesma obra e, dentro dela, mesmo sub-item;
+#   - similaridade da descrição do material (trigramas, como o pg_trgm).
+#
+# As requisições pendentes ficam em um índice em memória (por pedido, por obra
+# e por trigrama), carregado do banco no primeiro uso e atualizado de forma
+# incremental pelos eventos "requisition" do broker (criada / atendida), sem
+# reler a tabela. Eventos que chegam durante uma carga são guardados e
+# reaplicados sobre o resultado dela (podem ser anteriores ou posteriores à
+# leitura; aplicar de novo não muda nada). Nenhum lock fica retido durante a
+# leitura do banco: no modo assíncrono as rotas rodam na thread do event loop.
+# Como rede de segurança (evento perdido numa reconexão do listener, por
+# exemplo), o índice é recarregado por inteiro a cada REQUISITION_INDEX_TTL
+# segundos (padrão 600), sem deixar de responder com o índice anterior durante
+# a leitura.
+#
+# No modo em lote, as propostas de uma importação inteira são calculadas em uma
+# passada e cada requisição é proposta a um único recebimento.
+
+import bisect
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from ..events.broker import broker
+
+# Pesos de cada critério. A pontuação é a soma dos pesos atingidos dividida pela
+# soma dos pesos dos critérios informados (0 a 1), então um recebimento com
+# poucos dados ainda pode ter uma sugestão forte.
+ORDER_WEIGHT = 0.5
+OBRA_WEIGHT = 0.2
+SUB_ITEM_WEIGHT = 0.1
+DESCRIPTION_WEIGHT = 0.2
+# Pontuação mínima (normalizada) para uma requisição ser sugerida
+MIN_SCORE = 0.25
+# Similaridade mínima da descrição quando ela é o único critério informado
+MIN_SIMILARITY = 0.3
+# Intervalo (s) da recarga completa do índice a partir do banco
+REQUISITION_INDEX_TTL = float(os.getenv("REQUISITION_INDEX_TTL", "600"))
+
+
+def normalize_order(value) -> str:
+    return re.sub(r"[^0-9a-z]", "", str(value).lower()) if value else ""
+
+
+def _normalize_text(value: str) -> str:
+    text = unicodedata.normalize("NFKD", value or "").encode("ascii", "ignore").decode().lower()
+    return re.sub(r"[^0-9a-z]+", " ", text).strip()
+
+
+def trigrams(value: str) -> frozenset:
+    """Trigramas das palavras, com o mesmo preenchimento do pg_trgm ('  palavra ')."""
+    grams = set()
+    for word in _normalize_text(value).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(a: frozenset, b: frozenset) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class _Entry:
+    __slots__ = ("id", "order", "obra", "sub_item", "trigrams", "request_date", "data")
+
+    @property
+    def age_key(self):
+        return self.request_date, self.id
+
+    def __init__(self, row):
+        self.id = row.id
+        self.order = normalize_order(row.orderNumber)
+        self.obra = row.obra
+        self.sub_item = row.sub_item
+        self.trigrams = trigrams(row.materialDescription)
+        # Datas sem fuso (SQLite) são UTC; a comparação exige datas com fuso
+        request_date = row.requestDate or datetime.now(timezone.utc)
+        self.request_date = request_date if request_date.tzinfo else request_date.replace(tzinfo=timezone.utc)
+        # Campos devolvidos na resposta (formato de schemas.Requisition)
+        self.data = {
+            "id": row.id, "obra": row.obra, "sub_item": row.sub_item, "requestedBy": row.requestedBy,
+            "orderNumber": row.orderNumber, "materialDescription": row.materialDescription,
+            "requestDate": self.request_date, "isFulfilled": False, "receiving_id": None,
+        }
+
+
+class _Row:
+    """Requisição recebida por evento, com a mesma interface de uma linha do banco."""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+REQUISITION_COLUMNS = (
+    models.Requisition.id, models.Requisition.orderNumber, models.Requisition.obra,
+    models.Requisition.sub_item, models.Requisition.materialDescription,
+    models.Requisition.requestedBy, models.Requisition.requestDate,
+)
+
+
+class RequisitionIndex:
+    """Índice em memória das requisições pendentes."""
+
+    def __init__(self, ttl: float = REQUISITION_INDEX_TTL):
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self.loaded = False
+        self.loaded_at = 0.0
+        # Eventos recebidos durante cada carga em andamento (uma lista por carga)
+        self._replays = []
+        self._entries = {}
+        self._by_order = defaultdict(set)
+        self._by_obra = defaultdict(set)
+        # Descrições se repetem muito (catálogo de materiais): as requisições são
+        # agrupadas pelos trigramas da descrição (lista ordenada da mais antiga
+        # para a mais nova) e as postings apontam para os grupos, não para cada
+        # requisição
+        self._by_description = defaultdict(list)
+        self._by_trigram = defaultdict(set)
+
+    # --- Manutenção ---
+
+    def _clear(self):
+        for postings in (self._entries, self._by_order, self._by_obra, self._by_description, self._by_trigram):
+            postings.clear()
+
+    def load(self, rows, replay: list = ()):
+        with self._lock:
+            self._clear()
+            for row in rows:
+                self.add(row)
+            # Eventos que chegaram enquanto as linhas eram lidas
+            for payload in replay:
+                self._apply(payload)
+            self._end_replay(replay)
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def _end_replay(self, replay: list):
+        self._replays = [pending for pending in self._replays if pending is not replay]
+
+    def ensure_loaded(self, db: Session):
+        with self._lock:
+            fresh = self.loaded and time.monotonic() - self.loaded_at <= self.ttl
+            # Atualizado, ou já sendo recarregado: responde com o índice atual.
+            # Só na primeira carga duas consultas simultâneas leem o banco.
+            if fresh or (self.loaded and self._replays):
+                return
+            # A partir daqui os eventos também são guardados para esta carga
+            replay = []
+            self._replays.append(replay)
+        try:
+            rows = db.execute(
+                select(*REQUISITION_COLUMNS).where(models.Requisition.isFulfilled.is_(False))
+            ).all()
+        except Exception:
+            with self._lock:
+                self._end_replay(replay)
+            raise
+        self.load(rows, replay)
+
+    def reset(self):
+        """Descarta o índice; a próxima consulta recarrega do banco."""
+        with self._lock:
+            self.loaded = False
+            self._clear()
+
+    def apply_event(self, payload: dict):
+        """Aplica um evento "requisition" (criada / atendida) ao índice."""
+        with self._lock:
+            for replay in self._replays:
+                replay.append(payload)
+            if self.loaded:
+                self._apply(payload)
+
+    def _apply(self, payload: dict):
+        # Uma requisição já lida do banco mantém a data original da linha
+        if payload["action"] == "created" and "materialDescription" in payload and payload["id"] not in self._entries:
+            self.add(_Row(
+                id=payload["id"], orderNumber=payload["orderNumber"], obra=payload["obra"],
+                sub_item=payload.get("sub_item"), materialDescription=payload["materialDescription"],
+                requestedBy=payload["requestedBy"], requestDate=None,
+            ))
+        elif payload["action"] == "fulfilled":
+            self.remove(payload["id"])
+
+    def add(self, row):
+        with self._lock:
+            self.remove(row.id)
+            entry = _Entry(row)
+            self._entries[entry.id] = entry
+            if entry.order:
+                self._by_order[entry.order].add(entry.id)
+            self._by_obra[entry.obra].add(entry.id)
+            group = self._by_description[entry.trigrams]
+            if not group:
+                for gram in entry.trigrams:
+                    self._by_trigram[gram].add(entry.trigrams)
+            bisect.insort(group, entry.age_key)
+
+    def remove(self, requisition_id: int):
+        with self._lock:
+            entry = self._entries.pop(requisition_id, None)
+            if entry is None:
+                return
+            for postings, key in ((self._by_order, entry.order), (self._by_obra, entry.obra)):
+                ids = postings.get(key)
+                if ids is not None:
+                    ids.discard(entry.id)
+                    if not ids:
+                        del postings[key]
+            group = self._by_description[entry.trigrams]
+            del group[bisect.bisect_left(group, entry.age_key)]
+            if not group:
+                del self._by_description[entry.trigrams]
+                for gram in entry.trigrams:
+                    groups = self._by_trigram[gram]
+                    groups.discard(entry.trigrams)
+                    if not groups:
+                        del self._by_trigram[gram]
+
+    def __len__(self):
+        return len(self._entries)
+
+    # --- Consulta ---
+
+    def rank(self, order_number=None, obra=None, sub_item=None, material_description=None, limit: int = 5) -> list:
+        """Requisições pendentes ordenadas por pontuação (maior primeiro; empate: a mais antiga)."""
+        order = normalize_order(order_number)
+        grams = trigrams(material_description) if material_description else frozenset()
+        possible = (
+            (ORDER_WEIGHT if order else 0) + (DESCRIPTION_WEIGHT if grams else 0)
+            + (OBRA_WEIGHT + (SUB_ITEM_WEIGHT if sub_item is not None else 0) if obra is not None else 0)
+        )
+
+        with self._lock:
+            # Candidatas: mesmo pedido ou mesma obra; só pela descrição quando
+            # nenhuma coincide (trigramas em comum contados pelas postings dos grupos)
+            candidates = set(self._by_order.get(order, ())) | set(self._by_obra.get(obra, ()))
+            # Similaridade calculada uma vez por descrição distinta
+            similarities = {}
+            if not candidates and grams:
+                shared = Counter()
+                for gram in grams:
+                    shared.update(self._by_trigram.get(gram, ()))
+                for description, count in shared.items():
+                    desc_similarity = count / (len(grams) + len(description) - count)
+                    if desc_similarity >= MIN_SIMILARITY:
+                        # No grupo todas têm a mesma pontuação: só as 'limit' mais
+                        # antigas podem aparecer no resultado
+                        similarities[description] = desc_similarity
+                        candidates.update(
+                            requisition_id for _, requisition_id in self._by_description[description][:limit]
+                        )
+
+            scored = []
+            for requisition_id in candidates:
+                entry = self._entries[requisition_id]
+                desc_similarity = similarities.get(entry.trigrams)
+                if desc_similarity is None:
+                    desc_similarity = similarities[entry.trigrams] = similarity(grams, entry.trigrams)
+
+                matched_on, score = [], DESCRIPTION_WEIGHT * desc_similarity
+                if order and entry.order == order:
+                    score += ORDER_WEIGHT
+                    matched_on.append("orderNumber")
+                if obra is not None and entry.obra == obra:
+                    score += OBRA_WEIGHT
+                    matched_on.append("obra")
+                    if sub_item is not None and entry.sub_item == sub_item:
+                        score += SUB_ITEM_WEIGHT
+                        matched_on.append("sub_item")
+                if desc_similarity:
+                    matched_on.append("materialDescription")
+                score /= possible
+                if score >= MIN_SCORE:
+                    scored.append((score, entry, desc_similarity, matched_on))
+
+        scored.sort(key=lambda item: (-item[0], item[1].request_date, item[1].id))
+        return [
+            {"requisition": entry.data, "score": round(score, 4),
+             "similarity": round(desc_similarity, 4), "matched_on": matched_on}
+            for score, entry, desc_similarity, matched_on in scored[:limit]
+        ]
+
+    def propose(self, receivings: list, limit: int = 3) -> list:
+        """
+        Modo em lote: ordena as candidatas de cada recebimento e atribui as
+        propostas de forma gulosa pela maior pontuação do lote inteiro, para que
+        uma requisição não seja proposta a dois recebimentos.
+        """
+        ranked = [self.rank(limit=max(limit, 10), **receiving) for receiving in receivings]
+
+        pairs = sorted(
+            ((match["score"], index, match) for index, matches in enumerate(ranked) for match in matches),
+            key=lambda pair: (-pair[0], pair[1]),
+        )
+        proposals, taken = [None] * len(receivings), set()
+        for _, index, match in pairs:
+            requisition_id = match["requisition"]["id"]
+            if proposals[index] is None and requisition_id not in taken:
+                proposals[index] = match
+                taken.add(requisition_id)
+
+        return [
+            {"match": proposal, "candidates": matches[:limit]}
+            for proposal, matches in zip(proposals, ranked)
+        ]
+
+
+REQUISITION_INDEX = RequisitionIndex()
+
+
+def _on_event(payload: dict):
+    if payload.get("entity") == "requisition":
+        REQUISITION_INDEX.apply_event(payload)
+
+
+broker.add_listener(_on_event)
@@ -1,10 +1,19 @@
 # backend/app/requisitions/models.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Index, func, false
 from sqlalchemy.orm import relationship
 from ..database import Base
 
 class Requisition(Base):
     __tablename__ = "requisitions"
+    __table_args__ = (
+        # Índices parciais (WHERE "isFulfilled" = false): contêm só as pendentes,
+        # então continuam pequenos por mais requisições atendidas que se acumulem.
+        # Atendem a listagem de pendentes (ordem por requestDate, id), com ou sem filtro por obra.
+        Index("ix_requisitions_pending_requestDate_id", "requestDate", "id",
+              postgresql_where=Column("isFulfilled") == false(), sqlite_where=Column("isFulfilled") == false()),
+        Index("ix_requisitions_pending_obra_requestDate_id", "obra", "requestDate", "id",
+              postgresql_where=Column("isFulfilled") == false(), sqlite_where=Column("isFulfilled") == false()),
+    )
     
     id = Column(Integer, primary_key=True)
     requestedBy = Column(String, nullable=False)
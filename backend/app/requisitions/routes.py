@@ -1,9 +1,18 @@
 # backend/app/requisitions/routes.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Body
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Literal
+from datetime import datetime, timedelta
 from . import models, schemas
+from .matching import REQUISITION_INDEX
 from ..database import get_db
+from ..receiving.search import escape_like
+from ..pagination import encode_cursor, decode_cursor
+from ..events.broker import publish
+from ..audit import writer as audit
+from ..cache import cached
+from ..serialization import json_response
 
 
 router = APIRouter(prefix="/api/requisitions", tags=["Requisições"])
@@ -12,13 +21,110 @@ router = APIRouter(prefix="/api/requisitions", tags=["Requisições"])
 def create_requisition(req_data: schemas.RequisitionCreate, db: Session = Depends(get_db)):
     db_req = models.Requisition(**req_data.model_dump())
     db.add(db_req)
+    db.flush()
+    # Os campos seguem no evento para o índice de vinculação não reler o banco
+    publish(db, "requisition", "created", id=db_req.id, **req_data.model_dump())
     db.commit()
     db.refresh(db_req)
     return db_req
 
-@router.get("/pending", response_model=List[schemas.Requisition])
-def get_pending_requisitions(db: Session = Depends(get_db)):
-    return db.query(models.Requisition).filter(models.Requisition.isFulfilled == False).all()
+@router.get("/pending", response_model=schemas.PaginatedRequisitions)
+@cached(schemas.PaginatedRequisitions, tags=["requisitions"], when=lambda params: params["cursor"] is None)
+def get_pending_requisitions(
+    db: Session = Depends(get_db),
+    # Filtros
+    obra: Optional[int] = None,
+    sub_item: Optional[int] = None,
+    requestedBy: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    # Ordenação: "oldest" (as mais antigas primeiro, ordem de atendimento) ou "newest"
+    sort: Literal["oldest", "newest"] = "oldest",
+    # Paginação por cursor (keyset em requestDate, id)
+    page_size: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    include_total: bool = False
+):
+    """
+    Requisições pendentes, filtradas e paginadas por cursor. As consultas usam
+    os índices parciais de pendentes (ver models.Requisition).
+    """
+    Requisition = models.Requisition
+    # 1. Filtros (a condição isFulfilled = false é a mesma dos índices parciais)
+    query = db.query(Requisition).filter(Requisition.isFulfilled == False)
+    if obra is not None:
+        query = query.filter(Requisition.obra == obra)
+    if sub_item is not None:
+        query = query.filter(Requisition.sub_item == sub_item)
+    if requestedBy:
+        query = query.filter(Requisition.requestedBy.ilike(f"%{escape_like(requestedBy)}%", escape="\\"))
+    if start_date:
+        query = query.filter(Requisition.requestDate >= start_date)
+    if end_date:
+        # Adiciona um dia para garantir que a busca inclua o dia final por completo
+        query = query.filter(Requisition.requestDate < end_date + timedelta(days=1))
+
+    # 2. Total apenas se pedido (exige percorrer todas as pendentes filtradas)
+    total_items = query.count() if include_total else None
+
+    # 3. Keyset: continua a partir do último (requestDate, id) da página anterior
+    key = tuple_(Requisition.requestDate, Requisition.id)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor)
+        query = query.filter(key > tuple_(last_date, last_id) if sort == "oldest" else key < tuple_(last_date, last_id))
+    if sort == "oldest":
+        query = query.order_by(Requisition.requestDate, Requisition.id)
+    else:
+        query = query.order_by(Requisition.requestDate.desc(), Requisition.id.desc())
+
+    # Busca um item a mais para saber se existe uma próxima página
+    rows = query.limit(page_size + 1).all()
+    pending = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = encode_cursor(pending[-1].requestDate, pending[-1].id)
+
+    return json_response(
+        schemas.PaginatedRequisitions,
+        {"items": pending, "total": total_items, "next_cursor": next_cursor},
+    )
+
+@router.get("/matches", response_model=List[schemas.RequisitionMatch])
+def get_requisition_matches(
+    db: Session = Depends(get_db),
+    orderNumber: Optional[str] = None,
+    obra: Optional[int] = None,
+    sub_item: Optional[int] = None,
+    materialDescription: Optional[str] = None,
+    limit: int = Query(5, ge=1, le=50)
+):
+    """
+    Requisições pendentes que podem ser atendidas por um recebimento, ordenadas
+    por pontuação (pedido/OP, obra e sub-item, similaridade da descrição).
+    """
+    REQUISITION_INDEX.ensure_loaded(db)
+    matches = REQUISITION_INDEX.rank(orderNumber, obra, sub_item, materialDescription, limit=limit)
+    return json_response(List[schemas.RequisitionMatch], matches)
+
+@router.post("/matches/batch", response_model=List[schemas.MatchProposal])
+def propose_requisition_matches(
+    receivings: List[schemas.MatchBatchItem] = Body(..., max_length=10000),
+    limit: int = Query(3, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    """
+    Modo em lote: propõe em uma passada a requisição de cada recebimento de uma
+    importação. Cada requisição é proposta a no máximo um recebimento.
+    """
+    REQUISITION_INDEX.ensure_loaded(db)
+    proposals = REQUISITION_INDEX.propose([
+        {"order_number": item.orderNumber, "obra": item.obra, "sub_item": item.sub_item,
+         "material_description": item.materialDescription}
+        for item in receivings
+    ], limit=limit)
+    for item, proposal in zip(receivings, proposals):
+        proposal["ref"] = item.ref
+    return json_response(List[schemas.MatchProposal], proposals)
 
 @router.put("/{requisition_id}/fulfill", response_model=schemas.Requisition)
 def fulfill_requisition(requisition_id: int, db: Session = Depends(get_db)):
@@ -26,8 +132,15 @@ def fulfill_requisition(requisition_id: int, db: Session = Depends(get_db)):
     Marca uma requisição como 'atendida' (fulfilled).
     Isso a removerá da lista de pendentes.
     """
-    # 1. Encontra a requisição no banco de dados
-    db_req = db.query(models.Requisition).filter(models.Requisition.id == requisition_id).first()
+    # 1. Encontra a requisição no banco de dados, bloqueando a linha (SELECT ... FOR
+    #    UPDATE) até o commit: duas chamadas simultâneas não passam as duas pela
+    #    verificação abaixo
+    db_req = (
+        db.query(models.Requisition)
+        .filter(models.Requisition.id == requisition_id)
+        .with_for_update()
+        .first()
+    )
 
     if not db_req:
         raise HTTPException(status_code=404, detail="Requisição não encontrada")
@@ -39,7 +152,9 @@ def fulfill_requisition(requisition_id: int, db: Session = Depends(get_db)):
     # 3. Atualiza o status
     db_req.isFulfilled = True
     
-    # 4. Salva as mudanças
+    # 4. Salva as mudanças (o evento é enviado após o commit)
+    publish(db, "requisition", "fulfilled", id=db_req.id)
+    audit.record(db, "requisition", db_req.id, "fulfilled")
     db.commit()
     db.refresh(db_req)
     
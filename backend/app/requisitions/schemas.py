@@ -1,6 +1,6 @@
 # backend/app/requisitions/schemas.py
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, List
 from datetime import datetime
 
 class RequisitionCreate(BaseModel):
@@ -16,4 +16,35 @@ class Requisition(RequisitionCreate):
     isFulfilled: bool
     receiving_id: Optional[int] = None
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+# Listagem paginada (por cursor) das requisições pendentes
+class PaginatedRequisitions(BaseModel):
+    items: List[Requisition]
+    # Só é calculado com include_total=true
+    total: Optional[int] = None
+    # Cursor opaco para a próxima página (None quando não há mais itens)
+    next_cursor: Optional[str] = None
+
+# Dados do recebimento usados para procurar requisições pendentes
+class MatchQuery(BaseModel):
+    orderNumber: Optional[str] = None
+    obra: Optional[int] = None
+    sub_item: Optional[int] = None
+    materialDescription: Optional[str] = None
+
+class MatchBatchItem(MatchQuery):
+    ref: Optional[str] = None # Identificador do recebimento no lote (ex.: nº da NF)
+
+# Requisição candidata, com a pontuação e os critérios que coincidiram
+class RequisitionMatch(BaseModel):
+    requisition: Requisition
+    score: float
+    similarity: float
+    matched_on: List[str]
+
+# Proposta do modo em lote: a requisição atribuída ao recebimento e as candidatas
+class MatchProposal(BaseModel):
+    ref: Optional[str] = None
+    match: Optional[RequisitionMatch] = None
+    candidates: List[RequisitionMatch]
\ No newline at end of file
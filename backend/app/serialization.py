@@ -0,0 +1,31 @@
+# backend/app/serialization.py
+#
+# Caminho rápido de serialização das listagens.
+#
+# Ao devolver objetos ORM (ou dicionários) de uma rota, o FastAPI valida a
+# resposta inteira contra o response_model, converte o resultado em dicts e
+# listas Python e só então gera o JSON. Nas listagens, json_response valida os
+# objetos uma única vez (from_attributes) e gera os bytes direto no pydantic-core.
+# Como a rota devolve um Response pronto, o FastAPI não repete a validação.
+#
+# O response_model continua declarado na rota, para a documentação (OpenAPI).
+
+import functools
+
+from pydantic import TypeAdapter
+from starlette.responses import Response
+
+
+@functools.lru_cache(maxsize=None)
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def dump_json(model, data) -> bytes:
+    """Valida 'data' (objetos ORM, dicts ou modelos) contra 'model' e gera o JSON."""
+    adapter = _adapter(model)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def json_response(model, data, status_code: int = 200) -> Response:
+    return Response(dump_json(model, data), status_code=status_code, media_type="application/json")
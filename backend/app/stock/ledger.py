@@ -0,0 +1,247 @@
+# backend/app/stock/ledger.py
+#
+# Razão de estoque: saldo por (material, estoque de destino) calculado a partir
+# do log append-only 'movimentos_estoque'.
+#
+#   - apply_movement() é chamado por create_stock_movement na mesma transação do
+#     movimento; soma a quantidade com um INSERT ... ON CONFLICT DO UPDATE atômico
+#     (quantity = quantity + N), sem ler o log;
+#   - snapshots das posições (snapshot anterior + movimentos seguintes do log)
+#     são gravados fora das requisições, pelo --snapshot abaixo (cron) e pela
+#     reconstrução (um a cada SNAPSHOT_INTERVAL movimentos). Um snapshot só
+#     cobre movimentos já confirmados: gravado dentro da transação de um
+#     movimento, deixaria de fora para sempre os ids menores ainda não
+#     confirmados por outras transações;
+#   - positions_at() devolve a posição em uma data passada partindo do snapshot
+#     anterior mais próximo e reaplicando apenas os movimentos seguintes.
+#
+# Para reconstruir posições e snapshots a partir do log:
+#     python -m app.stock.ledger
+# Para gravar um snapshot agora (ex.: em um cron diário):
+#     python -m app.stock.ledger --snapshot
+
+import os
+from datetime import datetime
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from . import models
+from ..ca import models as ca_models
+
+MovimentoEstoque = ca_models.MovimentoEstoque
+
+SNAPSHOT_INTERVAL = int(os.getenv("STOCK_SNAPSHOT_INTERVAL", "500"))
+NO_DESTINATION = "Sem destino"
+
+# Efeito de cada tipo de movimento no estoque de destino. Os tipos atuais são
+# devoluções da obra: todos entram no destino (a sucata também é um destino).
+MOVEMENT_SIGNS = {
+    "SAIDA_DA_OBRA": 1,
+    "ENTRADA_NO_ALMOXARIFADO": 1,
+    "DESCARTE": 1,
+}
+
+
+def _delta(movement_type: str, quantity: int) -> int:
+    return MOVEMENT_SIGNS.get(movement_type, 1) * quantity
+
+
+def _key(description: str, destination) -> tuple:
+    return description, destination or NO_DESTINATION
+
+
+# --- Atualização incremental ---
+
+def apply_movement(db: Session, movimento: MovimentoEstoque, material_code: str = None):
+    """Soma um movimento recém-criado à posição do material no destino."""
+    # O id e a execution_date só existem após o flush
+    db.flush()
+    description, destination = _key(movimento.item_description, movimento.destination_stock)
+    Position = models.StockPosition.__table__
+
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(models.StockPosition).values(
+        material_description=description, material_code=material_code, destination_stock=destination,
+        quantity=_delta(movimento.movement_type, movimento.quantity_moved), movement_count=1,
+        last_movement_id=movimento.id, last_movement_date=movimento.execution_date,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["material_description", "destination_stock"],
+        set_={
+            "quantity": Position.c.quantity + stmt.excluded.quantity,
+            "movement_count": Position.c.movement_count + 1,
+            "material_code": func.coalesce(stmt.excluded.material_code, Position.c.material_code),
+            "last_movement_id": stmt.excluded.last_movement_id,
+            "last_movement_date": stmt.excluded.last_movement_date,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+
+
+# --- Replay do log ---
+
+def _movement_rows(db: Session, *conditions):
+    """Movimentos em ordem de id, com o código do material do item do C.A. de origem."""
+    Item = ca_models.ItemAlteracao
+    codes = (
+        select(Item.ca_id, Item.material_description, func.max(Item.material_code).label("material_code"))
+        .group_by(Item.ca_id, Item.material_description)
+        .subquery()
+    )
+    return db.execute(
+        select(MovimentoEstoque.id, MovimentoEstoque.item_description, MovimentoEstoque.destination_stock,
+               MovimentoEstoque.movement_type, MovimentoEstoque.quantity_moved,
+               MovimentoEstoque.execution_date, codes.c.material_code)
+        .outerjoin(codes, (codes.c.ca_id == MovimentoEstoque.ca_id)
+                   & (codes.c.material_description == MovimentoEstoque.item_description))
+        .where(*conditions)
+        .order_by(MovimentoEstoque.id)
+        .execution_options(yield_per=5000)
+    )
+
+
+def _apply(balances: dict, row):
+    position = balances.setdefault(_key(row.item_description, row.destination_stock), [None, 0, 0, None, None])
+    position[0] = row.material_code or position[0]
+    position[1] += _delta(row.movement_type, row.quantity_moved)
+    position[2] += 1
+    position[3] = row.execution_date
+    position[4] = row.id
+
+
+def _from_snapshot(snapshot) -> dict:
+    """Saldos (chave -> [código, quantidade, movimentos, data e id do último]) de um snapshot."""
+    if snapshot is None:
+        return {}
+    return {
+        (description, destination): [code, quantity, count, datetime.fromisoformat(last) if last else None, last_id]
+        for description, code, destination, quantity, count, last, last_id in snapshot.positions
+    }
+
+
+def _to_snapshot_positions(balances: dict) -> list:
+    return [
+        [description, code, destination, quantity, count, last.isoformat() if last else None, last_id]
+        for (description, destination), (code, quantity, count, last, last_id) in sorted(balances.items())
+    ]
+
+
+def _latest_snapshot(db: Session, *conditions):
+    Snapshot = models.StockSnapshot
+    return (
+        db.query(Snapshot).filter(*conditions)
+        .order_by(Snapshot.last_movement_id.desc()).first()
+    )
+
+
+def last_committed_movement_id(db: Session) -> int:
+    """Maior id do log abaixo do qual não há mais movimentos em transações abertas."""
+    if db.get_bind().dialect.name == "postgresql":
+        # SHARE espera as transações que estão inserindo movimentos terminarem
+        # (e segura novas inserções só até o commit abaixo)
+        db.execute(text(f"LOCK TABLE {MovimentoEstoque.__tablename__} IN SHARE MODE"))
+    last_id = db.query(func.max(MovimentoEstoque.id)).scalar() or 0
+    db.commit()
+    return last_id
+
+
+def take_snapshot(db: Session, upto_movement_id: int = None) -> models.StockSnapshot:
+    """
+    Grava as posições após 'upto_movement_id' (padrão: o último movimento já
+    confirmado). Deve rodar fora da transação de qualquer movimento.
+    """
+    if upto_movement_id is None:
+        upto_movement_id = last_committed_movement_id(db)
+
+    base = _latest_snapshot(db, models.StockSnapshot.last_movement_id <= upto_movement_id)
+    balances = _from_snapshot(base)
+    taken_at = base.taken_at if base else None
+    for row in _movement_rows(db, MovimentoEstoque.id > (base.last_movement_id if base else 0),
+                              MovimentoEstoque.id <= upto_movement_id):
+        _apply(balances, row)
+        taken_at = row.execution_date
+
+    # taken_at = data do último movimento incluído: o snapshot vale para qualquer
+    # instante a partir dela
+    snapshot = models.StockSnapshot(
+        taken_at=taken_at or func.now(), last_movement_id=upto_movement_id,
+        positions=_to_snapshot_positions(balances),
+    )
+    db.add(snapshot)
+    db.flush()
+    return snapshot
+
+
+def positions_at(db: Session, at: datetime):
+    """
+    Posições no instante 'at': snapshot mais recente até 'at' + replay dos
+    movimentos seguintes com execution_date <= at.
+    Devolve (saldos, snapshot usado, movimentos reaplicados).
+    """
+    Snapshot = models.StockSnapshot
+    snapshot = _latest_snapshot(db, Snapshot.taken_at <= at)
+    balances = _from_snapshot(snapshot)
+    replayed = 0
+    for row in _movement_rows(db, MovimentoEstoque.id > (snapshot.last_movement_id if snapshot else 0),
+                              MovimentoEstoque.execution_date <= at):
+        _apply(balances, row)
+        replayed += 1
+    return balances, snapshot, replayed
+
+
+# --- Reconstrução completa ---
+
+def rebuild_all(db: Session) -> tuple:
+    """Reconstrói posições e snapshots em uma única leitura sequencial do log."""
+    balances = {}
+    snapshots = []
+    for count, row in enumerate(_movement_rows(db), start=1):
+        _apply(balances, row)
+        if count % SNAPSHOT_INTERVAL == 0:
+            snapshots.append(models.StockSnapshot(
+                taken_at=row.execution_date, last_movement_id=row.id,
+                positions=_to_snapshot_positions(balances),
+            ))
+
+    db.execute(delete(models.StockPosition))
+    db.execute(delete(models.StockSnapshot))
+    db.add_all(snapshots)
+    db.add_all(
+        models.StockPosition(
+            material_description=description, material_code=code, destination_stock=destination,
+            quantity=quantity, movement_count=movement_count, last_movement_id=last_id, last_movement_date=last,
+        )
+        for (description, destination), (code, quantity, movement_count, last, last_id) in balances.items()
+    )
+    db.commit()
+    return len(balances), len(snapshots)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from ..database import SessionLocal, engine
+    # Importa todos os models (inclusive Receiving <-> Requisition, para o mapper)
+    from ..migrations import check_schema_version
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--snapshot", action="store_true", help="apenas grava um snapshot das posições atuais")
+    args = parser.parse_args()
+
+    # As tabelas são criadas pelas migrações (python -m app.migrations)
+    check_schema_version(engine)
+    db = SessionLocal()
+    try:
+        if args.snapshot:
+            snapshot = take_snapshot(db)
+            db.commit()
+            print(f"Snapshot gravado até o movimento {snapshot.last_movement_id}")
+        else:
+            positions, snapshots = rebuild_all(db)
+            print(f"{positions} posições (material, destino) e {snapshots} snapshots reconstruídos")
+    finally:
+        db.close()
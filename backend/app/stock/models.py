@@ -0,0 +1,39 @@
+# backend/app/stock/models.py
+from sqlalchemy import Column, Integer, String, DateTime, JSON, UniqueConstraint, func
+from ..database import Base
+
+# --- Posição de estoque corrente ---
+# Uma linha por (material, estoque de destino) com o saldo acumulado dos
+# movimentos_estoque. É atualizada na mesma transação de cada movimento, então
+# "o que há no almoxarifado agora" é uma leitura desta tabela, sem varrer o log.
+class StockPosition(Base):
+    __tablename__ = "posicoes_estoque"
+    __table_args__ = (
+        UniqueConstraint("material_description", "destination_stock",
+                         name="uq_posicoes_estoque_material_destination"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    material_description = Column(String, nullable=False, index=True)
+    # Código do material, herdado do item do C.A. de origem (quando houver)
+    material_code = Column(String, nullable=True)
+    destination_stock = Column(String, nullable=False, index=True)
+    quantity = Column(Integer, nullable=False, default=0)
+    movement_count = Column(Integer, nullable=False, default=0)
+    last_movement_id = Column(Integer, nullable=True)
+    last_movement_date = Column(DateTime(timezone=True), nullable=True)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# --- Snapshot periódico das posições ---
+# Fotografia de todas as posições após o movimento 'last_movement_id'. A posição
+# em uma data passada parte do snapshot anterior mais próximo e reaplica apenas
+# os movimentos seguintes, em vez do log inteiro.
+class StockSnapshot(Base):
+    __tablename__ = "snapshots_estoque"
+
+    id = Column(Integer, primary_key=True)
+    taken_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    last_movement_id = Column(Integer, nullable=False, index=True)
+    # Lista de [material, código, destino, quantidade, nº de movimentos, data e id do último]
+    positions = Column(JSON, nullable=False, default=list)
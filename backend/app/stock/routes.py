@@ -0,0 +1,49 @@
+# backend/app/stock/routes.py
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import Optional
+from datetime import datetime
+from . import models, schemas
+from .ledger import positions_at
+from ..database import get_db
+from ..serialization import json_response
+
+
+router = APIRouter(prefix="/api/stock", tags=["Estoque"])
+
+
+@router.get("/positions", response_model=schemas.StockPositions)
+def get_stock_positions(
+    db: Session = Depends(get_db),
+    material: Optional[str] = None,
+    destination: Optional[str] = None,
+    at: Optional[datetime] = None
+):
+    """
+    Saldo por material e estoque de destino. Sem 'at', lê as posições correntes
+    (mantidas a cada movimento); com 'at', reconstrói a posição naquele instante
+    a partir do snapshot anterior mais próximo e do log de movimentos.
+    """
+    if at is None:
+        Position = models.StockPosition
+        query = db.query(Position)
+        if material:
+            query = query.filter(Position.material_description.ilike(f"%{material}%"))
+        if destination:
+            query = query.filter(Position.destination_stock == destination)
+        items = query.order_by(Position.destination_stock, Position.material_description).all()
+        return json_response(schemas.StockPositions, {"items": items})
+
+    balances, snapshot, replayed = positions_at(db, at)
+    items = [
+        {"material_description": description, "material_code": code, "destination_stock": stock_destination,
+         "quantity": quantity, "movement_count": count, "last_movement_date": last}
+        for (description, stock_destination), (code, quantity, count, last, _) in balances.items()
+        if (not material or material.lower() in description.lower())
+        and (not destination or stock_destination == destination)
+    ]
+    items.sort(key=lambda item: (item["destination_stock"], item["material_description"]))
+    return json_response(schemas.StockPositions, {
+        "at": at, "snapshot_taken_at": snapshot.taken_at if snapshot else None,
+        "replayed_movements": replayed, "items": items,
+    })
@@ -0,0 +1,24 @@
+# backend/app/stock/schemas.py
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+# Saldo de um material em um estoque de destino
+class StockPosition(BaseModel):
+    material_description: str
+    material_code: Optional[str] = None
+    destination_stock: str
+    quantity: int
+    movement_count: int
+    last_movement_date: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+# Posições em um instante (o atual, se 'at' não for informado)
+class StockPositions(BaseModel):
+    at: Optional[datetime] = None
+    # Snapshot usado como ponto de partida da reconstrução (consultas com 'at')
+    snapshot_taken_at: Optional[datetime] = None
+    replayed_movements: int = 0
+    items: List[StockPosition]
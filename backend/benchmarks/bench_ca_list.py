@@ -0,0 +1,110 @@
+# backend/benchmarks/bench_ca_list.py
+#
+# Benchmark da listagem de C.A.s (GET /api/ca/): número de queries e latência
+# com 500 e 5.000 C.A.s, comparando o carregamento preguiçoso antigo (N+1)
+# com o caminho atual com selectinload.
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.bench_ca_list
+#     DATABASE_URL=postgresql://... python -m benchmarks.bench_ca_list
+import os
+import tempfile
+import time
+
+# Sem DATABASE_URL explícita, usa um SQLite temporário para não tocar no banco real
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_ca.db')}"
+)
+
+from sqlalchemy import event, insert
+
+from app.database import Base, engine, SessionLocal
+from app.ca import models
+from app.ca.routes import get_all_comunicados_alteracao
+from app.ca import schemas
+from app import migrations  # registra todas as tabelas, inclusive schema_migrations
+
+SIZES = (500, 5000)
+REPEAT = 5
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def seed(total: int):
+    Base.metadata.drop_all(bind=engine)
+    migrations.upgrade(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(models.ComunicadoAlteracao), [
+            {"id": i, "status": models.StatusCA.PENDENTE_ANALISE, "requester_info": f"Solicitante {i}",
+             "obra": 1000 + i % 50, "op": 1 + i % 900, "sub_item": i % 10,
+             "reason": "Alteração de projeto solicitada pelo cliente."}
+            for i in range(1, total + 1)
+        ])
+        conn.execute(insert(models.ItemAlteracao), [
+            {"ca_id": i, "action_type": action, "material_description": f"Material {action} {i}",
+             "material_code": f"{action[0]}{i}", "quantity": 1 + i % 7}
+            for i in range(1, total + 1) for action in ("ADICIONAR", "RETIRAR")
+        ])
+        conn.execute(insert(models.MovimentoEstoque), [
+            {"ca_id": i, "item_description": f"Material RETIRAR {i}", "quantity_moved": 1,
+             "movement_type": "SAIDA_DA_OBRA", "executed_by": "Almoxarifado"}
+            for i in range(1, total + 1, 3)
+        ])
+
+
+def legacy_lazy_list(db, page_size):
+    """Reproduz a implementação anterior: acessa ca.items de forma preguiçosa por C.A."""
+    query = db.query(models.ComunicadoAlteracao).order_by(models.ComunicadoAlteracao.creation_date.desc())
+    total_items = query.count()
+    formatted_cas = []
+    for ca in query.limit(page_size).all():
+        ca_dict = {
+            "id": ca.id, "status": ca.status, "creation_date": ca.creation_date,
+            "completion_date": ca.completion_date, "obra": ca.obra, "op": ca.op,
+            "sub_item": ca.sub_item, "requester_info": ca.requester_info, "reason": ca.reason
+        }
+        item_add = next((item for item in ca.items if item.action_type == "ADICIONAR"), None)
+        item_rem = next((item for item in ca.items if item.action_type == "RETIRAR"), None)
+        if item_add:
+            ca_dict["item_adicionado"] = item_add
+        if item_rem:
+            ca_dict["item_removido"] = item_rem
+        formatted_cas.append(schemas.ComunicadoAlteracao.model_validate(ca_dict))
+    return {"items": formatted_cas, "total": total_items}
+
+
+def measure(label, fn, page_size):
+    counter = QueryCounter()
+    event.listen(engine, "before_cursor_execute", counter)
+    timings = []
+    try:
+        for _ in range(REPEAT):
+            db = SessionLocal()
+            start = time.perf_counter()
+            fn(db, page_size)
+            timings.append((time.perf_counter() - start) * 1000)
+            db.close()
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    timings.sort()
+    print(f"  {label:<12} queries/req={counter.count // REPEAT:>6}   "
+          f"mediana={timings[len(timings) // 2]:>9.1f} ms   máx={timings[-1]:>9.1f} ms")
+
+
+def main():
+    print(f"Banco: {engine.url.render_as_string(hide_password=True)}")
+    for size in SIZES:
+        seed(size)
+        print(f"\n{size} C.A.s (page_size={size})")
+        measure("lazy (N+1)", legacy_lazy_list, size)
+        measure("selectin", lambda db, n: get_all_comunicados_alteracao(db=db, page=1, page_size=n), size)
+
+
+if __name__ == "__main__":
+    main()
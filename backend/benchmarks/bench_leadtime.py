@@ -0,0 +1,189 @@
+# backend/benchmarks/bench_leadtime.py
+#
+# Benchmark dos tempos de ciclo e SLA (app/analytics/leadtime.py) sobre um
+# histórico de milhões de recebimentos:
+#   - gera o histórico (recebimentos conferidos, parte com tratativa, parte
+#     vinculada a requisições de obra, e C.A.s concluídos);
+#   - mede a leitura em colunas (banco -> arrays), o cálculo vetorizado de todas
+#     as métricas e recortes e a resposta do resultado em memória;
+#   - compara com o cálculo Python puro (sorted + laço por grupo) das mesmas durações.
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.bench_leadtime
+#     python -m benchmarks.bench_leadtime --receivings 5000000 --days 3650
+#     DATABASE_URL=postgresql://... python -m benchmarks.bench_leadtime --reset
+import argparse
+import bisect
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from benchmarks.datagen import SUPPLIERS
+
+BATCH = 50_000
+
+
+def generate(engine, receivings: int, seed: int):
+    from sqlalchemy import insert
+
+    from app.database import Base
+    from app.receiving.models import Receiving
+    from app.requisitions.models import Requisition
+    from app.ca.models import ComunicadoAlteracao
+    from app import migrations
+
+    Base.metadata.drop_all(bind=engine)
+    migrations.upgrade(engine)
+
+    rng = np.random.default_rng(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    # Entradas espalhadas pelos últimos 2 anos, mais recentes primeiro
+    entry_offsets = np.sort(rng.integers(0, 730 * 86400, size=receivings))
+    conference_hours = rng.gamma(2.0, 3.0, size=receivings)
+    resolved = rng.random(receivings) < 0.15
+    resolution_hours = rng.gamma(1.5, 40.0, size=receivings)
+    suppliers = rng.zipf(1.6, size=receivings) % len(SUPPLIERS)
+    linked = rng.random(receivings) < 0.3
+    obras = rng.integers(1000, 1200, size=receivings)
+
+    def stamp(seconds_ago: float) -> datetime:
+        return now - timedelta(seconds=float(seconds_ago))
+
+    for start in range(0, receivings, BATCH):
+        rows, requisitions = [], []
+        for index in range(start, min(start + BATCH, receivings)):
+            entry = stamp(entry_offsets[index])
+            conference = entry + timedelta(hours=float(conference_hours[index]))
+            rows.append({
+                "id": index + 1, "nfNumber": f"NF-{index + 1}", "supplier": SUPPLIERS[suppliers[index]],
+                "orderNumber": f"PC-{index + 1}", "entryDate": entry, "conferenceDate": conference,
+                "status": "Conferido" if resolved[index] else "Pendente",
+                "resolvedDate": conference + timedelta(hours=float(resolution_hours[index]))
+                if resolved[index] else None,
+            })
+            if linked[index]:
+                requisitions.append({
+                    "id": index + 1, "requestedBy": "bench", "orderNumber": f"OP-{index + 1}",
+                    "obra": int(obras[index]), "materialDescription": "material", "requestDate": entry,
+                    "isFulfilled": True, "receiving_id": index + 1,
+                })
+        with engine.begin() as conn:
+            conn.execute(insert(Receiving), rows)
+            if requisitions:
+                conn.execute(insert(Requisition), requisitions)
+
+    cas = max(1, receivings // 20)
+    created = rng.integers(0, 730 * 86400, size=cas)
+    cycle = rng.gamma(2.0, 80.0, size=cas)
+    for start in range(0, cas, BATCH):
+        with engine.begin() as conn:
+            conn.execute(insert(ComunicadoAlteracao), [
+                {"id": index + 1, "status": "CONCLUIDO", "requester_info": "bench", "obra": int(obras[index]),
+                 "op": index + 1, "reason": "bench", "creation_date": stamp(created[index]),
+                 "completion_date": stamp(created[index]) + timedelta(hours=float(cycle[index]))}
+                for index in range(start, min(start + BATCH, cas))
+            ])
+
+
+def python_reference(hours: list, groups: list, sla_hours: float) -> dict:
+    """Mesmo resultado sem NumPy: uma lista ordenada por grupo."""
+    from app.analytics import leadtime
+
+    by_group = defaultdict(list)
+    for value, group in zip(hours, groups):
+        if group >= 0:
+            by_group[group].append(value)
+    result = {}
+    for group, values in by_group.items():
+        values.sort()
+        n = len(values)
+        percentiles = []
+        for q in leadtime.PERCENTILES:
+            position = q / 100 * (n - 1)
+            lower = int(position)
+            upper = min(lower + 1, n - 1)
+            percentiles.append(values[lower] + (values[upper] - values[lower]) * (position - lower))
+        histogram = [0] * len(leadtime.HISTOGRAM_EDGES_HOURS)
+        for value in values:
+            histogram[bisect.bisect_right(leadtime.HISTOGRAM_EDGES_HOURS, value) - 1] += 1
+        within = bisect.bisect_right(values, sla_hours) / n
+        result[group] = (n, sum(values) / n, percentiles, within, histogram)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--receivings", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=3650, help="janela consultada (padrão: todo o histórico)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-generate", action="store_true", help="usa o histórico já gerado no banco")
+    parser.add_argument("--reset", action="store_true", help="apaga e recria as tabelas de DATABASE_URL")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" not in os.environ:
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.gettempdir(), 'bench_leadtime.db')}"
+    elif not (args.reset or args.skip_generate):
+        sys.exit("DATABASE_URL definido: use --reset para recriar as tabelas ou --skip-generate.")
+
+    from app.database import SessionLocal, get_engine
+    from app.analytics import leadtime
+
+    engine = get_engine()
+    if not args.skip_generate:
+        start = time.perf_counter()
+        generate(engine, args.receivings, args.seed)
+        print(f"Histórico gerado em {time.perf_counter() - start:.1f}s")
+
+    with SessionLocal() as db:
+        leadtime.clear()
+        start = time.perf_counter()
+        result = leadtime.report(db, args.days)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        leadtime.report(db, args.days)
+        cached_ms = (time.perf_counter() - start) * 1000
+
+        since = datetime.now(timezone.utc) - timedelta(days=args.days)
+        receivings = leadtime.fetch_receivings(db, since)
+
+    groups = sum(len(groups) for item in result["metrics"] for groups in item["groups"].values())
+    print(f"\n{result['rows']:,} linhas, {groups} grupos (fornecedor/obra) em 3 métricas")
+    print(f"  {'etapa':<40}{'ms':>10}")
+    print(f"  {'leitura em colunas (banco -> arrays)':<40}{result['fetch_ms']:>10.0f}")
+    print(f"  {'cálculo vetorizado (todas as métricas)':<40}{result['compute_ms']:>10.0f}")
+    print(f"  {'total da primeira consulta':<40}{total_ms:>10.0f}")
+    print(f"  {'consulta seguinte (em memória)':<40}{cached_ms:>10.3f}")
+    print(f"  {'linhas/s (leitura + cálculo)':<40}{result['rows'] / (total_ms / 1000):>10,.0f}")
+
+    # Referência: p50/p90/p99 por fornecedor da conferência, com e sem NumPy
+    hours = np.maximum(receivings["conference"] - receivings["entry"], 0) / 3600.0
+    codes, labels = receivings["supplier"]
+    sla_hours = leadtime.SLA_HOURS["conference"]
+    start = time.perf_counter()
+    present, counts, means, percentiles, within, histograms = leadtime.grouped_stats(
+        hours, codes, len(labels), sla_hours
+    )
+    numpy_ms = (time.perf_counter() - start) * 1000
+    hours_list, codes_list = hours.tolist(), codes.tolist()
+    start = time.perf_counter()
+    reference = python_reference(hours_list, codes_list, sla_hours)
+    python_ms = (time.perf_counter() - start) * 1000
+
+    for index, group in enumerate(present):
+        count, mean, expected, expected_within, histogram = reference[int(group)]
+        assert count == counts[index] and np.isclose(mean, means[index])
+        assert np.allclose(expected, percentiles[index]) and np.isclose(expected_within, within[index])
+        assert histogram == histograms[index].tolist()
+    print(f"\nConferência por fornecedor ({len(hours):,} durações; percentis, SLA e histograma iguais):")
+    print(f"  {'NumPy (grouped_stats)':<40}{numpy_ms:>10.0f}")
+    print(f"  {'Python puro (sorted por grupo)':<40}{python_ms:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
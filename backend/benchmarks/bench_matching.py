@@ -0,0 +1,145 @@
+# backend/benchmarks/bench_matching.py
+#
+# Benchmark do motor de vinculação requisição -> recebimento
+# (app/requisitions/matching.py) com 50 mil requisições pendentes em memória,
+# sem banco e sem HTTP:
+#   - carga do índice;
+#   - rank() de um recebimento: pedido + obra + descrição, só obra + descrição
+#     e só descrição (caminho das postings de trigramas);
+#   - varredura linear das 50 mil requisições (referência, sem índice);
+#   - propose() de uma importação de 1.000 recebimentos em uma passada;
+#   - atualização incremental (requisição criada + atendida).
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.bench_matching
+#     python -m benchmarks.bench_matching --requisitions 100000 --queries 5000
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_matching.db')}"
+)
+
+from app.requisitions.matching import RequisitionIndex, normalize_order, similarity, trigrams
+from benchmarks.datagen import MATERIALS, PEOPLE
+
+# Variações comuns na digitação da descrição pelo solicitante
+SUFFIXES = ("", " novo", " - urgente", " (reposição)", " lote 2", " p/ montagem")
+
+
+class Row:
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+def make_requisitions(rng: random.Random, total: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        Row(id=index, orderNumber=f"OP-{rng.randint(1, 5000)}", obra=rng.randint(1000, 1200),
+            sub_item=rng.randint(0, 9), materialDescription=rng.choice(MATERIALS) + rng.choice(SUFFIXES),
+            requestedBy=rng.choice(PEOPLE), requestDate=now - timedelta(minutes=index))
+        for index in range(1, total + 1)
+    ]
+
+
+def make_queries(rng: random.Random, requisitions: list, total: int) -> dict:
+    """Consultas derivadas de requisições existentes, com a descrição digitada de outra forma."""
+    sample = [rng.choice(requisitions) for _ in range(total)]
+
+    def typed(row):
+        return row.materialDescription.lower().replace(",", ".").split(" - ")[0]
+
+    return {
+        "pedido + obra + descrição": [
+            {"order_number": row.orderNumber.replace("-", " "), "obra": row.obra, "sub_item": row.sub_item,
+             "material_description": typed(row)} for row in sample],
+        "obra + descrição": [
+            {"obra": row.obra, "material_description": typed(row)} for row in sample],
+        "só descrição": [
+            {"material_description": typed(row)} for row in sample],
+    }
+
+
+def linear_scan(rows_with_grams, order_number=None, obra=None, sub_item=None, material_description=None, limit=5):
+    """Referência sem índice: pontua todas as requisições pendentes a cada consulta."""
+    order = normalize_order(order_number)
+    grams = trigrams(material_description) if material_description else frozenset()
+    scored = []
+    for row, row_order, row_grams in rows_with_grams:
+        score = 0.2 * similarity(grams, row_grams)
+        if order and row_order == order:
+            score += 0.5
+        if obra is not None and row.obra == obra:
+            score += 0.2 + (0.1 if sub_item is not None and row.sub_item == sub_item else 0)
+        scored.append((score, row.id))
+    scored.sort(reverse=True)
+    return scored[:limit]
+
+
+def timings(function, queries) -> list:
+    values = []
+    for query in queries:
+        start = time.perf_counter()
+        function(**query)
+        values.append((time.perf_counter() - start) * 1000)
+    return values
+
+
+def report(name: str, values: list):
+    ordered = sorted(values)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    print(f"  {name:<34}{statistics.median(values):>10.3f}{p95:>10.3f}{len(values) / (sum(values) / 1000):>12.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requisitions", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    requisitions = make_requisitions(rng, args.requisitions)
+    queries = make_queries(rng, requisitions, args.queries)
+
+    index = RequisitionIndex()
+    start = time.perf_counter()
+    index.load(requisitions)
+    print(f"Índice com {len(index)} requisições pendentes carregado em {time.perf_counter() - start:.2f}s\n")
+
+    print(f"  {'consulta':<34}{'p50 ms':>10}{'p95 ms':>10}{'consultas/s':>12}")
+    for name, kind_queries in queries.items():
+        report(f"rank: {name}", timings(index.rank, kind_queries))
+
+    rows_with_grams = [(row, normalize_order(row.orderNumber), trigrams(row.materialDescription))
+                       for row in requisitions]
+    scan_queries = queries["pedido + obra + descrição"][:50]
+    report("varredura linear (sem índice)",
+           timings(lambda **query: linear_scan(rows_with_grams, **query), scan_queries))
+
+    batch = queries["pedido + obra + descrição"][:args.batch]
+    start = time.perf_counter()
+    proposals = index.propose(batch)
+    elapsed = time.perf_counter() - start
+    matched = sum(1 for proposal in proposals if proposal["match"])
+    print(f"\npropose(): {len(batch)} recebimentos em {elapsed * 1000:.0f} ms "
+          f"({matched} com proposta, sem requisição repetida)")
+
+    start = time.perf_counter()
+    next_id = args.requisitions + 1
+    for offset in range(args.queries):
+        row = requisitions[offset]
+        index.add(Row(**{**row.__dict__, "id": next_id + offset}))
+        index.remove(next_id + offset)
+    elapsed = time.perf_counter() - start
+    print(f"Atualização incremental: {args.queries / elapsed:.0f} pares criada+atendida/s")
+
+
+if __name__ == "__main__":
+    main()
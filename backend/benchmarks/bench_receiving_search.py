@@ -0,0 +1,112 @@
+# backend/benchmarks/bench_receiving_search.py
+#
+# Benchmark da busca da listagem de recebimentos (parâmetro 'search') sobre
+# uma tabela sintética de recebimentos (1.000.000 de linhas por padrão).
+#
+# No PostgreSQL mostra também o plano da query, para confirmar que os índices
+# trigram (Bitmap Index Scan em ix_recebimentos_*_trgm) estão sendo usados.
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.bench_receiving_search --rows 1000000
+#     DATABASE_URL=postgresql://... python -m benchmarks.bench_receiving_search
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_search.db')}"
+)
+
+from sqlalchemy import insert, text
+
+from app.database import Base, engine, SessionLocal
+from app.receiving import models, search as receiving_search
+from app.receiving.routes import get_all_recebimentos
+from app import migrations  # registra todas as tabelas, inclusive schema_migrations
+
+SUPPLIERS = [
+    "Aço Forte Ltda", "Parafusos Brasil", "Elétrica Central", "Tintas Paulista",
+    "Hidráulica Sul", "Madeireira Norte", "Cabos & Cia", "Ferragens União",
+]
+TERMS = ["123456", "Paulista", "PED-0042", "xyz-inexistente"]
+CHUNK = 10_000
+REPEAT = 5
+
+
+def seed(rows: int):
+    Base.metadata.drop_all(bind=engine)
+    migrations.upgrade(engine)
+    rng = random.Random(42)
+    start = datetime(2020, 1, 1)
+    for offset in range(0, rows, CHUNK):
+        batch = [
+            {
+                "nfNumber": f"{i:09d}",
+                "supplier": rng.choice(SUPPLIERS),
+                # Único por linha (índice único em orderNumber)
+                "orderNumber": f"PED-{rng.randint(1, 99999):05d}-{i}",
+                "nfValue": round(rng.uniform(50, 50_000), 2),
+                "status": "Conferido",
+                "entryDate": start + timedelta(minutes=i),
+            }
+            for i in range(offset, min(offset + CHUNK, rows))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(models.Receiving), batch)
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM ANALYZE recebimentos"))
+
+
+def show_plan(term: str):
+    if engine.dialect.name != "postgresql":
+        return
+    db = SessionLocal()
+    query = receiving_search.apply_search(db.query(models.Receiving.id), term)
+    compiled = query.statement.compile(engine, compile_kwargs={"literal_binds": True})
+    plan = db.execute(text(f"EXPLAIN {compiled}")).scalars().all()
+    db.close()
+    print("    plano: " + "\n           ".join(plan[:4]))
+
+
+def measure(term: str, sort: str):
+    timings = []
+    for _ in range(REPEAT):
+        db = SessionLocal()
+        start = time.perf_counter()
+        # Sem o cache de respostas (@cached), que exigiria a Request
+        response = get_all_recebimentos.__wrapped__(
+            db=db, search=term, sort=sort, status=None, start_date=None, end_date=None,
+            is_client_material=None, page=1, page_size=10, pagination="offset",
+            cursor=None, include_total=True,
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+        db.close()
+    result = json.loads(response.body)
+    timings.sort()
+    print(f"  '{term}' sort={sort:<9} total={result['total']:>8}   "
+          f"mediana={timings[len(timings) // 2]:>9.1f} ms   máx={timings[-1]:>9.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Banco: {engine.url.render_as_string(hide_password=True)}")
+    start = time.perf_counter()
+    seed(args.rows)
+    print(f"{args.rows} recebimentos gerados em {time.perf_counter() - start:.1f} s\n")
+
+    for term in TERMS:
+        measure(term, "recent")
+        measure(term, "relevance")
+        show_plan(term)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# backend/benchmarks/bench_serialization.py
+#
+# Micro-benchmark da serialização das listagens (PaginatedRecebimentos e
+# PaginatedCA) com 10, 100 e 1.000 itens, sem banco e sem HTTP:
+#   - fastapi+json:   caminho antigo (validação da resposta pelo FastAPI + JSONResponse);
+#                     no C.A. inclui o model_validate por linha feito na rota
+#   - fastapi+orjson: mesmo caminho com ORJSONResponse (default_response_class atual)
+#   - fast path:      app/serialization.json_response (uma validação, bytes direto)
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.bench_serialization
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault(
+    "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_serialization.db')}"
+)
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.ca import models as ca_models, schemas as ca_schemas
+from app.ca.routes import build_ca_response
+from app.receiving import models as receiving_models, schemas as receiving_schemas
+from app.requisitions import models as requisition_models  # noqa: F401 (mapper de Receiving)
+from app.serialization import json_response
+
+SIZES = (10, 100, 1000)
+# Repetições por tamanho: o total de itens serializados fica próximo de 100 mil
+ITEMS_PER_CASE = 100_000
+
+
+def make_recebimentos(total: int) -> list:
+    base = datetime(2025, 1, 1)
+    return [
+        receiving_models.Receiving(
+            id=i, nfNumber=f"NF{i}", supplier=f"Fornecedor {i % 30}", orderNumber=f"PED{i}",
+            nfValue=100.0 + i, nfVolume=1 + i % 9, status="Conferido", entryDate=base + timedelta(minutes=i),
+            receivedBy="Portaria", conferenceDate=base + timedelta(minutes=i + 30), conferredBy="Almoxarifado",
+            details={"expectedDate": "2025-01-01T00:00:00", "deliveryDate": "2025-01-01T00:00:00",
+                     "punctual": True, "issueType": "sem pendência", "isClientMaterial": i % 2 == 0,
+                     "refusedMaterial": False},
+        )
+        for i in range(1, total + 1)
+    ]
+
+
+def make_cas(total: int) -> list:
+    cas = []
+    for i in range(1, total + 1):
+        ca = ca_models.ComunicadoAlteracao(
+            id=i, status=ca_models.StatusCA.PENDENTE_ANALISE, creation_date=datetime(2025, 1, 1),
+            obra=1000 + i % 50, op=1 + i % 900, sub_item=i % 10, requester_info=f"Solicitante {i}",
+            reason="Alteração de projeto solicitada pelo cliente.",
+        )
+        ca.items = [
+            ca_models.ItemAlteracao(id=2 * i + n, action_type=action, material_description=f"Material {action} {i}",
+                                    material_code=f"{action[0]}{i}", quantity=1 + i % 7,
+                                    stock_status="Pendente de Verificação")
+            for n, action in enumerate(("ADICIONAR", "RETIRAR"))
+        ]
+        ca.movimentos = []
+        cas.append(ca)
+    return cas
+
+
+def fastapi_path(model, response_class, loop):
+    field = create_model_field("response", model, mode="serialization")
+
+    def run(content):
+        # is_coroutine=False: como nas rotas síncronas, a validação roda no threadpool
+        value = loop.run_until_complete(
+            serialize_response(field=field, response_content=content, is_coroutine=False)
+        )
+        return response_class(value).body
+
+    return run
+
+
+def timed(function, repeat: int) -> float:
+    function()  # aquecimento
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def cases(size: int):
+    """(nome, schema, conteúdo do caminho antigo, conteúdo do caminho rápido)"""
+    rows = make_recebimentos(size)
+    page = {"items": rows, "total": size}
+    yield "PaginatedRecebimentos", receiving_schemas.PaginatedRecebimentos, lambda: page, lambda: page
+
+    cas = make_cas(size)
+    # Caminho antigo da rota: model_validate por C.A. e depois a validação do FastAPI
+    yield (
+        "PaginatedCA", ca_schemas.PaginatedCA,
+        lambda: {"items": [ca_schemas.ComunicadoAlteracao.model_validate(build_ca_response(ca)) for ca in cas],
+                 "total": size},
+        lambda: {"items": [build_ca_response(ca) for ca in cas], "total": size},
+    )
+
+
+def main():
+    print(f"{'schema':<24}{'itens':>7}{'fastapi+json':>15}{'fastapi+orjson':>16}{'fast path':>12}{'ganho':>8}")
+    loop = asyncio.new_event_loop()
+    for size in SIZES:
+        repeat = max(ITEMS_PER_CASE // size, 20)
+        for name, model, old_content, fast_content in cases(size):
+            with_json = fastapi_path(model, JSONResponse, loop)
+            with_orjson = fastapi_path(model, ORJSONResponse, loop)
+            results = (
+                timed(lambda: with_json(old_content()), repeat),
+                timed(lambda: with_orjson(old_content()), repeat),
+                timed(lambda: json_response(model, fast_content()), repeat),
+            )
+            print(f"{name:<24}{size:>7}{results[0]:>13.3f}ms{results[1]:>14.3f}ms"
+                  f"{results[2]:>10.3f}ms{results[0] / results[2]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
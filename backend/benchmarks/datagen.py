@@ -0,0 +1,235 @@
+# backend/benchmarks/datagen.py
+#
+# Gerador de dados sintéticos para os benchmarks: preenche recebimentos,
+# requisitions, comunicados_alteracao, itens_alteracao e movimentos_estoque
+# (e reconstrói os rollups, a vazão por turno e as posições de estoque) com volumes configuráveis
+# e distribuições próximas das reais:
+#   - fornecedores com frequência desigual (poucos fornecedores concentram a maioria das NFs);
+#   - entradas em dias úteis, no horário de expediente, ao longo de DAYS dias;
+#   - a maior parte dos recebimentos conferida e pontual; uma parcela com pendências,
+#     rejeições e material do cliente;
+#   - requisições atendidas vinculadas a recebimentos, as demais pendentes;
+#   - C.A.s distribuídos pelos status do Kanban, com 1 ou 2 itens e movimentos de retirada.
+#
+# Os dados são determinísticos para a mesma semente (--seed).
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.datagen --receivings 100000 --requisitions 20000 --cas 5000
+#     DATABASE_URL=postgresql://... python -m benchmarks.datagen ...
+import argparse
+import os
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+DAYS = 365
+AWAITING_DAYS = 3
+BATCH_SIZE = 5000
+
+SUPPLIERS = [f"Fornecedor {name}" for name in (
+    "Aços Paulista", "Elétrica Central", "Parafusos Brasil", "Tintas Sul", "Hidráulica Norte",
+    "Cabos & Fios", "Metalúrgica Vale", "Rolamentos SP", "Perfis Alumínio", "Ferragens Rio",
+    "Isolantes Minas", "Vedações Sul", "Automação Ind.", "Painéis Leste", "Madeiras Oeste",
+)]
+PEOPLE = ("Ana", "Bruno", "Carla", "Diego", "Elaine", "Fábio", "Gisele", "Hugo")
+MATERIALS = (
+    "Chapa de aço 3mm", "Cabo PP 4x2,5mm", "Parafuso sextavado M10", "Disjuntor 32A",
+    "Tubo galvanizado 1\"", "Perfil U 100mm", "Tinta epóxi cinza", "Rolamento 6205",
+    "Contator 25A", "Eletroduto 3/4\"", "Manta isolante", "Anel de vedação 50mm",
+)
+ISSUE_TYPES = ("avaria", "item errado", "quantidade incorreta", "outro")
+# Nomes de StatusCA (a coluna guarda o nome do enum) e a proporção de cada um
+CA_STATUSES = (
+    ("PENDENTE_ANALISE", 0.35), ("AGUARDANDO_COMPRA", 0.2),
+    ("PRONTO_PARA_EXECUCAO", 0.15), ("CONCLUIDO", 0.25), ("CANCELADO", 0.05),
+)
+# Colunas opcionais: todas as linhas do INSERT em lote precisam das mesmas chaves
+RECEIVING_OPTIONAL = (
+    "conferenceDate", "conferredBy", "details", "isClientMaterial", "punctual", "issueType",
+    "refusedMaterial", "resolutionNotes", "resolvedBy", "resolvedDate",
+)
+
+
+def _batched(rows, size=BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _entry_dates(rng: random.Random, total: int, now: datetime):
+    """Datas em dias úteis, entre 7h e 17h, mais densas nos meses recentes."""
+    dates = []
+    while len(dates) < total:
+        days_ago = int(rng.triangular(0, DAYS, 0))
+        day = now - timedelta(days=days_ago)
+        if day.weekday() >= 5:
+            continue
+        dates.append(day.replace(hour=rng.randint(7, 16), minute=rng.randint(0, 59),
+                                 second=rng.randint(0, 59), microsecond=0))
+    return sorted(dates)
+
+
+def receiving_rows(rng: random.Random, total: int, now: datetime) -> list:
+    supplier_weights = [1 / (rank + 1) for rank in range(len(SUPPLIERS))]
+    rows = []
+    for index, entry_date in enumerate(_entry_dates(rng, total, now), start=1):
+        row = {
+            "id": index, "nfNumber": f"{100000 + index}", "supplier": rng.choices(SUPPLIERS, supplier_weights)[0],
+            "orderNumber": f"PC-{200000 + index}", "nfValue": round(rng.lognormvariate(7, 1.2), 2),
+            "nfVolume": rng.randint(1, 40), "entryDate": entry_date, "receivedBy": rng.choice(PEOPLE),
+            "status": "Aguardando Conferência", **dict.fromkeys(RECEIVING_OPTIONAL),
+        }
+        # Parte dos recebimentos dos últimos dias ainda aguarda conferência
+        if entry_date < now - timedelta(days=AWAITING_DAYS) or rng.random() < 0.3:
+            outcome = rng.random()
+            punctual = rng.random() < 0.85
+            issue = "sem pendência" if outcome < 0.8 else rng.choice(ISSUE_TYPES)
+            refused = 0.8 <= outcome < 0.83
+            details = {
+                "expectedDate": (entry_date - timedelta(days=0 if punctual else rng.randint(1, 10))).isoformat(),
+                "deliveryDate": entry_date.isoformat(),
+                "punctual": punctual, "issueType": issue,
+                "issueDescription": None if issue == "sem pendência" else "Divergência registrada na conferência",
+                "isClientMaterial": rng.random() < 0.2, "refusedMaterial": refused,
+            }
+            row.update({
+                "conferenceDate": entry_date + timedelta(minutes=rng.randint(10, 600)),
+                "conferredBy": rng.choice(PEOPLE), "details": details,
+                "isClientMaterial": details["isClientMaterial"], "punctual": punctual,
+                "issueType": issue, "refusedMaterial": refused,
+                "status": "Rejeitado" if refused else ("Pendente" if issue != "sem pendência" else "Conferido"),
+            })
+            if row["status"] == "Pendente" and rng.random() < 0.7:
+                row.update({"status": "Conferido", "resolvedBy": rng.choice(PEOPLE),
+                            "resolutionNotes": "Tratativa com o fornecedor concluída",
+                            "resolvedDate": row["conferenceDate"] + timedelta(days=rng.randint(1, 15))})
+        elif rng.random() < 0.03:
+            row.update({"status": "Entrada Rejeitada", "resolvedBy": rng.choice(PEOPLE),
+                        "resolutionNotes": "Rejeitado na portaria", "resolvedDate": entry_date})
+        rows.append(row)
+    return rows
+
+
+def requisition_rows(rng: random.Random, total: int, receivings: list, now: datetime) -> list:
+    linkable = rng.sample(receivings, min(len(receivings), int(total * 0.7)))
+    rows = []
+    for index in range(1, total + 1):
+        receiving = linkable[index - 1] if index <= len(linkable) else None
+        request_date = (receiving["entryDate"] - timedelta(days=rng.randint(2, 30))) if receiving \
+            else now - timedelta(days=rng.randint(0, 60))
+        rows.append({
+            "id": index, "requestedBy": rng.choice(PEOPLE), "orderNumber": f"OP-{rng.randint(1, 900)}",
+            "obra": rng.randint(1000, 1050), "sub_item": rng.randint(0, 9),
+            "materialDescription": rng.choice(MATERIALS), "requestDate": request_date,
+            "isFulfilled": receiving is not None, "receiving_id": receiving["id"] if receiving else None,
+        })
+    return rows
+
+
+def ca_rows(rng: random.Random, total: int, now: datetime):
+    statuses, weights = zip(*CA_STATUSES)
+    cas, items, movements = [], [], []
+    for index in range(1, total + 1):
+        status = rng.choices(statuses, weights)[0]
+        created = now - timedelta(days=int(rng.triangular(0, DAYS, 0)), minutes=rng.randint(0, 600))
+        cas.append({
+            "id": index, "status": status, "requester_info": f"Engenharia - {rng.choice(PEOPLE)}",
+            "obra": rng.randint(1000, 1050), "op": rng.randint(1, 900), "sub_item": rng.randint(0, 9),
+            "reason": "Alteração de projeto solicitada pelo cliente.", "creation_date": created,
+            "completion_date": created + timedelta(days=rng.randint(1, 30)) if status == "CONCLUIDO" else None,
+        })
+        actions = rng.choice((("ADICIONAR",), ("RETIRAR",), ("ADICIONAR", "RETIRAR")))
+        for action in actions:
+            material = rng.choice(MATERIALS)
+            checked = status != "PENDENTE_ANALISE" or rng.random() < 0.3
+            items.append({
+                "ca_id": index, "action_type": action, "material_description": material,
+                "material_code": f"MAT-{rng.randint(1000, 9999)}", "quantity": rng.randint(1, 50),
+                "stock_status": ("Verificado - Compra Necessária" if status == "AGUARDANDO_COMPRA"
+                                 else "Verificado - Em Estoque") if checked else "Pendente de Verificação",
+            })
+            if action == "RETIRAR" and status in ("PRONTO_PARA_EXECUCAO", "CONCLUIDO"):
+                movements.append({
+                    "ca_id": index, "item_description": material, "quantity_moved": rng.randint(1, 50),
+                    "movement_type": "SAIDA_DA_OBRA", "destination_stock": "Almoxarifado Central",
+                    "executed_by": rng.choice(PEOPLE), "execution_date": created + timedelta(days=1),
+                })
+    return cas, items, movements
+
+
+def generate(engine, receivings: int, requisitions: int, cas: int, seed: int = 42) -> dict:
+    from sqlalchemy import insert
+
+    from app.database import Base, SessionLocal
+    from app.receiving.models import Receiving
+    from app.requisitions.models import Requisition
+    from app.ca.models import ComunicadoAlteracao, ItemAlteracao, MovimentoEstoque
+    from app.analytics import rollups, throughput
+    from app.stock import ledger
+    from app import migrations
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    Base.metadata.drop_all(bind=engine)
+    migrations.upgrade(engine)
+
+    receiving_data = receiving_rows(rng, receivings, now)
+    requisition_data = requisition_rows(rng, requisitions, receiving_data, now)
+    ca_data, item_data, movement_data = ca_rows(rng, cas, now)
+
+    for model, rows in (
+        (Receiving, receiving_data), (Requisition, requisition_data), (ComunicadoAlteracao, ca_data),
+        (ItemAlteracao, item_data), (MovimentoEstoque, movement_data),
+    ):
+        for batch in _batched(rows):
+            with engine.begin() as conn:
+                conn.execute(insert(model), batch)
+
+    # Sequências do PostgreSQL: os ids foram informados explicitamente
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            for model in (Receiving, Requisition, ComunicadoAlteracao):
+                table = model.__table__.name
+                conn.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+                )
+
+    with SessionLocal() as db:
+        rollups.rebuild_all(db)
+        throughput.rebuild_all(db)
+        ledger.rebuild_all(db)
+
+    return {
+        "recebimentos": len(receiving_data), "requisitions": len(requisition_data),
+        "comunicados_alteracao": len(ca_data), "itens_alteracao": len(item_data),
+        "movimentos_estoque": len(movement_data),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--receivings", type=int, default=20000)
+    parser.add_argument("--requisitions", type=int, default=5000)
+    parser.add_argument("--cas", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true",
+                        help="confirma que as tabelas do DATABASE_URL informado podem ser apagadas e recriadas")
+    args = parser.parse_args()
+
+    # As tabelas são recriadas: fora do SQLite temporário, exige confirmação explícita
+    if "DATABASE_URL" in os.environ and not args.reset:
+        parser.error("DATABASE_URL definido: use --reset para apagar e recriar as tabelas desse banco.")
+    os.environ.setdefault(
+        "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_data.db')}"
+    )
+    from app.database import engine, DATABASE_URL
+    from app import main as _app  # noqa: F401 (registra todos os modelos)
+
+    counts = generate(engine, args.receivings, args.requisitions, args.cas, args.seed)
+    print(f"Banco: {DATABASE_URL}")
+    for table, count in counts.items():
+        print(f"  {table:<24}{count:>10}")
+
+
+if __name__ == "__main__":
+    main()
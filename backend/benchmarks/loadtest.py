@@ -0,0 +1,147 @@
+# backend/benchmarks/loadtest.py
+#
+# Teste de carga comparando o modo síncrono (padrão) com o modo assíncrono
+# (DATABASE_ASYNC=true). Para cada modo sobe um uvicorn em um subprocesso e
+# dispara N clientes concorrentes contra as rotas de leitura mais acessadas,
+# reportando requisições/s, p50 e p99.
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.loadtest
+#     python -m benchmarks.loadtest --concurrency 50 200 1000 --duration 15
+#     DATABASE_URL=postgresql://... python -m benchmarks.loadtest
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+PATHS = (
+    "/api/recebimentos/?page=1&page_size=10",
+    "/api/ca/?page=1&page_size=10",
+    "/api/requisitions/pending",
+)
+
+
+def seed(database_url: str, rows: int):
+    """Popula o banco com recebimentos, C.A.s e requisições para o teste."""
+    env = dict(os.environ, DATABASE_URL=database_url)
+    script = f"""
+from datetime import datetime, timedelta
+from sqlalchemy import insert
+from app.database import Base, engine
+from app.receiving import models as r
+from app.ca import models as ca
+from app.requisitions import models as rq
+from app.analytics import models as an
+from app import migrations
+Base.metadata.drop_all(bind=engine)
+migrations.upgrade(engine)
+start = datetime(2024, 1, 1)
+with engine.begin() as conn:
+    conn.execute(insert(r.Receiving), [
+        {{"nfNumber": f"NF{{i}}", "supplier": f"Fornecedor {{i % 40}}", "orderNumber": f"PED{{i}}",
+          "nfValue": 100.0 + i, "status": "Conferido", "entryDate": start + timedelta(minutes=i)}}
+        for i in range({rows})
+    ])
+    conn.execute(insert(ca.ComunicadoAlteracao), [
+        {{"id": i, "status": ca.StatusCA.PENDENTE_ANALISE, "requester_info": "Engenharia",
+          "obra": 100 + i % 20, "op": 1 + i, "reason": "Alteração de projeto."}}
+        for i in range(1, {rows} // 10 + 1)
+    ])
+    conn.execute(insert(ca.ItemAlteracao), [
+        {{"ca_id": i, "action_type": "ADICIONAR", "material_description": f"Material {{i}}", "quantity": 1}}
+        for i in range(1, {rows} // 10 + 1)
+    ])
+    conn.execute(insert(rq.Requisition), [
+        {{"requestedBy": "Produção", "orderNumber": f"OP{{i}}", "obra": 100 + i % 20,
+          "materialDescription": f"Material {{i}}", "isFulfilled": i % 3 == 0}}
+        for i in range(300)
+    ])
+"""
+    subprocess.run([sys.executable, "-c", script], env=env, check=True)
+
+
+def start_server(database_url: str, async_mode: bool, port: int, log_file) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url, DATABASE_ASYNC="true" if async_mode else "false")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env, stdout=log_file, stderr=subprocess.STDOUT,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn não respondeu a tempo")
+
+
+async def run_load(port: int, concurrency: int, duration: float):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        async def worker(index: int):
+            nonlocal errors
+            request = 0
+            while time.perf_counter() < deadline:
+                path = PATHS[(index + request) % len(PATHS)]
+                request += 1
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                    response.raise_for_status()
+                    latencies.append(time.perf_counter() - start)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else 0.0
+    return len(latencies) / elapsed, percentile(0.50), percentile(0.99), errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    database_url = os.getenv(
+        "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'loadtest.db')}"
+    )
+    seed(database_url, args.rows)
+    log_path = os.path.join(tempfile.gettempdir(), "loadtest_uvicorn.log")
+
+    print(f"{'modo':<6} {'clientes':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'erros':>6}")
+    for async_mode in (False, True):
+        with open(log_path, "a") as log_file:
+            server = start_server(database_url, async_mode, args.port, log_file)
+        try:
+            for concurrency in args.concurrency:
+                rps, p50, p99, errors = asyncio.run(run_load(args.port, concurrency, args.duration))
+                print(f"{'async' if async_mode else 'sync':<6} {concurrency:>8} {rps:>9.1f} "
+                      f"{p50:>9.1f} {p99:>9.1f} {errors:>6}")
+        finally:
+            server.terminate()
+            server.wait()
+    print(f"\nLogs do servidor (erros, timeouts do pool): {log_path}")
+
+
+if __name__ == "__main__":
+    main()
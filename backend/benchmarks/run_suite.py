@@ -0,0 +1,378 @@
+# backend/benchmarks/run_suite.py
+#
+# Suíte de benchmark da API: exercita todas as rotas de receiving/routes.py,
+# ca/routes.py, requisitions/routes.py e stock/routes.py dentro do processo (httpx + ASGI, sem
+# rede), sobre dados gerados por benchmarks/datagen.py.
+#
+# Para cada cenário informa vazão (req/s), latência p50/p95/p99 e queries por
+# requisição (lidas do cabeçalho Server-Timing da instrumentação). O resultado
+# pode ser salvo como baseline em JSON e comparado com uma execução anterior:
+# cenários com p95 ou vazão piores que o limite (--threshold) são marcados como
+# regressão e o processo termina com código 1.
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.run_suite --save benchmarks/baselines/sqlite.json
+#     python -m benchmarks.run_suite --compare benchmarks/baselines/sqlite.json
+#     DATABASE_URL=postgresql://... python -m benchmarks.run_suite --reset ...
+#     python -m benchmarks.run_suite --only "ca:" --requests 500 --concurrency 20
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Recebe as fixtures e devolve (caminho, argumentos do httpx) ou None quando acabaram os alvos
+    build: Callable
+    # Rotas de escrita consomem um alvo por requisição (ex.: um recebimento aguardando conferência)
+    expected_status: tuple = (200, 201)
+
+
+@dataclass
+class Fixtures:
+    awaiting_ids: list = field(default_factory=list)
+    pending_ids: list = field(default_factory=list)
+    pending_requisition_ids: list = field(default_factory=list)
+    ca_ids: list = field(default_factory=list)
+    item_ids: list = field(default_factory=list)
+    sequence: int = 0
+
+    def next_number(self) -> int:
+        self.sequence += 1
+        return self.sequence
+
+
+def load_fixtures() -> Fixtures:
+    from sqlalchemy import select
+
+    from app.database import SessionLocal
+    from app.receiving.models import Receiving
+    from app.requisitions.models import Requisition
+    from app.ca.models import ComunicadoAlteracao, ItemAlteracao
+
+    with SessionLocal() as db:
+        def ids(statement):
+            return list(db.execute(statement).scalars())
+
+        return Fixtures(
+            awaiting_ids=ids(select(Receiving.id).where(Receiving.status == "Aguardando Conferência")),
+            pending_ids=ids(select(Receiving.id).where(Receiving.status == "Pendente")),
+            pending_requisition_ids=ids(select(Requisition.id).where(Requisition.isFulfilled.is_(False))),
+            ca_ids=ids(select(ComunicadoAlteracao.id).order_by(ComunicadoAlteracao.id.desc()).limit(500)),
+            item_ids=ids(select(ItemAlteracao.id).order_by(ItemAlteracao.id.desc()).limit(5000)),
+        )
+
+
+def _pop(pool: list):
+    return pool.pop() if pool else None
+
+
+def _conference(fx: Fixtures):
+    receiving_id = _pop(fx.awaiting_ids)
+    if receiving_id is None:
+        return None
+    now = datetime.now(timezone.utc).isoformat()
+    return f"/api/recebimentos/{receiving_id}", {"json": {
+        "conferredBy": "Benchmark",
+        "details": {"expectedDate": now, "deliveryDate": now, "punctual": True, "issueType": "sem pendência",
+                    "isClientMaterial": False, "refusedMaterial": False},
+    }}
+
+
+def _resolve(fx: Fixtures):
+    receiving_id = _pop(fx.pending_ids)
+    if receiving_id is None:
+        return None
+    return f"/api/recebimentos/{receiving_id}/resolve", {"json": {
+        "resolvedBy": "Benchmark", "resolutionNotes": "Resolvido no benchmark", "finalStatus": "Conferido",
+    }}
+
+
+def _reject(fx: Fixtures):
+    receiving_id = _pop(fx.awaiting_ids)
+    if receiving_id is None:
+        return None
+    return f"/api/recebimentos/{receiving_id}/reject", {"json": {
+        "rejectedBy": "Benchmark", "rejectionReason": "Rejeitado no benchmark",
+    }}
+
+
+def _import_csv(fx: Fixtures):
+    lines = ["nfNumber,supplier,orderNumber,nfValue,nfVolume"]
+    for _ in range(50):
+        number = fx.next_number()
+        lines.append(f"BI-{number},Fornecedor Benchmark,BI-PC-{number},100.0,1")
+    return "/api/recebimentos/import", {
+        "params": {"format": "csv"}, "files": {"file": ("bench.csv", "\n".join(lines).encode())},
+    }
+
+
+def _fulfill(fx: Fixtures):
+    requisition_id = _pop(fx.pending_requisition_ids)
+    if requisition_id is None:
+        return None
+    return f"/api/requisitions/{requisition_id}/fulfill", {}
+
+
+def _stock_status(fx: Fixtures):
+    item_id = _pop(fx.item_ids)
+    if item_id is None:
+        return None
+    return f"/api/ca/items/{item_id}/stock-status", {"json": {"stock_status": "Verificado - Em Estoque"}}
+
+
+def _stock_status_batch(fx: Fixtures):
+    item_ids = [item_id for item_id in (_pop(fx.item_ids) for _ in range(20)) if item_id is not None]
+    if not item_ids:
+        return None
+    return "/api/ca/items/stock-status", {"json": {"item_ids": item_ids, "stock_status": "Verificado - Em Estoque"}}
+
+
+def _ca_payload(fx: Fixtures):
+    number = fx.next_number()
+    return "/api/ca/", {"json": {
+        "obra": 1000 + number % 50, "op": 1 + number % 900, "sub_item": 0,
+        "requester_info": "Engenharia - Benchmark", "reason": "Alteração criada pelo benchmark.",
+        "item_adicionado": {"material_description": f"Material benchmark {number}", "quantity": 1},
+    }}
+
+
+def scenarios() -> list:
+    month_ago = (datetime.now(timezone.utc) - timedelta(days=30)).date().isoformat()
+    quarter_ago = (datetime.now(timezone.utc) - timedelta(days=89)).date().isoformat()
+    return [
+        # --- Recebimentos ---
+        Scenario("recebimentos: listar p1", "GET",
+                 lambda fx: ("/api/recebimentos/", {"params": {"page": 1, "page_size": 20}})),
+        Scenario("recebimentos: listar p50", "GET",
+                 lambda fx: ("/api/recebimentos/", {"params": {"page": 50, "page_size": 20}})),
+        Scenario("recebimentos: listar cursor", "GET",
+                 lambda fx: ("/api/recebimentos/", {"params": {"pagination": "cursor", "page_size": 20}})),
+        Scenario("recebimentos: busca", "GET",
+                 lambda fx: ("/api/recebimentos/", {"params": {"search": "Paulista", "page": 4, "page_size": 20}})),
+        Scenario("recebimentos: filtros", "GET",
+                 lambda fx: ("/api/recebimentos/", {"params": {
+                     "status": "Conferido", "is_client_material": "true", "start_date": month_ago, "page": 4}})),
+        Scenario("recebimentos: stats", "GET", lambda fx: ("/api/recebimentos/stats", {})),
+        Scenario("recebimentos: export csv 30d", "GET",
+                 lambda fx: ("/api/recebimentos/export", {"params": {"format": "csv", "start_date": month_ago}})),
+        Scenario("recebimentos: criar", "POST",
+                 lambda fx: ("/api/recebimentos/", {"json": {
+                     "nfNumber": f"BN-{fx.next_number()}", "supplier": "Fornecedor Benchmark",
+                     "orderNumber": f"BN-PC-{fx.sequence}", "nfValue": 100.0, "nfVolume": 1}})),
+        Scenario("recebimentos: importar 50", "POST", _import_csv),
+        Scenario("recebimentos: conferir", "PUT", _conference),
+        Scenario("recebimentos: resolver", "POST", _resolve),
+        Scenario("recebimentos: rejeitar", "PUT", _reject),
+        # --- C.A. ---
+        Scenario("ca: criar", "POST", _ca_payload),
+        Scenario("ca: listar", "GET", lambda fx: ("/api/ca/", {"params": {"page": 1, "page_size": 10}})),
+        Scenario("ca: board", "GET", lambda fx: ("/api/ca/board", {})),
+        Scenario("ca: detalhe", "GET",
+                 lambda fx: (f"/api/ca/{fx.ca_ids[fx.next_number() % len(fx.ca_ids)]}", {})),
+        Scenario("ca: status do item", "PUT", _stock_status),
+        Scenario("ca: status em lote (20)", "PUT", _stock_status_batch),
+        Scenario("ca: movimento", "POST",
+                 lambda fx: ("/api/ca/movements", {"json": {
+                     "ca_id": fx.ca_ids[fx.next_number() % len(fx.ca_ids)], "item_description": "Material benchmark",
+                     "quantity_moved": 1, "movement_type": "SAIDA_DA_OBRA", "executed_by": "Benchmark"}})),
+        # --- Requisições ---
+        Scenario("requisicoes: criar", "POST",
+                 lambda fx: ("/api/requisitions/", {"json": {
+                     "obra": 1001, "sub_item": 1, "requestedBy": "Benchmark",
+                     "orderNumber": f"OP-{fx.next_number()}", "materialDescription": "Material benchmark"}})),
+        Scenario("requisicoes: pendentes", "GET", lambda fx: ("/api/requisitions/pending", {})),
+        Scenario("requisicoes: atender", "PUT", _fulfill),
+        Scenario("requisicoes: sugestões", "GET",
+                 lambda fx: ("/api/requisitions/matches", {"params": {
+                     "orderNumber": f"OP-{fx.next_number() % 900}", "obra": 1001,
+                     "materialDescription": "cabo pp 4x2.5"}})),
+        # --- Estoque ---
+        Scenario("estoque: posições", "GET", lambda fx: ("/api/stock/positions", {})),
+        Scenario("estoque: posições há 30 dias", "GET",
+                 lambda fx: ("/api/stock/positions", {"params": {"at": month_ago}})),
+        # --- Indicadores ---
+        Scenario("indicadores: vazão 30d", "GET", lambda fx: ("/api/analytics/throughput", {})),
+        Scenario("indicadores: vazão por turno 90d", "GET",
+                 lambda fx: ("/api/analytics/throughput", {"params": {
+                     "start_day": quarter_ago, "granularity": "shift"}})),
+        Scenario("indicadores: tempos de ciclo 90d", "GET",
+                 lambda fx: ("/api/analytics/lead-times", {"params": {"group_by": "supplier"}})),
+    ]
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(client, scenario: Scenario, fx: Fixtures, requests: int, concurrency: int) -> Optional[dict]:
+    calls = []
+    for _ in range(requests):
+        built = scenario.build(fx)
+        if built is None:
+            break
+        calls.append(built)
+    if not calls:
+        return None
+
+    latencies, queries, errors = [], [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(path, kwargs):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(scenario.method, path, **kwargs)
+            await response.aread()
+            latencies.append((time.perf_counter() - start) * 1000)
+        if response.status_code not in scenario.expected_status:
+            errors += 1
+        match = SERVER_TIMING_QUERIES.search(response.headers.get("server-timing", ""))
+        if match:
+            queries.append(int(match.group(1)))
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(call(path, kwargs) for path, kwargs in calls))
+    wall = time.perf_counter() - wall_start
+
+    return {
+        "requests": len(calls),
+        "errors": errors,
+        "throughput_rps": round(len(calls) / wall, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "queries_per_request": round(statistics.mean(queries), 2) if queries else None,
+    }
+
+
+async def run_all(args) -> dict:
+    import httpx
+
+    from app.main import app
+
+    fx = load_fixtures()
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+        for scenario in scenarios():
+            if args.only and not any(pattern in scenario.name for pattern in args.only):
+                continue
+            result = await run_scenario(client, scenario, fx, args.requests, args.concurrency)
+            if result is None:
+                print(f"{scenario.name:<32}sem alvos disponíveis nos dados gerados")
+                continue
+            results[scenario.name] = result
+            print(
+                f"{scenario.name:<32}{result['requests']:>6}{result['throughput_rps']:>10.1f}"
+                f"{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+                f"{result['queries_per_request'] if result['queries_per_request'] is not None else '-':>9}"
+                f"{result['errors']:>8}"
+            )
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    regressions = 0
+    print(f"\nComparação com a baseline de {baseline['meta']['created_at']} (limite {threshold:.0%}):")
+    for name, result in results.items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"  {name:<32}novo cenário")
+            continue
+        p95_delta = result["p95_ms"] / old["p95_ms"] - 1 if old["p95_ms"] else 0.0
+        rps_delta = result["throughput_rps"] / old["throughput_rps"] - 1 if old["throughput_rps"] else 0.0
+        queries_changed = result["queries_per_request"] != old["queries_per_request"]
+        regressed = p95_delta > threshold or rps_delta < -threshold or (
+            queries_changed and (result["queries_per_request"] or 0) > (old["queries_per_request"] or 0)
+        )
+        regressions += regressed
+        print(
+            f"  {name:<32}p95 {p95_delta:>+7.1%}  vazão {rps_delta:>+7.1%}  "
+            f"queries {old['queries_per_request']} -> {result['queries_per_request']}"
+            f"{'  <-- REGRESSÃO' if regressed else ''}"
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--receivings", type=int, default=20000)
+    parser.add_argument("--requisitions", type=int, default=5000)
+    parser.add_argument("--cas", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-generate", action="store_true", help="usa os dados já existentes no banco")
+    parser.add_argument("--reset", action="store_true",
+                        help="confirma que as tabelas do DATABASE_URL informado podem ser apagadas e recriadas")
+    parser.add_argument("--requests", type=int, default=200, help="requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--only", nargs="*", help="roda apenas os cenários cujo nome contém um dos textos")
+    parser.add_argument("--save", help="grava o resultado como baseline JSON")
+    parser.add_argument("--compare", help="baseline JSON para comparação")
+    parser.add_argument("--threshold", type=float, default=0.2, help="piora relativa tolerada (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if "DATABASE_URL" in os.environ and not (args.reset or args.skip_generate):
+        parser.error("DATABASE_URL definido: use --reset para recriar as tabelas ou --skip-generate.")
+    os.environ.setdefault(
+        "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench_suite.db')}"
+    )
+
+    from app.database import engine
+    from benchmarks.datagen import generate
+
+    # A contenção de escrita do SQLite gera muitos avisos de query lenta; a
+    # latência de cada cenário já aparece no relatório
+    logging.getLogger("app.sql.slow").setLevel(logging.ERROR)
+
+    if not args.skip_generate:
+        counts = generate(engine, args.receivings, args.requisitions, args.cas, args.seed)
+        print("Dados gerados: " + ", ".join(f"{table}={count}" for table, count in counts.items()))
+
+    print(f"Banco: {engine.dialect.name} | {args.requests} req/cenário | concorrência {args.concurrency}\n")
+    print(f"{'cenário':<32}{'req':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'queries':>9}{'erros':>8}")
+    results = asyncio.run(run_all(args))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as output:
+            json.dump({
+                "meta": {
+                    "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "database": engine.dialect.name, "python": platform.python_version(),
+                    "requests": args.requests, "concurrency": args.concurrency,
+                    "data": {"receivings": args.receivings, "requisitions": args.requisitions, "cas": args.cas,
+                             "seed": args.seed},
+                },
+                "results": results,
+            }, output, ensure_ascii=False, indent=2)
+        print(f"\nBaseline gravada em {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold)
+        if regressions:
+            print(f"\n{regressions} cenário(s) com regressão.")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
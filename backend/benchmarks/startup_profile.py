@@ -0,0 +1,112 @@
+# backend/benchmarks/startup_profile.py
+#
+# Perfil de subida de um worker, sempre em processos novos (cold start):
+#   1. tempo de importação por módulo (python -X importtime ao importar
+#      app.main): módulos da aplicação e pacotes de terceiros agrupados;
+#   2. tempo até a primeira resposta: sobe um uvicorn novo e mede do início do
+#      processo até o primeiro 200 em GET / (mediana de --runs subidas).
+# Sai com código 1 se a mediana passar de --target-ms.
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.startup_profile
+#     python -m benchmarks.startup_profile --runs 10 --target-ms 1200
+# Sem DATABASE_URL usa um SQLite temporário; com ele, o banco precisa estar migrado.
+import argparse
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+IMPORT_TARGET = "import app.main"
+
+
+def import_times(env: dict) -> list:
+    """(módulo, própria µs, acumulada µs) de cada importação feita por app.main."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", IMPORT_TARGET],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def report_imports(rows: list, top: int):
+    total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+    app_rows = sorted((row for row in rows if row[0].startswith("app")), key=lambda row: -row[2])
+    print(f"Importação de app.main: {total_ms:.0f} ms ({len(rows)} módulos)\n")
+    print(f"  {'módulo da aplicação':<40}{'própria ms':>12}{'acumulada ms':>14}")
+    for name, self_us, cumulative_us in app_rows[:top]:
+        print(f"  {name:<40}{self_us / 1000:>12.1f}{cumulative_us / 1000:>14.1f}")
+
+    packages = defaultdict(int)
+    for name, self_us, _ in rows:
+        if not name.startswith("app"):
+            packages[name.split(".")[0]] += self_us
+    print(f"\n  {'pacote (soma do tempo próprio)':<40}{'ms':>12}")
+    for package, self_us in sorted(packages.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {package:<40}{self_us / 1000:>12.1f}")
+
+
+def time_to_first_request(env: dict, port: int) -> float:
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = started + 30
+        while time.perf_counter() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError("uvicorn encerrou na subida (o banco está migrado?)")
+            # http.client: sem o custo de montar um cliente (e contexto SSL) por tentativa
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            try:
+                connection.request("GET", "/")
+                if connection.getresponse().status == 200:
+                    return (time.perf_counter() - started) * 1000
+            except OSError:
+                pass
+            finally:
+                connection.close()
+            time.sleep(0.005)
+        raise RuntimeError("uvicorn não respondeu a tempo")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1500.0,
+                        help="meta para a mediana do tempo até a primeira resposta")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if "DATABASE_URL" not in env:
+        env["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}"
+        subprocess.run([sys.executable, "-m", "app.migrations"], env=env, check=True, capture_output=True)
+
+    report_imports(import_times(env), args.top)
+
+    samples = [time_to_first_request(env, args.port) for _ in range(args.runs)]
+    median = statistics.median(samples)
+    print(f"\nTempo até a primeira resposta ({args.runs} subidas): mediana {median:.0f} ms, "
+          f"mín {min(samples):.0f} ms, máx {max(samples):.0f} ms | meta {args.target_ms:.0f} ms")
+    print("Detalhe por etapa dentro do worker: STARTUP_PROFILE=true uvicorn app.main:app")
+    sys.exit(0 if median <= args.target_ms else 1)
+
+
+if __name__ == "__main__":
+    main()
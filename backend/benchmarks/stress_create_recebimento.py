@@ -0,0 +1,144 @@
+# backend/benchmarks/stress_create_recebimento.py
+#
+# Teste de estresse concorrente da criação de recebimentos (POST /api/recebimentos/)
+# contra um uvicorn real, nos modos síncrono e assíncrono. Verifica:
+#   1. mesma NF enviada por N clientes ao mesmo tempo (chaves diferentes):
+#      exatamente um 201, os demais 400 e uma única linha gravada;
+#   2. mesma chave Idempotency-Key reenviada por N clientes ao mesmo tempo
+#      (retentativas do mesmo envio): todas as respostas 2xx com o mesmo id,
+#      uma única linha gravada;
+#   3. N recebimentos diferentes disputando a mesma requisição: exatamente um a
+#      vincula; os demais recebem 409 (requisição bloqueada) ou 400 (já atendida).
+# Sai com código 1 se alguma verificação falhar.
+#
+# Uso (a partir de backend/):
+#     python -m benchmarks.stress_create_recebimento
+#     python -m benchmarks.stress_create_recebimento --clients 100 --rounds 10
+# Com DATABASE_URL (ex.: um PostgreSQL de teste) as tabelas são recriadas nele.
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+
+import httpx
+
+from benchmarks.loadtest import start_server
+
+
+def reset_database(database_url: str):
+    env = dict(os.environ, DATABASE_URL=database_url)
+    script = """
+from app.database import Base, engine
+from app import migrations
+Base.metadata.drop_all(bind=engine)
+migrations.upgrade(engine)
+"""
+    subprocess.run([sys.executable, "-c", script], env=env, check=True)
+
+
+async def burst(client: httpx.AsyncClient, requests: list) -> list:
+    """Dispara todas as requisições ao mesmo tempo; devolve (status, corpo JSON)."""
+    async def send(payload, key):
+        response = await client.post("/api/recebimentos/", json=payload, headers={"Idempotency-Key": key})
+        return response.status_code, response.json()
+
+    return await asyncio.gather(*(send(payload, key) for payload, key in requests))
+
+
+async def count_rows(client: httpx.AsyncClient, search: str) -> int:
+    response = await client.get("/api/recebimentos/", params={"search": search, "include_total": "true"})
+    response.raise_for_status()
+    return response.json()["total"]
+
+
+async def run_rounds(port: int, clients: int, rounds: int, tag: str) -> list:
+    failures = []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    def check(condition: bool, message: str):
+        if not condition:
+            failures.append(message)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+        for round_number in range(rounds):
+            prefix = f"{tag}{round_number}"
+
+            # 1. Mesma NF, chaves diferentes
+            results = await burst(client, [
+                ({"nfNumber": f"NF-{prefix}-dup", "supplier": "Estresse", "orderNumber": f"PED-{prefix}-{i}"},
+                 str(uuid.uuid4()))
+                for i in range(clients)
+            ])
+            statuses = sorted(status for status, _ in results)
+            check(statuses.count(201) == 1 and statuses.count(400) == clients - 1,
+                  f"[{prefix}] NF duplicada: respostas {statuses}")
+            check(await count_rows(client, f"NF-{prefix}-dup") == 1, f"[{prefix}] NF duplicada gravada mais de uma vez")
+
+            # 2. Mesma chave, retentativas simultâneas
+            key = str(uuid.uuid4())
+            payload = {"nfNumber": f"NF-{prefix}-retry", "supplier": "Estresse", "orderNumber": f"PED-{prefix}-retry"}
+            results = await burst(client, [(payload, key)] * clients)
+            ids = {body.get("id") for status, body in results if status == 201}
+            check(all(status == 201 for status, _ in results) and len(ids) == 1,
+                  f"[{prefix}] retentativas: respostas {sorted(status for status, _ in results)}, ids {ids}")
+            check(await count_rows(client, f"NF-{prefix}-retry") == 1, f"[{prefix}] retentativa criou mais de uma linha")
+
+            # 3. Recebimentos diferentes disputando a mesma requisição
+            requisition = (await client.post("/api/requisitions/", json={
+                "obra": 1000, "requestedBy": "Estresse", "orderNumber": f"OP-{prefix}",
+                "materialDescription": "Material do teste de estresse",
+            })).json()
+            results = await burst(client, [
+                ({"nfNumber": f"NF-{prefix}-req-{i}", "supplier": "Estresse", "orderNumber": f"PED-{prefix}-req-{i}",
+                  "requisition_id_to_fulfill": requisition["id"]}, str(uuid.uuid4()))
+                for i in range(clients)
+            ])
+            statuses = sorted(status for status, _ in results)
+            check(statuses.count(201) == 1 and all(status in (201, 400, 409) for status in statuses),
+                  f"[{prefix}] requisição disputada: respostas {statuses}")
+            winners = [body for status, body in results if status == 201]
+            if winners:
+                linked = winners[0]["fulfilled_requisition"]
+                check(linked is not None and linked["id"] == requisition["id"],
+                      f"[{prefix}] requisição disputada: vencedor sem vínculo")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=50, help="requisições simultâneas por cenário")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    database_url = os.getenv(
+        "DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'stress.db')}"
+    )
+    reset_database(database_url)
+    log_path = os.path.join(tempfile.gettempdir(), "stress_uvicorn.log")
+
+    failures = []
+    for async_mode in (False, True):
+        mode = "async" if async_mode else "sync"
+        with open(log_path, "a") as log_file:
+            server = start_server(database_url, async_mode, args.port, log_file)
+        try:
+            mode_failures = asyncio.run(run_rounds(args.port, args.clients, args.rounds, mode))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"{mode:<6} {args.rounds} rodadas x 3 cenários x {args.clients} clientes: "
+              f"{'OK' if not mode_failures else f'{len(mode_failures)} falhas'}")
+        failures.extend(mode_failures)
+
+    for failure in failures:
+        print(f"  FALHA {failure}")
+    print(f"\nLogs do servidor: {log_path}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ import { CAPage } from "./pages/CAPage.jsx";
 import { RequisitionPage } from "./pages/RequisitionPage.jsx";
 
 import { Toaster } from "@/components/ui/sonner";
+import { useLiveUpdates } from "./hooks/useLiveUpdates.js";
 
 const Separação = () => (
   <div className="container mx-auto p-4">
@@ -32,6 +33,9 @@ const Relatoriornc = () => (
 );
 
 function AppLayout() {
+  // Atualiza as telas quando outro terminal altera os dados
+  useLiveUpdates();
+
   return (
     <Layout>
       <Outlet /> {/* O <Outlet> renderiza a página filha aqui */}
@@ -26,8 +26,17 @@ export const getRecebimentos = async (filters = {}) => {
 
 export const createRecebimento = async (formData) => {
   console.log("FRONTEND: Enviando novo recebimento...", formData);
-  const response = await apiClient.post("/recebimentos/", formData);
-  return response.data;
+  // Uma chave por envio: se a conexão cair, a nova tentativa com a mesma chave
+  // recebe a resposta original em vez de "NF já registrada"
+  const config = { headers: { "Idempotency-Key": crypto.randomUUID() } };
+  try {
+    const response = await apiClient.post("/recebimentos/", formData, config);
+    return response.data;
+  } catch (err) {
+    if (err.response) throw err;
+    const response = await apiClient.post("/recebimentos/", formData, config);
+    return response.data;
+  }
 };
 
 export const updateRecebimento = async ({ id, data }) => {
@@ -48,6 +57,24 @@ export const rejectRecebimentoEntry = async ({ id, data }) => {
   return response.data;
 };
 
+// A exportação é baixada direto pelo navegador (sem passar pelo axios),
+// para que o arquivo seja gravado em disco à medida que chega.
+export const getRecebimentosExportUrl = (filters = {}, format = "csv") => {
+  const params = new URLSearchParams({ format });
+  if (filters.search) params.append("search", filters.search);
+  if (filters.status) params.append("status", filters.status);
+  if (filters.startDate) params.append("start_date", filters.startDate);
+  if (filters.endDate) params.append("end_date", filters.endDate);
+  if (filters.isClientMaterial && filters.isClientMaterial !== "all") {
+    params.append("is_client_material", filters.isClientMaterial);
+  }
+  return `${apiURL}/recebimentos/export?${params.toString()}`;
+};
+
+// Canal WebSocket de eventos em tempo real (mesmo host da API)
+export const getEventsSocketUrl = () =>
+  `${apiURL.replace(/^http/, "ws")}/events/ws`;
+
 // --- FUNÇÕES PARA O MÓDULO C.A. ---
 
 export const getComunicadosAlteracao = async (filters = {}) => {
@@ -62,6 +89,14 @@ export const getComunicadosAlteracao = async (filters = {}) => {
   return response.data;
 };
 
+export const getCABoard = async (perColumn = 50) => {
+  console.log("FRONTEND: Buscando painel Kanban de C.A...");
+  const response = await apiClient.get("/ca/board", {
+    params: { per_column: perColumn },
+  });
+  return response.data;
+};
+
 export const createComunicadoAlteracao = async (caData) => {
   console.log("FRONTEND: Criando novo C.A...", caData);
   const response = await apiClient.post("/ca/", caData);
@@ -95,10 +130,20 @@ export const createRequisition = async (requisitionData) => {
   return response.data;
 };
 
+// A listagem de pendentes é paginada por cursor (até 500 por página); as telas
+// precisam de todas as pendentes, então as páginas são seguidas até o fim
 export const getPendingRequisitions = async () => {
   console.log("FRONTEND: Buscando requisições pendentes...");
-  const response = await apiClient.get("/requisitions/pending");
-  return response.data;
+  const pending = [];
+  let cursor = null;
+  do {
+    const params = { page_size: 500 };
+    if (cursor) params.cursor = cursor;
+    const response = await apiClient.get("/requisitions/pending", { params });
+    pending.push(...response.data.items);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return pending;
 };
 
 export const fulfillRequisition = async (requisitionId) => {
@@ -108,3 +153,15 @@ export const fulfillRequisition = async (requisitionId) => {
   );
   return response.data;
 };
+
+// --- Indicadores ---
+
+// Vazão de recebimentos por dia de produção ("day") ou por turno ("shift");
+// o dia corrente vem recalculado na hora (live: true)
+export const getReceivingThroughput = async ({ startDay, endDay, granularity = "day" } = {}) => {
+  const params = { granularity };
+  if (startDay) params.start_day = startDay;
+  if (endDay) params.end_day = endDay;
+  const response = await apiClient.get("/analytics/throughput", { params });
+  return response.data;
+};
@@ -0,0 +1,74 @@
+// frontend/src/components/charts/ReceivingThroughputChart.jsx
+import React, { useState } from "react";
+import { useQuery } from "@tanstack/react-query";
+import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from "recharts";
+import { Card, CardContent, CardHeader, CardTitle } from "../ui/card";
+import { Skeleton } from "../ui/skeleton";
+import { ToggleGroup, ToggleGroupItem } from "../ui/toggle-group";
+import { getReceivingThroughput } from "../../api.js";
+
+// Séries exibidas (campos da API)
+const SERIES = [
+  { key: "entered", name: "Entradas", color: "hsl(var(--primary))" },
+  { key: "conferred", name: "Conferidos", color: "#16a34a" },
+  { key: "pending", name: "Pendências", color: "#f59e0b" },
+  { key: "rejected", name: "Rejeições", color: "#dc2626" },
+];
+
+// Rótulo do eixo X: "18/10" por dia, "18/10 T2" por turno
+const label = (point) => {
+  const [, month, day] = point.day.split("-");
+  return `${day}/${month}${point.shift ? ` T${point.shift}` : ""}`;
+};
+
+export function ReceivingThroughputChart() {
+  const [granularity, setGranularity] = useState("day");
+
+  // A chave começa com "recebimentos": os eventos em tempo real (useLiveUpdates)
+  // recarregam o gráfico a cada entrada, conferência ou tratativa
+  const { data, isLoading, isError } = useQuery({
+    queryKey: ["recebimentos", "throughput", granularity],
+    queryFn: () => getReceivingThroughput({
+      granularity,
+      // Por turno, os últimos 7 dias (21 barras); por dia, os últimos 30 (padrão da API)
+      startDay: granularity === "shift"
+        ? new Date(Date.now() - 6 * 86400000).toISOString().slice(0, 10)
+        : undefined,
+    }),
+  });
+
+  const points = (data?.points ?? []).map((point) => ({ ...point, label: label(point) }));
+
+  return (
+    <Card>
+      <CardHeader className="flex flex-row items-center justify-between space-y-0">
+        <CardTitle>Vazão de Recebimentos</CardTitle>
+        <ToggleGroup type="single" value={granularity} onValueChange={(value) => value && setGranularity(value)}>
+          <ToggleGroupItem value="day">Por dia</ToggleGroupItem>
+          <ToggleGroupItem value="shift">Por turno</ToggleGroupItem>
+        </ToggleGroup>
+      </CardHeader>
+      <CardContent className="pl-2">
+        {isLoading && <Skeleton className="h-[300px] w-full" />}
+        {isError && <div className="h-[300px] flex items-center justify-center text-red-500">Erro ao carregar a vazão.</div>}
+        {data && (
+          <ResponsiveContainer width="100%" height={300}>
+            <BarChart data={points} margin={{ top: 5, right: 20, left: -10, bottom: 5 }}>
+              <CartesianGrid strokeDasharray="3 3" />
+              <XAxis dataKey="label" fontSize={12} />
+              <YAxis fontSize={12} allowDecimals={false} />
+              <Tooltip
+                labelFormatter={(value, payload) => payload?.[0]?.payload.live ? `${value} (hoje, parcial)` : value}
+                contentStyle={{ backgroundColor: 'hsl(var(--background))', border: '1px solid hsl(var(--border))' }}
+              />
+              <Legend wrapperStyle={{ fontSize: '14' }} />
+              {SERIES.map((series) => (
+                <Bar key={series.key} dataKey={series.key} name={series.name} fill={series.color} radius={[4, 4, 0, 0]} />
+              ))}
+            </BarChart>
+          </ResponsiveContainer>
+        )}
+      </CardContent>
+    </Card>
+  );
+}
@@ -8,15 +8,16 @@ import { CACard } from './CACard.jsx';
  * Componente que renderiza uma coluna no painel Kanban.
  * @param {string} title - O título da coluna.
  * @param {Array} items - A lista de C.A.s a serem exibidos nesta coluna.
+ * @param {number} [total] - Total de C.A.s no status (pode ser maior que items.length).
  * @param {function} onCardClick - A função a ser chamada quando um card é clicado.
  */
-export function KanbanColumn({ title, items = [], onCardClick }) {
+export function KanbanColumn({ title, items = [], total, onCardClick }) {
   return (
     // Contêiner principal da coluna
     <div className="flex flex-col gap-4 p-4 bg-muted/50 rounded-lg min-h-[200px]">
       
       {/* Cabeçalho da coluna com o título e a contagem de itens */}
-      <h3 className="font-semibold text-lg tracking-tight">{title} ({items.length})</h3>
+      <h3 className="font-semibold text-lg tracking-tight">{title} ({total ?? items.length})</h3>
       
       {/* Contêiner para os cards, com espaçamento vertical */}
       <div className="flex flex-col gap-2">
@@ -0,0 +1,49 @@
+import { useEffect } from "react";
+import { useQueryClient } from "@tanstack/react-query";
+import { getEventsSocketUrl } from "../api.js";
+
+// Consultas do React Query que cada tipo de evento deixa desatualizadas
+const QUERY_KEYS_BY_ENTITY = {
+  recebimento: [["recebimentos"]],
+  requisition: [["pendingRequisitions"], ["recebimentos"]],
+  ca: [["comunicados_kanban"]],
+  ca_item: [["comunicados_kanban"], ["comunicado"]],
+  ca_movement: [["comunicado"]],
+};
+
+const RECONNECT_DELAY_MS = 3000;
+
+// Mantém uma conexão WebSocket com o backend e invalida as consultas afetadas
+// a cada evento de alteração, no lugar de recarregar as listagens periodicamente.
+export function useLiveUpdates() {
+  const queryClient = useQueryClient();
+
+  useEffect(() => {
+    let socket;
+    let reconnectTimer;
+    let closed = false;
+
+    const connect = () => {
+      socket = new WebSocket(getEventsSocketUrl());
+
+      socket.onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        (QUERY_KEYS_BY_ENTITY[event.entity] || []).forEach((queryKey) =>
+          queryClient.invalidateQueries({ queryKey })
+        );
+      };
+
+      socket.onclose = () => {
+        if (!closed) reconnectTimer = setTimeout(connect, RECONNECT_DELAY_MS);
+      };
+    };
+
+    connect();
+
+    return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
+      socket?.close();
+    };
+  }, [queryClient]);
+}
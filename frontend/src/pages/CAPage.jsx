@@ -1,7 +1,7 @@
 // frontend/src/pages/CAPage.jsx
 import React, { useState } from 'react';
 import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query'; 
-import { getComunicadosAlteracao, createComunicadoAlteracao, getComunicadoAlteracaoById } from '../api.js';
+import { getCABoard, createComunicadoAlteracao } from '../api.js';
 
 import { toast } from "sonner";
 import { Drawer, DrawerContent, DrawerHeader, DrawerTitle } from "@/components/ui/drawer.jsx";
@@ -18,17 +18,17 @@ export function CAPage() {
   const [isCreateDrawerOpen, setCreateDrawerOpen] = useState(false);
   const [viewingCAId, setViewingCAId] = useState(null);
 
-  // Query para buscar os dados do Kanban
+  // Query para buscar os dados do Kanban (contagens + cards por status)
   const { data, isLoading, isError, error } = useQuery({
     queryKey: ['comunicados_kanban'],
-    queryFn: () => getComunicadosAlteracao({ page: 1, page_size: 500 }),
+    queryFn: () => getCABoard(),
   });
 
-  // Lógica de filtro para o Kanban
-  const allItems = data?.items || [];
-  const pendingAnalysisItems = allItems.filter(item => item.status === "Pendente de Análise de Estoque");
-  const awaitingPurchaseItems = allItems.filter(item => item.status === "Aguardando Compra");
-  const readyForExecutionItems = allItems.filter(item => item.status === "Pronto para Execução");
+  // O backend já entrega os cards agrupados por status
+  const columnFor = (status) => data?.columns?.find(column => column.status === status) || { items: [], total: 0 };
+  const pendingAnalysis = columnFor("Pendente de Análise de Estoque");
+  const awaitingPurchase = columnFor("Aguardando Compra");
+  const readyForExecution = columnFor("Pronto para Execução");
 
   // --- Mutação para CRIAR C.A. ---
   const createCAMutation = useMutation({
@@ -74,17 +74,20 @@ export function CAPage() {
         <div className="grid grid-cols-1 md:grid-cols-3 gap-6 items-start">
             <KanbanColumn 
                 title="Análise de Estoque" 
-                items={pendingAnalysisItems} 
+                items={pendingAnalysis.items}
+                total={pendingAnalysis.total}
                 onCardClick={handleCardClick}
             />
             <KanbanColumn 
                 title="Aguardando Compra" 
-                items={awaitingPurchaseItems} 
+                items={awaitingPurchase.items}
+                total={awaitingPurchase.total}
                 onCardClick={handleCardClick}
             />
             <KanbanColumn 
                 title="Pronto para Execução" 
-                items={readyForExecutionItems}
+                items={readyForExecution.items}
+                total={readyForExecution.total}
                 onCardClick={handleCardClick} 
             />
         </div>
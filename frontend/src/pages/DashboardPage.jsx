@@ -1,6 +1,7 @@
 // src/pages/DashboardPage.jsx
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { ProductionChart } from "@/components/charts/ProductionChart";
+import { ReceivingThroughputChart } from "@/components/charts/ReceivingThroughputChart";
 import { RecentOrdersTable } from "@/components/tables/RecentOrdersTable";
 
 export function DashboardPage() {
@@ -77,6 +78,8 @@ export function DashboardPage() {
           <RecentOrdersTable />
         </div>
       </div>
+
+      <ReceivingThroughputChart />
     </div>
   );
 }
@@ -2,6 +2,7 @@ import React, { useState } from "react";
 import { format } from "date-fns";
 import { Calendar as CalendarIcon } from "lucide-react";
 import { cn } from "@/lib/utils.js";
+import { getRecebimentosExportUrl } from "../api.js";
 
 import { Button } from "@/components/ui/button";
 import { Calendar } from "@/components/ui/calendar";
@@ -17,6 +18,14 @@ export function ReportsPage() {
     to: new Date(),
   });
 
+  const handleExport = (fileFormat) => {
+    const filters = {
+      startDate: date?.from ? format(date.from, "yyyy-MM-dd") : undefined,
+      endDate: format(date?.to || date?.from || new Date(), "yyyy-MM-dd"),
+    };
+    window.location.href = getRecebimentosExportUrl(filters, fileFormat);
+  };
+
   return (
     <div className="container mx-auto p-4 md:p-8 space-y-6">
       <h1 className="text-3xl font-bold">Gerador de Relatórios</h1>
@@ -65,7 +74,10 @@ export function ReportsPage() {
             </PopoverContent>
           </Popover>
 
-          <Button>Gerar Relatório</Button>
+          <Button onClick={() => handleExport("xlsx")}>Gerar Relatório</Button>
+          <Button variant="outline" onClick={() => handleExport("csv")}>
+            Exportar CSV
+          </Button>
         </CardContent>
       </Card>
       